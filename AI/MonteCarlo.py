@@ -0,0 +1,110 @@
+import random
+import sys
+sys.path.append("..")  #so other modules can be found in parent dir
+from Player import *
+from Constants import *
+from Move import Move
+from AIPlayerUtils import *
+from MonteCarloSearch import MonteCarloSearch, MCTS_TIME_LIMIT
+from Occupancy import tupleCoords
+
+
+##
+#AIPlayer
+#Description: Plays with a Monte Carlo tree search (see MonteCarloSearch.py).
+#   The search tree is kept from one move to the next, so the moves of a turn
+#   (and the opponent's reply, if it was one the search expected) build on
+#   the playouts already made.  When run with pondering on (see
+#   PlayerProcess.py) it keeps searching while the opponent moves.
+#
+#Variables:
+#   playerId - The id of the player.
+#   searcher - the search (MonteCarloSearch)
+##
+class AIPlayer(Player):
+
+    #__init__
+    #Description: Creates a new Player
+    #
+    #Parameters:
+    #   inputPlayerId - The id to give the new player (int)
+    #   timeLimit - the seconds to spend on each move (number)
+    ##
+    def __init__(self, inputPlayerId, timeLimit=MCTS_TIME_LIMIT):
+        super(AIPlayer,self).__init__(inputPlayerId, "MonteCarlo")
+        self.searcher = MonteCarloSearch(timeLimit)
+
+    ##
+    #getPlacement
+    #
+    #Description: Puts the anthill and tunnel a little apart at the back,
+    #   the grass along the front of our side, and the enemy's food as far
+    #   from the enemy's anthill and tunnel as possible.
+    #
+    #Parameters:
+    #   currentState - the state of the game at this point in time.
+    #
+    #Return: The coordinates of where the constructions are to be placed
+    ##
+    def getPlacement(self, currentState):
+        self.searcher.reset()
+        if currentState.phase == SETUP_PHASE_1:    #stuff on my side
+            return [(2, 1), (7, 1),
+                    (0, 3), (1, 3), (2, 3), (3, 3), (4, 3),
+                    (5, 3), (6, 3), (8, 3), (9, 3)]
+        elif currentState.phase == SETUP_PHASE_2:   #stuff on foe's side
+            enemyHome = getConstrList(currentState, 1 - currentState.whoseTurn, (ANTHILL, TUNNEL))
+            cells = []
+            for x in range(0, BOARD_LENGTH):
+                for y in range(6, BOARD_LENGTH):
+                    if currentState.board[x][y].constr == None:
+                        dist = min([abs(x - constr.coords[0]) + abs(y - constr.coords[1])
+                                    for constr in enemyHome] + [BOARD_LENGTH * 2])
+                        cells.append((dist, random.random(), (x, y)))
+            cells.sort(reverse=True)
+            return [cells[0][2], cells[1][2]]
+        else:
+            return [(0, 0)]
+
+    ##
+    #getMove
+    #Description: Gets the next move from the Player.
+    #
+    #Parameters:
+    #   currentState - The state of the current game waiting for the player's move (GameState)
+    #
+    #Return: The Move to be made
+    ##
+    def getMove(self, currentState):
+        return self.searcher.search(currentState)
+
+    ##
+    #getAttack
+    #Description: Attacks the enemy the search chose for the last move, or
+    #   the first one offered if the search didn't choose one
+    #
+    #Parameters:
+    #   currentState - A clone of the current state (GameState)
+    #   attackingAnt - The ant currently making the attack (Ant)
+    #   enemyLocation - The Locations of the Enemies that can be attacked (Location[])
+    ##
+    def getAttack(self, currentState, attackingAnt, enemyLocations):
+        for coord in enemyLocations:
+            if tupleCoords(coord) == self.searcher.bestAttack:
+                return coord
+        return enemyLocations[0]
+
+    ##
+    #ponder
+    #Description: Carries on searching below the last move made while
+    #   waiting for the game (see Player.ponder)
+    ##
+    def ponder(self, timeLimit):
+        return self.searcher.ponder(timeLimit)
+
+    ##
+    #registerWin
+    #Description: Throws away the search tree at the end of a game
+    ##
+    def registerWin(self, hasWon):
+        self.searcher.reset()
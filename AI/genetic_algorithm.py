@@ -284,23 +284,61 @@ class AIPlayer(Player):
 
 
     ##
-    #registerWin
+    #useGene
+    #Description: Makes the given gene the only one in the population and
+    #   clears its score, so it can be played and scored on its own (see
+    #   GeneticTrainer.py)
     #
-    def registerWin(self, hasWon):
-        
-        #print time.clock() - self.t0
+    #Parameters:
+    #   gene - the gene to play (int[])
+    #   gamesToEval - how many games its fitness will be averaged over (int)
+    ##
+    def useGene(self, gene, gamesToEval):
+        self.population = [gene]
+        self.fitnessList = [0]
+        self.geneIndex = 0
+        self.gamesToEval = gamesToEval
+        self.gamesPlayed = 0
+        self.geneScore = 0
+        self.state = None
+        self.stateList = []
+
+    ##
+    #scoreGame
+    #Description: Adds a finished game to the current gene's score
+    #
+    #Parameters:
+    #   hasWon - True if the player won the game. False if they lost (Boolean)
+    ##
+    def scoreGame(self, hasWon):
         self.gamesPlayed = self.gamesPlayed + 1
         #print int(time.clock()- self.t0)
         #self.geneScore = int((self.geneScore+ time.clock()- self.t0))+2
         if(hasWon):
             self.geneScore = self.geneScore+1
+
+    ##
+    #geneFitness
+    #Description: The fitness of the current gene from the games it has
+    #   played
+    ##
+    def geneFitness(self):
+        return int(self.geneScore /self.gamesToEval)
+
+    ##
+    #registerWin
+    #
+    def registerWin(self, hasWon):
+        
+        #print time.clock() - self.t0
+        self.scoreGame(hasWon)
         if(self.gamesPlayed == self.gamesToEval):
             
             #asciiPrintState(self.state)
             
             self.state = None
             #print str(self.geneScore) + "geneScore"
-            self.fitnessList[self.geneIndex] = int(self.geneScore /self.gamesToEval)
+            self.fitnessList[self.geneIndex] = self.geneFitness()
             print self.fitnessList
             self.geneIndex = self.geneIndex +1
             self.gamesPlayed = 0
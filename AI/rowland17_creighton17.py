@@ -2,7 +2,7 @@ import random
 import sys
 import math
 import unittest
-from collections import namedtuple, deque, defaultdict
+from collections import namedtuple, deque
 # import pickle
 import cPickle as pickle
 from os import path
@@ -18,6 +18,10 @@ import AIPlayerUtils as utils
 from Location import Location
 from Inventory import Inventory
 from Building import Building
+from UtilityStore import UtilityStore
+
+# the directory this file is in (the states are saved relative to it)
+AI_DIR = path.dirname(path.abspath(__file__))
 
 # ConState = namedtuple('ConState', ['id', 'utility'])
 
@@ -40,9 +44,12 @@ class AIPlayer(Player):
         Parameters:
             inputPlayerId - The id to give the new player (int)
         """
-        self.state_list_file = 'test_list'
-        self.state_list = defaultdict(float)
-        if path.isfile(path.join('..', self.state_list_file)):
+        self.state_list_file = path.join(AI_DIR, '..', 'test_list')
+        # (the states are wider than 64 bits, so they are kept in a dict)
+        self.state_list = UtilityStore(self.state_list_file + '.utils', default=0.0,
+                                       wideKeys=True)
+        # the pickled list older versions saved is read into the store once
+        if path.isfile(self.state_list_file) and not path.isfile(self.state_list.path):
             # print 'State list pickle found.'
             self.load_state_list()
         self.last_states = deque(maxlen=20)
@@ -857,17 +864,17 @@ class AIPlayer(Player):
         return out
 
     def save_state_list(self):
-        """Save the state/utilities list to a file."""
-        with open(self.state_list_file, 'wb+') as f:
-            # print 'Saving state list.'
-            pickle.dump(self.state_list, f, pickle.HIGHEST_PROTOCOL)
+        """Save the utilities changed this game to the store's file."""
+        # print 'Saving state list.'
+        self.state_list.flush()
 
     def load_state_list(self):
-        """Load the state/utilities list from a file.
-        Sets self.state_list to the unpickled data in the file."""
-        with open(path.join('..', self.state_list_file), 'rb+') as f:
+        """Load the state/utilities list from a pickle file.
+        Adds the unpickled data in the file to self.state_list."""
+        with open(self.state_list_file, 'rb+') as f:
             # print 'Loading state list.'
-            self.state_list = pickle.load(f)
+            self.state_list.update(pickle.load(f))
+        self.state_list.flush()
 
     def update_state(self, state, status='other'):
         """Add a state to the state_list if needed, and append it
@@ -932,98 +939,10 @@ class AIPlayer(Player):
     @staticmethod
     def getNextState(currentState, move):
         """
-        Version of genNextState with food carrying bug fixed.
+        Uses the game's own rules (food is picked up and dropped at the end
+        of the turn, and moved ants attack) so lookahead matches the game.
         """
-        # variables I will need
-        myGameState = currentState.fastclone()
-        myInv = utils.getCurrPlayerInventory(myGameState)
-        me = myGameState.whoseTurn
-        myAnts = myInv.ants
-
-        # If enemy ant is on my anthill or tunnel update capture health
-        myTunnels = myInv.getTunnels()
-        myAntHill = myInv.getAnthill()
-        for myTunnel in myTunnels:
-            ant = utils.getAntAt(myGameState, myTunnel.coords)
-            if ant is not None:
-                opponentsAnts = myGameState.inventories[not me].ants
-                if ant in opponentsAnts:
-                    myTunnel.captureHealth -= 1
-        if utils.getAntAt(myGameState, myAntHill.coords) is not None:
-            ant = utils.getAntAt(myGameState, myAntHill.coords)
-            opponentsAnts = myGameState.inventories[not me].ants
-            if ant in opponentsAnts:
-                myAntHill.captureHealth -= 1
-
-        # If an ant is built update list of ants
-        antTypes = [c.WORKER, c.DRONE, c.SOLDIER, c.R_SOLDIER]
-        if move.moveType == c.BUILD:
-            if move.buildType in antTypes:
-                ant = Ant(myInv.getAnthill().coords, move.buildType, me)
-                myInv.ants.append(ant)
-                # Update food count depending on ant built
-                if move.buildType == c.WORKER:
-                    myInv.foodCount -= 1
-                elif move.buildType == c.DRONE or move.buildType == c.R_SOLDIER:
-                    myInv.foodCount -= 2
-                elif move.buildType == c.SOLDIER:
-                    myInv.foodCount -= 3
-
-        # If a building is built update list of buildings and the update food
-        # count
-        if move.moveType == c.BUILD:
-            if move.buildType == c.TUNNEL:
-                building = Construction(move.coordList[0], move.buildType)
-                myInv.constrs.append(building)
-                myInv.foodCount -= 3
-
-        # If an ant is moved update their coordinates and has moved
-        if move.moveType == c.MOVE_ANT:
-            newCoord = move.coordList[len(move.coordList) - 1]
-            startingCoord = move.coordList[0]
-            for ant in myAnts:
-                if ant.coords == startingCoord:
-                    ant.coords = newCoord
-                    ant.hasMoved = False
-                    # If an ant is carrying food and ends on the anthill or tunnel
-                    # drop the food
-                    if ant.carrying and ant.coords == myInv.getAnthill().coords:
-                        myInv.foodCount += 1
-                        # ant.carrying = False
-                    for tunnels in myTunnels:
-                        if ant.carrying and (ant.coords == tunnels.coords):
-                            myInv.foodCount += 1
-                            # ant.carrying = False
-                    # If an ant doesn't have food and ends on the food grab
-                    # food
-                    if not ant.carrying:
-                        foods = utils.getConstrList(
-                            myGameState, None, (c.FOOD,))
-                        for food in foods:
-                            if food.coords == ant.coords:
-                                ant.carrying = True
-                    # If my ant is close to an enemy ant attack it
-                    adjacentTiles = utils.listAdjacent(ant.coords)
-                    for adj in adjacentTiles:
-                        # If ant is adjacent my ant
-                        if utils.getAntAt(myGameState, adj) is not None:
-                            closeAnt = utils.getAntAt(myGameState, adj)
-                            if closeAnt.player != me:  # if the ant is not me
-                                closeAnt.health = closeAnt.health - \
-                                    UNIT_STATS[ant.type][c.ATTACK]  # attack
-                                # If an enemy is attacked and looses all its health remove it from the other players
-                                # inventory
-                                if closeAnt.health <= 0:
-                                    enemyAnts = myGameState.inventories[
-                                        not me].ants
-                                    for enemy in enemyAnts:
-                                        if closeAnt.coords == enemy.coords:
-                                            myGameState.inventories[
-                                                not me].ants.remove(enemy)
-                                # If attacked an ant already don't attack any
-                                # more
-                                break
-        return myGameState
+        return utils.getNextState(currentState, move)
 
 
 class Node(object):
@@ -1043,3 +962,4 @@ class Node(object):
         if score is None:
             self.score = AIPlayer.score_state(state)
         self.parent = parent
+
@@ -2,7 +2,7 @@ import random
 import sys
 import math
 import unittest
-from collections import namedtuple, deque, defaultdict
+from collections import namedtuple, deque
 # import pickle
 import cPickle as pickle
 from os import path
@@ -18,6 +18,10 @@ import AIPlayerUtils as utils
 from Location import Location
 from Inventory import Inventory
 from Building import Building
+from UtilityStore import UtilityStore
+
+# the directory this file is in (the states are saved relative to it)
+AI_DIR = path.dirname(path.abspath(__file__))
 
 # ConState = namedtuple('ConState', ['id', 'utility'])
 
@@ -40,9 +44,12 @@ class AIPlayer(Player):
         Parameters:
             inputPlayerId - The id to give the new player (int)
         """
-        self.state_list_file = 'test_list'
-        self.state_list = defaultdict(float)
-        if path.isfile(path.join('..', self.state_list_file)):
+        self.state_list_file = path.join(AI_DIR, '..', 'test_list')
+        # (the states are wider than 64 bits, so they are kept in a dict)
+        self.state_list = UtilityStore(self.state_list_file + '.utils', default=0.0,
+                                       wideKeys=True)
+        # the pickled list older versions saved is read into the store once
+        if path.isfile(self.state_list_file) and not path.isfile(self.state_list.path):
             # print 'State list pickle found.'
             self.load_state_list()
         self.last_states = deque(maxlen=20)
@@ -377,17 +384,17 @@ class AIPlayer(Player):
         return out
 
     def save_state_list(self):
-        """Save the state/utilities list to a file."""
-        with open(self.state_list_file, 'wb+') as f:
-            # print 'Saving state list.'
-            pickle.dump(self.state_list, f, pickle.HIGHEST_PROTOCOL)
+        """Save the utilities changed this game to the store's file."""
+        # print 'Saving state list.'
+        self.state_list.flush()
 
     def load_state_list(self):
-        """Load the state/utilities list from a file.
-        Sets self.state_list to the unpickled data in the file."""
-        with open(path.join('..', self.state_list_file), 'rb+') as f:
+        """Load the state/utilities list from a pickle file.
+        Adds the unpickled data in the file to self.state_list."""
+        with open(self.state_list_file, 'rb+') as f:
             # print 'Loading state list.'
-            self.state_list = pickle.load(f)
+            self.state_list.update(pickle.load(f))
+        self.state_list.flush()
 
     def update_state(self, state, status='other'):
         """Add a state to the state_list if needed, and append it
@@ -422,7 +422,7 @@ class AIPlayer(Player):
 
         #step a
         #list all possible moves not end turn
-        moves = listAllLegalMoves(currentNode.nextState)
+        moves = listAllLegalMoves(currentNode.nextState, canonical=True)
         
         allMoves = [move for move in moves if move.moveType != END or move.moveType != BUILD]
         myAnts =getAntList(currentState, currentState.whoseTurn, (WORKER,QUEEN,SOLDIER,R_SOLDIER,DRONE))
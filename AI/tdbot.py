@@ -18,6 +18,11 @@ import AIPlayerUtils as utils
 from Location import Location
 from Inventory import Inventory
 from Building import Building
+from UtilityStore import UtilityStore
+from UtilityTable import learnerTable
+
+# the directory this file is in (the states are saved relative to it)
+AI_DIR = path.dirname(path.abspath(__file__))
 
 # ConState = namedtuple('ConState', ['id', 'utility'])
 
@@ -40,10 +45,11 @@ class AIPlayer(Player):
         Parameters:
             inputPlayerId - The id to give the new player (int)
         """
-        self.state_list_file = 'test_list.txt'
-        self.state_list = {}
+        self.state_list_file = path.join(AI_DIR, 'test_list.txt')
+        self.state_list = UtilityStore(path.join(AI_DIR, 'test_list.utils'), table=learnerTable)
         #self.hasWon = False
-        if path.isfile(self.state_list_file):
+        # the pickled list older versions saved is read into the store once
+        if path.isfile(self.state_list_file) and not path.isfile(self.state_list.path):
             self.load_state_list()
         self.last_states = deque(maxlen=20)
         super(AIPlayer, self).__init__(inputPlayerId, "TD Bot")
@@ -251,7 +257,7 @@ class AIPlayer(Player):
         # If we get a list of moves, just get rid of the END move(s)
         if moves is None:
             all_moves = [move for move in utils.listAllLegalMoves(
-                state) if move.moveType != c.END]
+                state, canonical=True) if move.moveType != c.END]
         else:
             print "hi"
             all_moves = [move for move in moves if move.moveType != c.END]
@@ -335,7 +341,7 @@ class AIPlayer(Player):
         # state's subnodes.
         if nodes is None:
             all_moves = [move for move in utils.listAllLegalMoves(
-                state) if move.moveType != c.END]
+                state, canonical=True) if move.moveType != c.END]
 
             next_states = [self.getNextState(state, move)
                            for move in all_moves]
@@ -484,7 +490,6 @@ class AIPlayer(Player):
         else:
             self.td_learn(1,-100)
         print "save"
-        print self.state_list
         self.save_state_list()
 
     def condense_state(self, state):
@@ -651,16 +656,15 @@ class AIPlayer(Player):
         return out
 
     def save_state_list(self):
-        s = "AI/" + self.state_list_file
-        """Save the state/utilities list to a file."""
-        with open(s, 'wb+') as f:
-            pickle.dump(self.state_list, f, pickle.HIGHEST_PROTOCOL)
+        """Save the utilities changed this game to the store's file."""
+        self.state_list.flush()
 
     def load_state_list(self):
-        """Load the state/utilities list from a file.
-        Sets self.state_list to the unpickled data in the file."""
+        """Load the state/utilities list from a pickle file.
+        Adds the unpickled data in the file to self.state_list."""
         with open(self.state_list_file, 'rb+') as f:
-            self.state_list = pickle.load(f)
+            self.state_list.update(pickle.load(f))
+        self.state_list.flush()
             
         #print self.state_list
         #print "load"
@@ -740,98 +744,10 @@ class AIPlayer(Player):
     @staticmethod
     def getNextState(currentState, move):
         """
-        Version of genNextState with food carrying bug fixed.
+        Uses the game's own rules (food is picked up and dropped at the end
+        of the turn, and moved ants attack) so lookahead matches the game.
         """
-        # variables I will need
-        myGameState = currentState.fastclone()
-        myInv = utils.getCurrPlayerInventory(myGameState)
-        me = myGameState.whoseTurn
-        myAnts = myInv.ants
-
-        # If enemy ant is on my anthill or tunnel update capture health
-        myTunnels = myInv.getTunnels()
-        myAntHill = myInv.getAnthill()
-        for myTunnel in myTunnels:
-            ant = utils.getAntAt(myGameState, myTunnel.coords)
-            if ant is not None:
-                opponentsAnts = myGameState.inventories[not me].ants
-                if ant in opponentsAnts:
-                    myTunnel.captureHealth -= 1
-        if utils.getAntAt(myGameState, myAntHill.coords) is not None:
-            ant = utils.getAntAt(myGameState, myAntHill.coords)
-            opponentsAnts = myGameState.inventories[not me].ants
-            if ant in opponentsAnts:
-                myAntHill.captureHealth -= 1
-
-        # If an ant is built update list of ants
-        antTypes = [c.WORKER, c.DRONE, c.SOLDIER, c.R_SOLDIER]
-        if move.moveType == c.BUILD:
-            if move.buildType in antTypes:
-                ant = Ant(myInv.getAnthill().coords, move.buildType, me)
-                myInv.ants.append(ant)
-                # Update food count depending on ant built
-                if move.buildType == c.WORKER:
-                    myInv.foodCount -= 1
-                elif move.buildType == c.DRONE or move.buildType == c.R_SOLDIER:
-                    myInv.foodCount -= 2
-                elif move.buildType == c.SOLDIER:
-                    myInv.foodCount -= 3
-
-        # If a building is built update list of buildings and the update food
-        # count
-        if move.moveType == c.BUILD:
-            if move.buildType == c.TUNNEL:
-                building = Construction(move.coordList[0], move.buildType)
-                myInv.constrs.append(building)
-                myInv.foodCount -= 3
-
-        # If an ant is moved update their coordinates and has moved
-        if move.moveType == c.MOVE_ANT:
-            newCoord = move.coordList[len(move.coordList) - 1]
-            startingCoord = move.coordList[0]
-            for ant in myAnts:
-                if ant.coords == startingCoord:
-                    ant.coords = newCoord
-                    ant.hasMoved = False
-                    # If an ant is carrying food and ends on the anthill or tunnel
-                    # drop the food
-                    if ant.carrying and ant.coords == myInv.getAnthill().coords:
-                        myInv.foodCount += 1
-                        # ant.carrying = False
-                    for tunnels in myTunnels:
-                        if ant.carrying and (ant.coords == tunnels.coords):
-                            myInv.foodCount += 1
-                            # ant.carrying = False
-                    # If an ant doesn't have food and ends on the food grab
-                    # food
-                    if not ant.carrying:
-                        foods = utils.getConstrList(
-                            myGameState, None, (c.FOOD,))
-                        for food in foods:
-                            if food.coords == ant.coords:
-                                ant.carrying = True
-                    # If my ant is close to an enemy ant attack it
-                    adjacentTiles = utils.listAdjacent(ant.coords)
-                    for adj in adjacentTiles:
-                        # If ant is adjacent my ant
-                        if utils.getAntAt(myGameState, adj) is not None:
-                            closeAnt = utils.getAntAt(myGameState, adj)
-                            if closeAnt.player != me:  # if the ant is not me
-                                closeAnt.health = closeAnt.health - \
-                                    UNIT_STATS[ant.type][c.ATTACK]  # attack
-                                # If an enemy is attacked and looses all its health remove it from the other players
-                                # inventory
-                                if closeAnt.health <= 0:
-                                    enemyAnts = myGameState.inventories[
-                                        not me].ants
-                                    for enemy in enemyAnts:
-                                        if closeAnt.coords == enemy.coords:
-                                            myGameState.inventories[
-                                                not me].ants.remove(enemy)
-                                # If attacked an ant already don't attack any
-                                # more
-                                break
-        return myGameState
+        return utils.getNextState(currentState, move)
     ##
     #hasWon
     #Description: tells us if somebody has won the game
@@ -1,8 +1,10 @@
-import random
+import random, heapq, collections
 from Constants import *
 from Ant import UNIT_STATS
 from Construction import CONSTR_STATS
 from Move import *
+from Occupancy import tupleCoords
+import GameRules
 
 #
 # AIPlayerUtils.py
@@ -114,7 +116,11 @@ def getConstrList(currentState,
 #
 # Return:  the construct at the coordinate or None if there is none
 def getConstrAt(state, coords):
-    #get a list of all constructs
+    #use the state's coordinate index if it has one
+    if hasattr(state, 'getOccupancy'):
+        return state.getOccupancy().constrs.get(tupleCoords(coords))
+
+    #otherwise get a list of all constructs
     allConstrs = getConstrList(state)
 
     #search for one at the given coord
@@ -135,7 +141,11 @@ def getConstrAt(state, coords):
 #
 # Return:  the ant at the coordinate or None if there is none
 def getAntAt(state, coords):
-    #get a list of all constructs
+    #use the state's coordinate index if it has one
+    if hasattr(state, 'getOccupancy'):
+        return state.getOccupancy().ants.get(tupleCoords(coords))
+
+    #otherwise get a list of all ants
     allAnts = getAntList(state)
 
     #search for one at the given coord
@@ -159,24 +169,42 @@ def listAdjacent(coord):
     if (not legalCoord(coord)):
         return [];
 
+    return list(ADJACENT_CELLS[(coord[0], coord[1])])
+
+##
+# buildAdjacentCells
+#
+# Return: a dictionary of each cell on the board to a tuple of the legal
+# cells adjacent to it (used by listAdjacent)
+def buildAdjacentCells():
     #this set of coord deltas represent movement in each cardinal direction
     deltas = [ (-1, 0), (1, 0), (0, -1), (0, 1) ]
-    x = coord[0]
-    y = coord[1]
-    result = []
-
-    #calculate the cost after making each move
-    for delta in deltas:
-        newX = delta[0] + coord[0]
-        newY = delta[1] + coord[1]
+    result = {}
+    for x in range(0, BOARD_LENGTH):
+        for y in range(0, BOARD_LENGTH):
+            result[(x, y)] = tuple([ (x + delta[0], y + delta[1]) for delta in deltas
+                                     if legalCoord((x + delta[0], y + delta[1])) ])
+    return result
 
-        #skip illegal moves
-        if (not legalCoord((newX, newY))):
-            continue
+ADJACENT_CELLS = buildAdjacentCells()
 
-        result.append((newX, newY))
 
-    return result
+##
+# getCellLookups
+#
+# returns a pair of functions that find the ant and the construct at a given
+# coordinate.  For a GameState these are lookups in its coordinate index,
+# which is much faster than calling getAntAt and getConstrAt over and over.
+#
+# Parameters:
+#    state  - a GameState or Node
+#
+# Return: (antAt, constrAt) functions that take a tuple coordinate
+def getCellLookups(state):
+    if hasattr(state, 'getOccupancy'):
+        occupancy = state.getOccupancy()
+        return occupancy.ants.get, occupancy.constrs.get
+    return (lambda coords: getAntAt(state, coords)), (lambda coords: getConstrAt(state, coords))
 
 
 ##
@@ -193,12 +221,13 @@ def listAdjacent(coord):
 def listReachableAdjacent(state, coords, movement):
     #build a list of all adjacent cells
     oneStep = listAdjacent(coords)
+    antAt, constrAt = getCellLookups(state)
 
     #winnow the list based upon cell contents and cost to reach
     candMoves = []
     for cell in oneStep:
-        ant = getAntAt(state, cell)
-        constr = getConstrAt(state, cell)
+        ant = antAt(cell)
+        constr = constrAt(cell)
         moveCost = 1  #default cost
         if (constr != None):
             moveCost = CONSTR_STATS[constr.type][MOVE_COST]
@@ -208,56 +237,150 @@ def listReachableAdjacent(state, coords, movement):
     return candMoves
 
 ##
-# listAllMovementPaths              <!-- RECURSIVE -->
+# listAllMovementPaths
 #
 # calculates all the legal paths for a single ant to move from a given position.
 # The ant doesn't actually have to be there for this method to return a valid
 # answer.  This method does not take queen ant movement restrictions
 # into account.
 #
+# By default every path is listed (in the same order, and with the same
+# repeats, as the original recursive version of this method).  If canonical
+# is True only the cheapest path to each reachable cell is listed, so no two
+# paths end at the same cell.
+#
+# Results for GameStates are cached by board layout (see
+# OccupancyIndex.getLayoutKey), so calling this again for a state with the
+# same layout is cheap.
+#
 # Parameters:
 #    currentState - current game state
 #    coords       - where the ant is
 #    movement     - movement points ant has remaining
+#    canonical    - list only one path per destination (boolean)
 #
 # Return: a list of lists of coords (tuples). Each sub-list of tuples is an
 # acceptable set of coords for a Move object
-def listAllMovementPaths(currentState, coords, movement):
+def listAllMovementPaths(currentState, coords, movement, canonical=False):
     #base case: ant can't move any further
     if (movement <= 0): return []
 
-    #construct a list of all valid one-step moves
-    adjCells = listReachableAdjacent(currentState, coords, movement)
-    oneStepMoves = []
-    for cell in adjCells:
-        oneStepMoves.append([coords, cell])
-
-    #add those as valid moves
-    validMoves = list(oneStepMoves)
-
-    #recurse for each adj cell to see if we can take additional steps
-    for move in oneStepMoves:
-        #figure out what it would cost to get to the current dest
-        moveCoords = move[-1]
-        constrAtDest = getConstrAt(currentState, moveCoords)
-        cost = 1   #default
-        if constrAtDest != None:
-            cost = CONSTR_STATS[constrAtDest.type][MOVE_COST]
+    start = tupleCoords(coords)
+    cacheKey = None
+    if hasattr(currentState, 'getOccupancy'):
+        cacheKey = (currentState.getOccupancy().getLayoutKey(), start, movement, canonical)
+        paths = MOVEMENT_PATH_CACHE.get(cacheKey)
+    else:
+        paths = None
+
+    if paths == None:
+        if canonical:
+            paths = findCheapestPaths(currentState, start, movement)
+        else:
+            paths = findAllPaths(currentState, start, movement)
+        if cacheKey != None:
+            if len(MOVEMENT_PATH_CACHE) >= MOVEMENT_PATH_CACHE_SIZE:
+                MOVEMENT_PATH_CACHE.clear()
+            MOVEMENT_PATH_CACHE[cacheKey] = paths
+
+    #callers are free to change the lists they get back, so hand out copies
+    #(that start with the coords object the caller passed in)
+    return [[coords] + list(path[1:]) for path in paths]
+
+#cached results of listAllMovementPaths and the most entries to keep
+MOVEMENT_PATH_CACHE = {}
+MOVEMENT_PATH_CACHE_SIZE = 5000
 
-        #get a list of all moves that will extend this one
-        extensions = listAllMovementPaths(currentState, moveCoords, movement - cost)
+##
+# getMoveCostLookup
+#
+# Return: a function that gives the movement cost of a cell (or None if the
+# cell holds an ant and can't be entered)
+def getMoveCostLookup(state):
+    antAt, constrAt = getCellLookups(state)
+    def moveCost(cell):
+        if antAt(cell) != None:
+            return None
+        constr = constrAt(cell)
+        if constr == None:
+            return 1
+        return CONSTR_STATS[constr.type][MOVE_COST]
+    return moveCost
 
-        #create new moves by adding each extension to the base move
-        for ext in extensions:
-            newMove = list(move)      #create a clone
-            for cell in ext[1:]:      #start at index '1' to skip overlap
-                newMove.append(cell)
-            validMoves.append(newMove)
+##
+# findAllPaths
+#
+# helper for listAllMovementPaths that lists every path.  Rather than
+# recursing, it works out the paths from each (cell, movement left) pair an
+# ant can reach, starting with the pairs with the least movement left.
+#
+# Return: a tuple of paths (each a tuple of coords)
+def findAllPaths(state, start, movement):
+    moveCost = getMoveCostLookup(state)
+
+    #find the (cell, movement left) pairs that need their paths worked out
+    #and the cells that can be stepped to from each of them
+    steps = {}
+    pending = [(start, movement)]
+    while len(pending) > 0:
+        pair = pending.pop()
+        if pair in steps: continue
+        cell, left = pair
+        nextSteps = []
+        if left > 0:
+            for adj in ADJACENT_CELLS[cell]:
+                cost = moveCost(adj)
+                if cost != None and cost <= left:
+                    nextSteps.append((adj, left - cost))
+                    pending.append((adj, left - cost))
+        steps[pair] = nextSteps
+
+    #each pair's paths are its one step paths, then those steps extended by
+    #the paths from where they end up, then the zero step path
+    paths = {}
+    for pair in sorted(steps, key=lambda pair: pair[1]):
+        cell = pair[0]
+        if pair[1] <= 0:
+            paths[pair] = ()
+            continue
+        result = [(cell, adj) for adj, left in steps[pair]]
+        for nextPair in steps[pair]:
+            for ext in paths[nextPair]:
+                result.append((cell,) + ext)
+        result.append((cell,))
+        paths[pair] = tuple(result)
 
-    #Append the zero-step move (used to activate attack on adjacent foe)
-    validMoves.append([coords])
+    return paths[(start, movement)]
 
-    return validMoves
+##
+# findCheapestPaths
+#
+# helper for listAllMovementPaths that lists the cheapest path to each cell an
+# ant can reach (a Dijkstra search bounded by the ant's movement).
+#
+# Return: a tuple of paths (each a tuple of coords), starting with the zero
+# step path
+def findCheapestPaths(state, start, movement):
+    moveCost = getMoveCostLookup(state)
+
+    cheapest = { start : (0, (start,)) }
+    queue = [ (0, start) ]
+    while len(queue) > 0:
+        spent, cell = heapq.heappop(queue)
+        if spent > cheapest[cell][0]: continue
+        path = cheapest[cell][1]
+        for adj in ADJACENT_CELLS[cell]:
+            cost = moveCost(adj)
+            if cost == None or spent + cost > movement: continue
+            if adj not in cheapest or spent + cost < cheapest[adj][0]:
+                cheapest[adj] = (spent + cost, path + (adj,))
+                heapq.heappush(queue, (spent + cost, adj))
+
+    result = [(start,)]
+    for cell in sorted(cheapest, key=lambda cell: cheapest[cell][0]):
+        if cell != start:
+            result.append(cheapest[cell][1])
+    return tuple(result)
 
 
 ##
@@ -266,6 +389,10 @@ def listAllMovementPaths(currentState, coords, movement):
 # estimates the shortest distance between two cells taking
 # movement costs into account.
 #
+# For a GameState the answer is looked up in a table of the distances
+# between every pair of cells (see getDistanceTable), so repeated calls are
+# cheap.
+#
 #Parameters:
 #   currentState   - The state of the game (GameState)
 #   src            - starting position (an x,y coord)
@@ -277,31 +404,93 @@ def stepsToReach(currentState, src, dst):
     if (not legalCoord(src)): return -1
     if (not legalCoord(dst)): return -1
 
+    if hasattr(currentState, 'getOccupancy'):
+        table = getDistanceTable(currentState)
+        return table[src[0] * BOARD_LENGTH + src[1]][dst[0] * BOARD_LENGTH + dst[1]]
+
+    src = tupleCoords(src)
+    dst = tupleCoords(dst)
+    _, constrAt = getCellLookups(currentState)
+    row = findDistances(lambda cell: getMoveCost(constrAt(cell)), src, dst)
+    return row[dst[0] * BOARD_LENGTH + dst[1]]
+
+##
+# getDistanceTable
+#
+# returns a table of the distances stepsToReach gives between every pair of
+# cells on the board.  The distances only depend on where the constructions
+# that cost more than 1 to cross (grass) are, so a table is built once for
+# each layout of those and cached.
+#
+#Parameters:
+#   state   - The state of the game (GameState)
+#
+# Return: a list where table[x1 * BOARD_LENGTH + y1][x2 * BOARD_LENGTH + y2]
+# is the distance from (x1, y1) to (x2, y2)
+def getDistanceTable(state):
+    costKey = state.getOccupancy().getCostKey()
+    table = DISTANCE_TABLE_CACHE.get(costKey)
+    if table == None:
+        costs = dict(costKey)
+        costOf = lambda cell: costs.get(cell, 1)
+        table = [findDistances(costOf, (x, y))
+                 for x in range(0, BOARD_LENGTH) for y in range(0, BOARD_LENGTH)]
+        if len(DISTANCE_TABLE_CACHE) >= DISTANCE_TABLE_CACHE_SIZE:
+            DISTANCE_TABLE_CACHE.clear()
+        DISTANCE_TABLE_CACHE[costKey] = table
+    return table
+
+#cached results of getDistanceTable and the most tables to keep
+DISTANCE_TABLE_CACHE = {}
+DISTANCE_TABLE_CACHE_SIZE = 64
+
+##
+# getMoveCost
+#
+# Return: the movement cost of a cell holding the given construct (or None)
+def getMoveCost(constr):
+    if constr == None:
+        return 1
+    return CONSTR_STATS[constr.type][MOVE_COST]
+
+##
+# findDistances
+#
+# helper for stepsToReach and getDistanceTable that works out the distance
+# from one cell to every other cell (or until dst is reached).  This is the
+# breadth first search stepsToReach has always used, so the distances are
+# the same ones it has always given.
+#
+#Parameters:
+#   costOf   - gives the cost of moving onto a cell (function)
+#   src      - starting position (tuple)
+#   dst      - stop once this cell is reached (tuple, optional)
+#
+# Return: a list of the distance to each cell (x * BOARD_LENGTH + y), with
+# -1 for the cells that were not reached
+def findDistances(costOf, src, dst=None):
+    distances = [-1] * (BOARD_LENGTH * BOARD_LENGTH)
     #a dictionary of already visted cells and the corresponding cost to reach
     visited = { src : 0 }
-    #a list of to be processed cells
-    queue = [ src ]
+    #a queue of to be processed cells
+    queue = collections.deque([ src ])
 
     #this loops processes cells in the queue until it is empty
     while(len(queue) > 0):
-        cell = queue.pop(0)
+        cell = queue.popleft()
+        distances[cell[0] * BOARD_LENGTH + cell[1]] = visited[cell]
 
         #if this cell is our destination we are done
         if (cell == dst):
-            return visited[cell]
+            break
 
         #calc distance to all cells adj to this one assuming we reach them
         #from this one
-        nextSteps = listAdjacent(cell)
-        for newCell in nextSteps:
-            constrAtDest = getConstrAt(currentState, newCell)
-            cost = 1  #default
-            if constrAtDest != None:
-                cost = CONSTR_STATS[constrAtDest.type][MOVE_COST]
-            dist = visited[cell] + cost
+        for newCell in ADJACENT_CELLS[cell]:
+            dist = visited[cell] + costOf(newCell)
 
             #if the new distance is best so far, update the visited dict
-            if (visited.has_key(newCell)):
+            if (newCell in visited):
                 if (dist < visited[newCell]):
                     visited[newCell] = dist
             #if we've never seen this cell before also update dict and
@@ -310,8 +499,7 @@ def stepsToReach(currentState, src, dst):
                 visited[newCell] = dist
                 queue.append(newCell)
 
-    #we should never reach this point
-    return -1
+    return distances
 
 ##
 # listAllBuildMoves
@@ -391,9 +579,10 @@ def isPathOkForQueen(path):
 #
 # Parameters:
 #   currentState - the current state
+#   canonical    - list only one move per ant per destination (boolean)
 #
 # Returns:  a list of Move objects
-def listAllMovementMoves(currentState):
+def listAllMovementMoves(currentState, canonical=False):
     result = []
 
     #first get all MOVE_ANT moves for each ant in the inventory
@@ -403,15 +592,22 @@ def listAllMovementMoves(currentState):
         if (ant.hasMoved): continue
 
         #create a Move object for each valid movement path
+        #(the queen's cheapest path to a cell might leave her territory when
+        #another path doesn't, so her paths are all listed and then winnowed)
         allPaths = listAllMovementPaths(currentState,
                                         ant.coords,
-                                        UNIT_STATS[ant.type][MOVEMENT])
+                                        UNIT_STATS[ant.type][MOVEMENT],
+                                        canonical and ant.type != QUEEN)
 
         #remove moves that take the queen out of her territory
         if (ant.type == QUEEN):
             tmpList = []
+            destinations = set()
             for path in allPaths:
                 if (isPathOkForQueen(path)):
+                    if canonical:
+                        if tuple(path[-1]) in destinations: continue
+                        destinations.add(tuple(path[-1]))
                     tmpList.append(path)
             allPaths = tmpList
 
@@ -430,17 +626,37 @@ def listAllMovementMoves(currentState):
 #
 # Parameters:
 #   currentState - the current state
+#   canonical    - list only one move per ant per destination (boolean)
 #
 # Returns:  a list of Move objects
-def listAllLegalMoves(currentState):
+def listAllLegalMoves(currentState, canonical=False):
     result = []
-    result.extend(listAllMovementMoves(currentState))
+    result.extend(listAllMovementMoves(currentState, canonical))
     result.extend(listAllBuildMoves(currentState))
     result.append(Move(END, None, None))
     return result
 
 
 
+##
+# getNextState
+#
+# returns the state that results from making a move.  The move is carried
+# out with the same code the game uses (see GameRules.py), so the result is
+# exactly what would happen in the game.  A moved ant that can attack
+# attacks the first enemy ant the game would offer it unless attackCoord is
+# given.  States made with fastclone are copied with fastclone.
+#
+# Parameters:
+#   currentState - the current state (not changed)
+#   move         - a legal move for the player whose turn it is
+#   attackCoord  - where a moved ant should attack (optional)
+#
+# Returns:  a GameState
+def getNextState(currentState, move, attackCoord=None):
+    return GameRules.getNextState(currentState, move, attackCoord)
+
+
 ##
 # Return: a reference to the inventory of the player whose turn it is
 def getCurrPlayerInventory(currentState):
@@ -0,0 +1,316 @@
+import time
+from Constants import *
+from AIPlayerUtils import listAllLegalMoves
+from GameRules import applyMove, undoMove, getWinner
+from TranspositionTable import *
+
+##
+# AlphaBetaSearch.py
+#
+# A minimax search with alpha-beta pruning that any AI can use by giving it
+# an evaluation function:
+#
+#    self.searcher = AlphaBetaSearch(self.evaluate, timeLimit=5)
+#    ...
+#    return self.searcher.search(currentState)
+#
+# where evaluate(state, playerId) returns how good the state is for the given
+# player (bigger is better).  The search deepens one move at a time
+# (iterative deepening) until its time runs out and returns the best move of
+# the deepest search it finished.  Every move (END included) is one level of
+# depth; a level is a max level when it is the searching player's turn and a
+# min level otherwise.
+#
+# Moves are played on a single copy of the state with GameRules.applyMove and
+# undoMove, results are kept in a TranspositionTable, and at each level the
+# moves are tried best first: the best move stored in the table, then the
+# rest ordered by the evaluation of the state they lead to.
+#
+
+#the default most time (seconds) a search may take: a little less than the
+#game allows so the move gets back in time
+SEARCH_TIME_LIMIT = AI_MOVE_TIMEOUT * 0.9
+
+#the default deepest search
+SEARCH_MAX_DEPTH = 20
+
+##
+#SearchTimeout
+#Description: Raised inside a search when its time is up
+##
+class SearchTimeout(Exception):
+    pass
+
+
+##
+#AlphaBetaSearch
+#Description: An iterative deepening alpha-beta search
+#
+#Variables:
+#   evaluate - the evaluation function, evaluate(state, playerId) (function)
+#   listMoves - gives the moves to search from a state (function)
+#   timeLimit - the most time (seconds) a search may take (number)
+#   maxDepth - the deepest search (int)
+#   branchLimit - if not None, only this many of the best ordered moves are
+#       searched at each level below the root (int)
+#   table - the search results (TranspositionTable)
+#   nodes - how many states the last search visited (int)
+#   depthReached - the depth of the last search that finished (int)
+#   bestValue - the value of the move the last search returned (number)
+#   depthResults - (value, Move) of the best move found by each depth of
+#       the last search that finished, shallowest first (list)
+##
+class AlphaBetaSearch(object):
+
+    ##
+    #__init__
+    #Description: Creates a new search
+    #
+    #Parameters:
+    #   evaluate - evaluate(state, playerId) returns how good the state is for
+    #       the player (function)
+    #   listMoves - listMoves(state) returns the moves to search; defaults to
+    #       one move per ant per destination plus the builds and END
+    #   timeLimit - the most time (seconds) a search may take (number)
+    #   maxDepth - the deepest search (int)
+    #   branchLimit - see above (int)
+    #   table - a TranspositionTable to use.  It must not be shared with a
+    #       search for the other player (values are stored for one player).
+    ##
+    def __init__(self, evaluate, listMoves=None, timeLimit=SEARCH_TIME_LIMIT,
+                 maxDepth=SEARCH_MAX_DEPTH, branchLimit=None, table=None):
+        self.evaluate = evaluate
+        if listMoves == None:
+            listMoves = lambda state: listAllLegalMoves(state, True)
+        self.listMoves = listMoves
+        self.timeLimit = timeLimit
+        self.maxDepth = maxDepth
+        self.branchLimit = branchLimit
+        if table == None:
+            table = TranspositionTable()
+        self.table = table
+        self.nodes = 0
+        self.depthReached = 0
+        self.bestValue = None
+        self.depthResults = []
+
+    ##
+    #search
+    #Description: Finds the best move for the player whose turn it is
+    #
+    #Parameters:
+    #   currentState - the state to move from (not changed) (GameState)
+    #   timeLimit - the most time (seconds) to take, if not self.timeLimit
+    #   moves - the moves to choose between, if not all of the moves
+    #       listMoves gives (Move[])
+    #
+    #Return: the best Move found, or None if there are no moves
+    ##
+    def search(self, currentState, timeLimit=None, moves=None):
+        if timeLimit == None:
+            timeLimit = self.timeLimit
+        self.deadline = time.time() + timeLimit
+        self.playerId = currentState.whoseTurn
+        self.nodes = 0
+        self.depthReached = 0
+        self.bestValue = None
+        self.depthResults = []
+        self.table.newGeneration()
+
+        state = currentState.fastclone()
+        if moves == None:
+            moves = self.listMoves(state)
+        if len(moves) == 0:
+            return None
+        try:
+            moves = self.orderMoves(state, moves, True, None)
+        except SearchTimeout:
+            return moves[0]
+        bestMove = moves[0]
+
+        for depth in range(1, self.maxDepth + 1):
+            self.reachedLimit = False
+            try:
+                value, move = self.searchRoot(state, moves, depth)
+            except SearchTimeout:
+                break
+            bestMove = move
+            self.bestValue = value
+            self.depthReached = depth
+            self.depthResults.append((value, move))
+            #search the best move first next time
+            moves.remove(move)
+            moves.insert(0, move)
+            #stop if the whole tree fit in this search
+            if not self.reachedLimit:
+                break
+
+        return bestMove
+
+    ##
+    #searchRoot
+    #Description: Searches every move from the root to the given depth
+    #
+    #Return: (value, Move) of the best move
+    ##
+    def searchRoot(self, state, moves, depth):
+        alpha = float('-inf')
+        bestMove = None
+        for move in moves:
+            record = applyMove(state, move)
+            try:
+                value = self.alphaBeta(state, depth - 1, alpha, float('inf'))
+            finally:
+                undoMove(state, record)
+            if bestMove == None or value > alpha:
+                alpha = value
+                bestMove = move
+        return alpha, bestMove
+
+    ##
+    #alphaBeta
+    #Description: The value of a state searched to the given depth
+    #
+    #Parameters:
+    #   state - the state (changed during the search and put back) (GameState)
+    #   depth - how many more moves to search (int)
+    #   alpha - the value the max player is already sure of (number)
+    #   beta - the value the min player is already sure of (number)
+    #
+    #Return: the value of the state (a bound if it is outside alpha..beta)
+    ##
+    def alphaBeta(self, state, depth, alpha, beta):
+        self.nodes += 1
+        self.checkTime()
+
+        if getWinner(state) != None:
+            return self.evaluate(state, self.playerId)
+        if depth <= 0:
+            self.reachedLimit = True
+            return self.evaluate(state, self.playerId)
+
+        key = state.getHash()
+        entry = self.table.lookup(key)
+        value = self.table.usableValue(entry, depth, alpha, beta)
+        if value != None:
+            #the stored search may have stopped at its depth limit
+            self.reachedLimit = True
+            return value
+
+        moves = self.listMoves(state)
+        if len(moves) == 0:
+            return self.evaluate(state, self.playerId)
+        isMax = state.whoseTurn == self.playerId
+
+        if depth == 1:
+            #the children are leaves: evaluate them without ordering
+            self.reachedLimit = True
+            ordered = moves
+        else:
+            hashMove = None
+            if entry != None:
+                hashMove = entry.move
+            ordered = self.orderMoves(state, moves, isMax, hashMove)
+            if self.branchLimit != None:
+                ordered = ordered[:self.branchLimit]
+
+        alphaStart = alpha
+        betaStart = beta
+        bestMove = None
+        if isMax:
+            best = float('-inf')
+        else:
+            best = float('inf')
+        for move in ordered:
+            record = applyMove(state, move)
+            try:
+                if depth == 1:
+                    self.nodes += 1
+                    self.checkTime()
+                    value = self.evaluate(state, self.playerId)
+                else:
+                    value = self.alphaBeta(state, depth - 1, alpha, beta)
+            finally:
+                undoMove(state, record)
+
+            if isMax:
+                if value > best:
+                    best = value
+                    bestMove = move
+                    alpha = max(alpha, value)
+            else:
+                if value < best:
+                    best = value
+                    bestMove = move
+                    beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+        if best <= alphaStart:
+            bound = UPPER_BOUND
+        elif best >= betaStart:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        self.table.store(key, depth, best, bound, moveKey(bestMove))
+        return best
+
+    ##
+    #checkTime
+    #Description: Raises SearchTimeout if the search is out of time
+    ##
+    def checkTime(self):
+        if time.time() > self.deadline:
+            raise SearchTimeout()
+
+    ##
+    #orderMoves
+    #Description: Sorts moves best first for the player to move: firstMove
+    #   (usually the best move from the TranspositionTable) and then the
+    #   rest by the evaluation of the state each one leads to.
+    #
+    #Parameters:
+    #   state - the state the moves are from (GameState)
+    #   moves - the moves to sort (Move[])
+    #   isMax - whether it is the searching player's turn (boolean)
+    #   firstMove - the moveKey of a move to put first, or None
+    #
+    #Return: a new, sorted list of moves
+    ##
+    def orderMoves(self, state, moves, isMax, firstMove):
+        scored = []
+        first = None
+        for index in range(0, len(moves)):
+            move = moves[index]
+            if first == None and firstMove != None and moveKey(move) == firstMove:
+                first = move
+                continue
+            self.checkTime()
+            record = applyMove(state, move)
+            try:
+                value = self.evaluate(state, self.playerId)
+            finally:
+                undoMove(state, record)
+            if not isMax:
+                value = -value
+            #the index keeps the sort stable and stops Moves being compared
+            scored.append((-value, index, move))
+        scored.sort()
+        result = [entry[2] for entry in scored]
+        if first != None:
+            result.insert(0, first)
+        return result
+
+
+##
+#moveKey
+#Description: Returns a tuple that identifies what a Move does (used to keep
+#   moves in the TranspositionTable)
+##
+def moveKey(move):
+    if move == None:
+        return None
+    coords = None
+    if move.coordList != None:
+        coords = tuple([(coord[0], coord[1]) for coord in move.coordList])
+    return (move.moveType, coords, move.buildType)
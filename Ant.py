@@ -1,4 +1,5 @@
 from Constants import *
+from Occupancy import TrackedCoords, untrackedState
 
 #Unit stats array [ant type][stat]
 #(movement, health, attack, range, cost)
@@ -27,6 +28,9 @@ UNIT_STATS.append((1, 2, 1, 3, 2)) #Ranged soldier
 #   player - The id of the player that owns the Ant
 ##
 class Ant(object):
+
+    #moving an ant keeps the OccupancyIndex of its GameState up to date
+    coords = TrackedCoords('ants')
     
     ##
     #__init__
@@ -51,3 +55,6 @@ class Ant(object):
         rtnAnt.carrying = self.carrying
         rtnAnt.health = self.health
         return rtnAnt
+
+    def __getstate__(self):
+        return untrackedState(self)
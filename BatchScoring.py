@@ -0,0 +1,268 @@
+import numpy as np
+from Constants import *
+from Ant import UNIT_STATS
+
+##
+# BatchScoring.py
+#
+# Scores many states at once with the evaluation that tdbot.py and
+# rowland17_creighton17.py use (AIPlayer.score_state).  score_state works on
+# one state at a time and loops over every pair of ants in Python; a search
+# that expands a state calls it once per child.  scoreStates reads the
+# numbers it needs out of all of the states in one pass into NumPy arrays
+# (one row per state, the ants padded out to the most any state has) and
+# then works out every score with array operations:
+#
+#    nextStates = [self.getNextState(state, move) for move in allMoves]
+#    nodes = [Node(move, state, score) for move, state, score
+#             in zip(allMoves, nextStates, scoreStates(nextStates))]
+#
+# Building the arrays has a fixed cost that only pays off for large batches
+# (under Python 2, scoreStates only catches up with score_state at a couple
+# of hundred states).  tdbot and rowland17_creighton17 expand at most
+# about 50 children of a state, so they keep scoring one state at a time;
+# scoreStates is for code that scores many states at once, such as scoring
+# a whole recorded game.
+#
+# The scores are the same as score_state's, for the player whose turn it is
+# in each state.  (A player without a tunnel is scored as rowland17_creighton17
+# scores it: only the anthill counts as a place to drop off food.)
+#
+
+#the score of a state the player has won or lost
+WIN_SCORE = 1.0
+LOSE_SCORE = 0.0
+#the score of a state with too many workers or a worker away from home
+BAD_SCORE = 0.001
+
+#the ants score_state counts as fighters
+OFFENSIVE_TYPES = (SOLDIER, R_SOLDIER, DRONE)
+
+#the cost of each type of fighter, by type (0 for the others)
+FIGHTER_COST = np.zeros(len(UNIT_STATS), dtype=np.int64)
+for antType in OFFENSIVE_TYPES:
+    FIGHTER_COST[antType] = UNIT_STATS[antType][COST]
+
+#what a fighter earns for being within dist (in both directions) of an
+#enemy ant for each dist from 1 to 7, by how far away the enemy ant is
+#(the larger of the x and y distances, 7 or more earning nothing)
+CLOSE_BONUS = np.array([sum([160 - dist * 20 for dist in range(far + 1, 8)])
+                        for far in range(0, 8)], dtype=np.int64)
+
+#which features are kept for each state (columns of the state array)
+(OUR_FOOD, ENEMY_FOOD, OUR_QUEEN_HEALTH, ENEMY_QUEEN_HEALTH, OUR_HILL_HEALTH,
+ ENEMY_HILL_HEALTH, QUEEN_X, QUEEN_Y, HILL_X, HILL_Y, HAS_TUNNEL, TUNNEL_X,
+ TUNNEL_Y, ENEMY_HILL_X, ENEMY_HILL_Y, OUTCOME) = range(0, 16)
+NUM_FEATURES = 16
+
+#values of the OUTCOME column
+OUTCOME_NONE = 0
+OUTCOME_WIN = 1
+OUTCOME_LOSE = 2
+
+
+##
+#scoreStates
+#Description: Scores a list of states the way score_state does
+#
+#Parameters:
+#   states - the states to score (GameState[])
+#
+#Return: the score of each state for the player whose turn it is (float[])
+##
+def scoreStates(states):
+    if len(states) == 0:
+        return []
+    features, ours, enemies = extractFeatures(states)
+    return scoreFeatures(features, ours, enemies).tolist()
+
+##
+#extractFeatures
+#Description: Reads what scoreFeatures needs out of a list of states
+#
+#Parameters:
+#   states - the states (GameState[])
+#
+#Return: (features, ours, enemies) where features is an N x NUM_FEATURES
+#   array and ours and enemies are (x, y, type, carrying, present) tuples of
+#   N x (most ants) arrays, one row of each per state
+##
+def extractFeatures(states):
+    rows = []
+    ourLists = []
+    enemyLists = []
+    for state in states:
+        ourInv = None
+        enemyInv = None
+        for inv in state.inventories:
+            if inv.player == state.whoseTurn:
+                ourInv = inv
+            elif inv.player == 1 - state.whoseTurn:
+                enemyInv = inv
+        ourLists.append(ourInv.ants)
+        enemyLists.append(enemyInv.ants)
+        feature = [0] * NUM_FEATURES
+        rows.append(feature)
+
+        ourHill = ourInv.getAnthill()
+        enemyHill = enemyInv.getAnthill()
+        ourQueen = ourInv.getQueen()
+        enemyQueen = enemyInv.getQueen()
+        #the order of score_state's checks: a win is checked before a loss
+        if (ourInv.foodCount == FOOD_GOAL or enemyQueen == None or
+                enemyHill.captureHealth == 0):
+            feature[OUTCOME] = OUTCOME_WIN
+            continue
+        if (enemyInv.foodCount == FOOD_GOAL or ourQueen == None or
+                ourHill.captureHealth == 0):
+            feature[OUTCOME] = OUTCOME_LOSE
+            continue
+
+        tunnels = ourInv.getTunnels()
+        if len(tunnels) > 0:
+            feature[HAS_TUNNEL] = 1
+            feature[TUNNEL_X], feature[TUNNEL_Y] = tunnels[0].coords
+        feature[OUR_FOOD] = ourInv.foodCount
+        feature[ENEMY_FOOD] = enemyInv.foodCount
+        feature[OUR_QUEEN_HEALTH] = ourQueen.health
+        feature[ENEMY_QUEEN_HEALTH] = enemyQueen.health
+        feature[OUR_HILL_HEALTH] = ourHill.captureHealth
+        feature[ENEMY_HILL_HEALTH] = enemyHill.captureHealth
+        feature[QUEEN_X], feature[QUEEN_Y] = ourQueen.coords
+        feature[HILL_X], feature[HILL_Y] = ourHill.coords
+        feature[ENEMY_HILL_X], feature[ENEMY_HILL_Y] = enemyHill.coords
+
+    features = np.array(rows, dtype=np.int64)
+    return features, antArrays(ourLists), antArrays(enemyLists)
+
+##
+#antArrays
+#Description: Puts each state's ants into rows of arrays padded out to the
+#   longest list
+#
+#Parameters:
+#   antLists - one list of ants per state (Ant[][])
+#
+#Return: (x, y, type, carrying, present) N x (most ants) arrays; present is
+#   False in the padding
+##
+def antArrays(antLists):
+    width = max([len(ants) for ants in antLists] + [1])
+    #one (x, y, type, carrying) row per ant, and where it goes in the arrays
+    values = []
+    places = []
+    for row in range(0, len(antLists)):
+        base = row * width
+        for col, ant in enumerate(antLists[row]):
+            values.append((ant.coords[0], ant.coords[1], ant.type, ant.carrying))
+            places.append(base + col)
+    table = np.zeros((len(antLists) * width, 4), dtype=np.int64)
+    present = np.zeros(len(antLists) * width, dtype=bool)
+    if len(values) > 0:
+        table[places] = values
+        present[places] = True
+    shape = (len(antLists), width)
+    return (table[:, 0].reshape(shape), table[:, 1].reshape(shape), table[:, 2].reshape(shape),
+            table[:, 3].reshape(shape) != 0, present.reshape(shape))
+
+##
+#scoreFeatures
+#Description: Works out score_state's score for every row of the arrays
+#   extractFeatures makes
+#
+#Return: the scores (float array)
+##
+def scoreFeatures(features, ours, enemies):
+    ourX, ourY, ourType, carrying, ourPresent = ours
+    enemyX, enemyY, enemyType, _, enemyPresent = enemies
+    column = lambda index: features[:, index]
+    #points added to both the total and the good points, and to the total only
+    both = np.zeros(len(features), dtype=np.int64)
+    totalOnly = np.ones(len(features), dtype=np.int64)
+
+    #food
+    ourFood = column(OUR_FOOD)
+    enemyFood = column(ENEMY_FOOD)
+    totalOnly += enemyFood * 50
+    both += ourFood * 50
+    foodDifference = np.abs(ourFood - enemyFood)
+    bigDifference = np.where(foodDifference > 3, foodDifference * 200, 0)
+    totalOnly += np.where(ourFood > enemyFood, 0, bigDifference)
+    both += np.where(ourFood > enemyFood, bigDifference, 0)
+
+    #workers carrying food home
+    workers = ourPresent & (ourType == WORKER)
+    atHill = (ourX == column(HILL_X)[:, None]) & (ourY == column(HILL_Y)[:, None])
+    atTunnel = ((column(HAS_TUNNEL)[:, None] == 1) & (ourX == column(TUNNEL_X)[:, None]) &
+                (ourY == column(TUNNEL_Y)[:, None]))
+    droppingOff = workers & carrying & (atHill | atTunnel)
+    both += np.where(droppingOff.any(axis=1), 3000, 0)
+    carryingHome = workers & carrying & ~(atHill | atTunnel)
+    both += carryingHome.sum(axis=1) * 100
+    for dist in (2, 3):
+        nearHill = ((np.abs(ourX - column(HILL_X)[:, None]) < dist) &
+                    (np.abs(ourY - column(HILL_Y)[:, None]) < dist))
+        nearTunnel = ((column(HAS_TUNNEL)[:, None] == 1) &
+                      (np.abs(ourX - column(TUNNEL_X)[:, None]) < dist) &
+                      (np.abs(ourY - column(TUNNEL_Y)[:, None]) < dist))
+        near = (carryingHome & nearHill).sum(axis=1) + (carryingHome & nearTunnel).sum(axis=1)
+        both += near * (100 - dist * 25)
+
+    #every (our ant, enemy ant) pair
+    xDist = np.abs(ourX[:, :, None] - enemyX[:, None, :])
+    yDist = np.abs(ourY[:, :, None] - enemyY[:, None, :])
+    pairs = ourPresent[:, :, None] & enemyPresent[:, None, :]
+
+    #workers far from enemy ants
+    farWorkers = pairs & workers[:, :, None] & (xDist > 3) & (yDist > 3)
+    both += farWorkers.sum(axis=(1, 2)) * 60
+
+    #ant numbers
+    ourAnts = ourPresent.sum(axis=1)
+    enemyAnts = enemyPresent.sum(axis=1)
+    totalOnly += enemyAnts * 10
+    both += ourAnts * 10
+    numWorkers = workers.sum(axis=1)
+    both += numWorkers * 10
+    totalOnly += (enemyPresent & (enemyType == WORKER)).sum(axis=1) * 50
+
+    #fighters
+    ourFighters = ourPresent & np.isin(ourType, OFFENSIVE_TYPES)
+    enemyFighters = enemyPresent & np.isin(enemyType, OFFENSIVE_TYPES)
+    both += (FIGHTER_COST[ourType] * ourFighters).sum(axis=1) * 20
+    onEnemyHill = (ourFighters & (ourX == column(ENEMY_HILL_X)[:, None]) &
+                   (ourY == column(ENEMY_HILL_Y)[:, None]))
+    both += onEnemyHill.sum(axis=1) * 100
+    fighterPairs = pairs & ourFighters[:, :, None]
+    both += (fighterPairs & (xDist + yDist == 1)).sum(axis=(1, 2)) * 320
+    closeness = CLOSE_BONUS[np.minimum(np.maximum(xDist, yDist), 7)]
+    both += (closeness * fighterPairs).sum(axis=(1, 2))
+    totalOnly += (FIGHTER_COST[enemyType] * enemyFighters).sum(axis=1) * 60
+    totalOnly += np.where(ourAnts > 5, 300, 0)
+
+    #queens
+    ourQueenHealth = column(OUR_QUEEN_HEALTH)
+    totalOnly += column(ENEMY_QUEEN_HEALTH) * 100
+    both += ourQueenHealth * 100
+    queenX = column(QUEEN_X)
+    queenY = column(QUEEN_Y)
+    queenOnDropOff = (((queenX == column(HILL_X)) & (queenY == column(HILL_Y))) |
+                      ((column(HAS_TUNNEL) == 1) & (queenX == column(TUNNEL_X)) &
+                       (queenY == column(TUNNEL_Y))))
+    totalOnly += np.where(queenOnDropOff | (queenY > 2), 300, 0)
+    queenDist = np.abs(enemyX - queenX[:, None]) + np.abs(enemyY - queenY[:, None])
+    both += (enemyPresent & (queenDist == 1)).sum(axis=1) * 200
+
+    #anthills
+    totalOnly += column(ENEMY_HILL_HEALTH) * 200
+    both += column(OUR_HILL_HEALTH) * 200
+
+    total = both + totalOnly
+    scores = both.astype(np.float64) / total.astype(np.float64)
+    #workers too many or out of our home rows
+    awayFromHome = workers & ((ourY > 4) | (ourX > 9) | (ourX < 0) | (ourY < 0))
+    scores[(numWorkers > 3) | awayFromHome.any(axis=1)] = BAD_SCORE
+    outcome = column(OUTCOME)
+    scores[outcome == OUTCOME_WIN] = WIN_SCORE
+    scores[outcome == OUTCOME_LOSE] = LOSE_SCORE
+    return scores
@@ -28,4 +28,6 @@ class Building(Construction):
         self.captureHealth = CONSTR_STATS[inputType][CAP_HEALTH]
     
     def clone(self):
-        return Building(self.coords, self.type, self.player)
+        newBuilding = Building(self.coords, self.type, self.player)
+        newBuilding.captureHealth = self.captureHealth
+        return newBuilding
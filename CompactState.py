@@ -0,0 +1,339 @@
+from Constants import *
+from Ant import Ant, UNIT_STATS
+from Construction import Construction, CONSTR_STATS
+from Building import Building
+from Inventory import Inventory
+from Location import Location
+from GameState import GameState
+
+#Number of cells on the board
+NUM_CELLS = BOARD_LENGTH * BOARD_LENGTH
+
+#Offsets of the per-cell arrays in CompactState.data.  Cell (x, y) is at
+#index x * BOARD_LENGTH + y in each array (the same order as GameState.board).
+ANT_TYPE_OFFSET = 0 * NUM_CELLS       #ant type + 1 or 0 for no ant
+ANT_FLAGS_OFFSET = 1 * NUM_CELLS      #owner | CARRYING_FLAG | MOVED_FLAG
+ANT_HEALTH_OFFSET = 2 * NUM_CELLS     #ant health
+CONSTR_TYPE_OFFSET = 3 * NUM_CELLS    #construction type - ANTHILL + 1 or 0 for none
+CONSTR_OWNER_OFFSET = 4 * NUM_CELLS   #construction owner (NEUTRAL for grass/food)
+CAP_HEALTH_OFFSET = 5 * NUM_CELLS     #capture health of buildings
+
+#Offsets of the whole-game values
+FOOD_OFFSET = 6 * NUM_CELLS           #food for PLAYER_ONE then PLAYER_TWO
+PHASE_OFFSET = FOOD_OFFSET + 2
+TURN_OFFSET = FOOD_OFFSET + 3
+DATA_SIZE = FOOD_OFFSET + 4
+
+#Bits in the ant flags array (the low bit is the owner's player id)
+CARRYING_FLAG = 2
+MOVED_FLAG = 4
+
+##
+#CompactState
+#Description: A GameState packed into a single bytearray.  Every cell of the
+#   board has a fixed slot for its ant and its construction so looking up a
+#   cell is O(1), and cloning is a single copy of the buffer.  Use
+#   fromGameState and toGameState to convert to and from a GameState so the
+#   AIs that need one keep working.
+#
+#   Conversion is lossless except for the order of the ants and
+#   constructions in each Inventory, which (as in GameState.clone) is the
+#   order in which they are found on the board.
+#
+#Variables:
+#   data - the packed state (bytearray)
+##
+class CompactState(object):
+
+    __slots__ = ('data',)
+
+    ##
+    #__init__
+    #Description: Creates a new CompactState
+    #
+    #Parameters:
+    #   inputData - the packed state to use or None for an empty board (bytearray)
+    ##
+    def __init__(self, inputData=None):
+        if inputData == None:
+            inputData = bytearray(DATA_SIZE)
+        self.data = inputData
+
+    ##
+    #clone
+    #Description: Returns a copy of this state
+    #
+    #Return: The CompactState identical to the original
+    ##
+    def clone(self):
+        return CompactState(bytearray(self.data))
+
+    ##
+    #key
+    #Description: Returns an immutable copy of the state's contents that can
+    #   be used as a dictionary key
+    ##
+    def key(self):
+        return bytes(self.data)
+
+    def __eq__(self, other):
+        return isinstance(other, CompactState) and self.data == other.data
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(bytes(self.data))
+
+    ##
+    #Whole-game values
+    ##
+    def getPhase(self):
+        return self.data[PHASE_OFFSET]
+
+    def setPhase(self, phase):
+        self.data[PHASE_OFFSET] = phase
+
+    def getWhoseTurn(self):
+        return self.data[TURN_OFFSET]
+
+    def setWhoseTurn(self, playerId):
+        self.data[TURN_OFFSET] = playerId
+
+    def getFoodCount(self, playerId):
+        return self.data[FOOD_OFFSET + playerId]
+
+    def setFoodCount(self, playerId, food):
+        self.data[FOOD_OFFSET + playerId] = food
+
+    ##
+    #Ant values.  The ant getters return None (or False) if there is no ant
+    #at the given coordinates.
+    ##
+    def getAntType(self, coords):
+        antType = self.data[ANT_TYPE_OFFSET + coords[0] * BOARD_LENGTH + coords[1]]
+        if antType == 0:
+            return None
+        return antType - 1
+
+    def getAntOwner(self, coords):
+        index = coords[0] * BOARD_LENGTH + coords[1]
+        if self.data[ANT_TYPE_OFFSET + index] == 0:
+            return None
+        return self.data[ANT_FLAGS_OFFSET + index] & 1
+
+    def getAntHealth(self, coords):
+        index = coords[0] * BOARD_LENGTH + coords[1]
+        if self.data[ANT_TYPE_OFFSET + index] == 0:
+            return None
+        return self.data[ANT_HEALTH_OFFSET + index]
+
+    def isCarrying(self, coords):
+        return self.data[ANT_FLAGS_OFFSET + coords[0] * BOARD_LENGTH + coords[1]] & CARRYING_FLAG != 0
+
+    def hasMoved(self, coords):
+        return self.data[ANT_FLAGS_OFFSET + coords[0] * BOARD_LENGTH + coords[1]] & MOVED_FLAG != 0
+
+    ##
+    #setAnt
+    #Description: Puts an ant on the board, replacing any ant already there
+    ##
+    def setAnt(self, coords, antType, owner, health=None, carrying=False, hasMoved=False):
+        index = coords[0] * BOARD_LENGTH + coords[1]
+        if health == None:
+            health = UNIT_STATS[antType][HEALTH]
+        flags = owner
+        if carrying:
+            flags |= CARRYING_FLAG
+        if hasMoved:
+            flags |= MOVED_FLAG
+        self.data[ANT_TYPE_OFFSET + index] = antType + 1
+        self.data[ANT_FLAGS_OFFSET + index] = flags
+        self.data[ANT_HEALTH_OFFSET + index] = health
+
+    def setAntHealth(self, coords, health):
+        self.data[ANT_HEALTH_OFFSET + coords[0] * BOARD_LENGTH + coords[1]] = health
+
+    def setCarrying(self, coords, carrying):
+        index = ANT_FLAGS_OFFSET + coords[0] * BOARD_LENGTH + coords[1]
+        if carrying:
+            self.data[index] |= CARRYING_FLAG
+        else:
+            self.data[index] &= ~CARRYING_FLAG
+
+    def setHasMoved(self, coords, hasMoved):
+        index = ANT_FLAGS_OFFSET + coords[0] * BOARD_LENGTH + coords[1]
+        if hasMoved:
+            self.data[index] |= MOVED_FLAG
+        else:
+            self.data[index] &= ~MOVED_FLAG
+
+    ##
+    #removeAnt
+    #Description: Removes the ant (if any) at the given coordinates
+    ##
+    def removeAnt(self, coords):
+        index = coords[0] * BOARD_LENGTH + coords[1]
+        self.data[ANT_TYPE_OFFSET + index] = 0
+        self.data[ANT_FLAGS_OFFSET + index] = 0
+        self.data[ANT_HEALTH_OFFSET + index] = 0
+
+    ##
+    #moveAnt
+    #Description: Moves the ant at fromCoords to the (empty) cell at toCoords
+    ##
+    def moveAnt(self, fromCoords, toCoords):
+        fromIndex = fromCoords[0] * BOARD_LENGTH + fromCoords[1]
+        toIndex = toCoords[0] * BOARD_LENGTH + toCoords[1]
+        data = self.data
+        for offset in (ANT_TYPE_OFFSET, ANT_FLAGS_OFFSET, ANT_HEALTH_OFFSET):
+            data[offset + toIndex] = data[offset + fromIndex]
+            data[offset + fromIndex] = 0
+
+    ##
+    #listAntCoords
+    #Description: Lists the coordinates of every ant that belongs to a player
+    #
+    #Parameters:
+    #   playerId - the owner of the ants or None for all ants (int)
+    ##
+    def listAntCoords(self, playerId=None):
+        data = self.data
+        result = []
+        for index in range(0, NUM_CELLS):
+            if data[ANT_TYPE_OFFSET + index] == 0:
+                continue
+            if playerId != None and data[ANT_FLAGS_OFFSET + index] & 1 != playerId:
+                continue
+            result.append((index // BOARD_LENGTH, index % BOARD_LENGTH))
+        return result
+
+    ##
+    #Construction values.  The getters return None if there is no
+    #construction at the given coordinates.
+    ##
+    def getConstrType(self, coords):
+        constrType = self.data[CONSTR_TYPE_OFFSET + coords[0] * BOARD_LENGTH + coords[1]]
+        if constrType == 0:
+            return None
+        return constrType + ANTHILL - 1
+
+    def getConstrOwner(self, coords):
+        index = coords[0] * BOARD_LENGTH + coords[1]
+        if self.data[CONSTR_TYPE_OFFSET + index] == 0:
+            return None
+        return self.data[CONSTR_OWNER_OFFSET + index]
+
+    def getCaptureHealth(self, coords):
+        index = coords[0] * BOARD_LENGTH + coords[1]
+        if self.data[CONSTR_TYPE_OFFSET + index] == 0:
+            return None
+        return self.data[CAP_HEALTH_OFFSET + index]
+
+    ##
+    #setConstr
+    #Description: Puts a construction on the board, replacing any that is
+    #   already there
+    ##
+    def setConstr(self, coords, constrType, owner=NEUTRAL, captureHealth=None):
+        index = coords[0] * BOARD_LENGTH + coords[1]
+        if captureHealth == None:
+            captureHealth = CONSTR_STATS[constrType][CAP_HEALTH] or 0
+        self.data[CONSTR_TYPE_OFFSET + index] = constrType - ANTHILL + 1
+        self.data[CONSTR_OWNER_OFFSET + index] = owner
+        self.data[CAP_HEALTH_OFFSET + index] = captureHealth
+
+    def setConstrOwner(self, coords, owner):
+        self.data[CONSTR_OWNER_OFFSET + coords[0] * BOARD_LENGTH + coords[1]] = owner
+
+    def setCaptureHealth(self, coords, captureHealth):
+        self.data[CAP_HEALTH_OFFSET + coords[0] * BOARD_LENGTH + coords[1]] = captureHealth
+
+    ##
+    #fromGameState
+    #Description: Packs a GameState into a new CompactState.  If the state
+    #   has a board it is used to find the ants and constructions (as
+    #   GameState.clone does); otherwise (e.g., for a fastclone) the
+    #   inventories are used.
+    #
+    #Parameters:
+    #   state - the state to pack (GameState)
+    #
+    #Return: a new CompactState
+    ##
+    @staticmethod
+    def fromGameState(state):
+        result = CompactState()
+        ants = []
+        constrs = []
+        if state.hasBoard():
+            for col in state.board:
+                for loc in col:
+                    if loc.ant != None:
+                        ants.append(loc.ant)
+                    if loc.constr != None:
+                        constrs.append(loc.constr)
+        else:
+            for inv in state.inventories:
+                ants += inv.ants
+                constrs += inv.constrs
+
+        for ant in ants:
+            result.setAnt(ant.coords, ant.type, ant.player, ant.health, ant.carrying, ant.hasMoved)
+        for constr in constrs:
+            if type(constr) is Building:
+                result.setConstr(constr.coords, constr.type, constr.player, constr.captureHealth)
+            else:
+                result.setConstr(constr.coords, constr.type)
+
+        result.setFoodCount(PLAYER_ONE, state.inventories[PLAYER_ONE].foodCount)
+        result.setFoodCount(PLAYER_TWO, state.inventories[PLAYER_TWO].foodCount)
+        result.setPhase(state.phase)
+        result.setWhoseTurn(state.whoseTurn)
+        return result
+
+    ##
+    #toGameState
+    #Description: Unpacks this state into a new GameState
+    #
+    #Parameters:
+    #   withBoard - if False the board is set to None, as in GameState.fastclone (boolean)
+    #
+    #Return: a new GameState
+    ##
+    def toGameState(self, withBoard=True):
+        data = self.data
+        board = None
+        if withBoard:
+            board = [[Location((col, row)) for row in range(0, BOARD_LENGTH)] for col in range(0, BOARD_LENGTH)]
+        ants = ([], [])
+        constrs = ([], [], [])
+        for index in range(0, NUM_CELLS):
+            coords = (index // BOARD_LENGTH, index % BOARD_LENGTH)
+            antType = data[ANT_TYPE_OFFSET + index]
+            if antType != 0:
+                flags = data[ANT_FLAGS_OFFSET + index]
+                ant = Ant(coords, antType - 1, flags & 1)
+                ant.health = data[ANT_HEALTH_OFFSET + index]
+                ant.carrying = flags & CARRYING_FLAG != 0
+                ant.hasMoved = flags & MOVED_FLAG != 0
+                ants[ant.player].append(ant)
+                if withBoard:
+                    board[coords[0]][coords[1]].ant = ant
+            constrType = data[CONSTR_TYPE_OFFSET + index]
+            if constrType != 0:
+                constrType += ANTHILL - 1
+                owner = data[CONSTR_OWNER_OFFSET + index]
+                if constrType == ANTHILL or constrType == TUNNEL:
+                    constr = Building(coords, constrType, owner)
+                    constr.captureHealth = data[CAP_HEALTH_OFFSET + index]
+                else:
+                    constr = Construction(coords, constrType)
+                constrs[owner].append(constr)
+                if withBoard:
+                    board[coords[0]][coords[1]].constr = constr
+
+        inventories = [Inventory(PLAYER_ONE, ants[PLAYER_ONE], constrs[PLAYER_ONE], data[FOOD_OFFSET + PLAYER_ONE]),
+                       Inventory(PLAYER_TWO, ants[PLAYER_TWO], constrs[PLAYER_TWO], data[FOOD_OFFSET + PLAYER_TWO]),
+                       Inventory(NEUTRAL, [], constrs[NEUTRAL], 0)]
+        return GameState(board, inventories, data[PHASE_OFFSET], data[TURN_OFFSET])
@@ -1,4 +1,5 @@
 from Constants import *
+from Occupancy import TrackedCoords, untrackedState
 
 #Contruction stats array
 #(movement cost, capture health, build cost)[type]
@@ -22,6 +23,9 @@ CONSTR_STATS.append((1,None,None)) #Food
 ##
 class Construction(object):
 
+    #moving a construction keeps the OccupancyIndex of its GameState up to date
+    coords = TrackedCoords('constrs')
+
     ##
     #__init__
     #Description: Creates a new Construction. Only ever called by subclasses.
@@ -36,4 +40,7 @@ class Construction(object):
         self.movementCost = CONSTR_STATS[inputType][MOVE_COST]
     
     def clone(self):
-        return Construction(self.coords, self.type)
\ No newline at end of file
+        return Construction(self.coords, self.type)
+
+    def __getstate__(self):
+        return untrackedState(self)
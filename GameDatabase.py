@@ -0,0 +1,359 @@
+import sqlite3, struct, hashlib
+from Constants import *
+from GameRecord import *
+
+##
+# GameDatabase.py
+#
+# An SQLite database of recorded games (see GameRecord.py) that can be
+# searched without reading every record.  Each game is stored with its
+# record and the things it is most often looked up by, all indexed:
+#
+#    games - the players (first and second), the winner, how the game
+#        ended, its length in moves, its setup layout (a hash of every
+#        placement) and the players' AI modules
+#    sides - one row per player per game: the player, their opponent,
+#        whether they moved first, whether they won, where they put their
+#        anthill and tunnel (as they see the board) and the player's and
+#        opponent's AI modules
+#    positions - the Zobrist hash (GameState.getHash, of the board as player
+#        one sees it) of the state at the end of every turn, with the game
+#        and event it comes from
+#
+# Players are looked up by author, or by AI module with byModule (two AIs
+# can have the same author: AIPlayer.py and Random.py are both "Random").
+# Games recorded without their modules have no module to match.
+#
+# Records are added in batches, each in one transaction; Tournament.py can
+# add the games of a tournament as they are played (--database):
+#
+#    database = GameDatabase("games.db")
+#    database.addRecords(records)
+#    database.winRates("TD Bot", "Booger", "hill")
+#        -> {(x, y): (wins, games), ...}
+#    database.winRates("tdbot", "Random", byModule=True)
+#
+
+#the columns sides can be grouped by in winRates, and the coordinate columns
+SIDE_COLUMNS = ("hill", "tunnel", "first", "opponent", "opponentModule")
+COORD_COLUMNS = ("hill", "tunnel")
+
+#the columns added since the first version of the tables (a database made
+#before them gets them when it is opened)
+ADDED_COLUMNS = (("games", ("firstModule", "secondModule")),
+                 ("sides", ("module", "opponentModule")))
+
+#the tables and indexes of a database
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    first TEXT NOT NULL,
+    second TEXT NOT NULL,
+    winner INTEGER,
+    error INTEGER,
+    moves INTEGER NOT NULL,
+    layout INTEGER NOT NULL,
+    record BLOB NOT NULL,
+    firstModule TEXT,
+    secondModule TEXT
+);
+CREATE INDEX IF NOT EXISTS gamesByPlayers ON games (first, second);
+CREATE INDEX IF NOT EXISTS gamesByModules ON games (firstModule, secondModule);
+CREATE INDEX IF NOT EXISTS gamesByMoves ON games (moves);
+CREATE INDEX IF NOT EXISTS gamesByLayout ON games (layout);
+CREATE TABLE IF NOT EXISTS sides (
+    game INTEGER NOT NULL,
+    player TEXT NOT NULL,
+    opponent TEXT NOT NULL,
+    first INTEGER NOT NULL,
+    won INTEGER,
+    hill INTEGER,
+    tunnel INTEGER,
+    module TEXT,
+    opponentModule TEXT
+);
+CREATE INDEX IF NOT EXISTS sidesByPlayers ON sides (player, opponent, hill, won);
+CREATE INDEX IF NOT EXISTS sidesByModules ON sides (module, opponentModule, hill, won);
+CREATE INDEX IF NOT EXISTS sidesByGame ON sides (game);
+CREATE TABLE IF NOT EXISTS positions (
+    hash INTEGER NOT NULL,
+    game INTEGER NOT NULL,
+    event INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS positionsByHash ON positions (hash);
+"""
+
+
+##
+#GameDatabase
+#Description: An indexed SQLite store of game records
+#
+#Variables:
+#   path - the database file (string)
+#   connection - the open database (sqlite3.Connection)
+#   indexPositions - whether to store the hash of every turn's position
+#       (boolean)
+##
+class GameDatabase(object):
+
+    ##
+    #__init__
+    #Description: Opens a database, making it if it doesn't exist
+    #
+    #Parameters:
+    #   path - the database file (string)
+    #   indexPositions - see above (boolean)
+    ##
+    def __init__(self, path, indexPositions=True):
+        self.path = path
+        self.indexPositions = indexPositions
+        self.connection = sqlite3.connect(path)
+        #a batch is one transaction, so losing the last one in a crash is fine
+        self.connection.execute("PRAGMA synchronous = OFF")
+        self.addColumns()
+        self.connection.executescript(SCHEMA)
+
+    ##
+    #addColumns
+    #Description: Adds the ADDED_COLUMNS to the tables of a database made
+    #   before them
+    ##
+    def addColumns(self):
+        for table, columns in ADDED_COLUMNS:
+            existing = [row[1] for row in self.connection.execute("PRAGMA table_info(" + table + ")")]
+            if len(existing) == 0:
+                continue
+            for column in columns:
+                if column not in existing:
+                    self.connection.execute("ALTER TABLE " + table + " ADD COLUMN " + column + " TEXT")
+
+    def close(self):
+        self.connection.close()
+
+    ##
+    #addRecords
+    #Description: Adds a batch of finished games
+    #
+    #Parameters:
+    #   records - the games (GameRecord[])
+    #
+    #Return: the ids the games were given (int[])
+    ##
+    def addRecords(self, records):
+        cursor = self.connection.cursor()
+        nextId = (cursor.execute("SELECT MAX(id) FROM games").fetchone()[0] or 0) + 1
+        games = []
+        sides = []
+        positionRows = []
+        for record in records:
+            gameId = nextId + len(games)
+            modules = record.modules if record.modules != None else [None, None]
+            games.append((gameId, record.names[0], record.names[1], record.winner, record.error,
+                          record.numMoves(), layoutHash(record), sqlite3.Binary(record.toBytes()),
+                          modules[0], modules[1]))
+            hills, tunnels = homeCoords(record)
+            for side in (0, 1):
+                won = None if record.winner == None else int(record.winner == side)
+                sides.append((gameId, record.names[side], record.names[1 - side], int(side == 0), won,
+                              hills[side], tunnels[side], modules[side], modules[1 - side]))
+            if self.indexPositions:
+                positionRows += [(toSigned(stateHash), gameId, event)
+                                 for event, stateHash in turnHashes(record)]
+        with self.connection:
+            cursor.executemany("INSERT INTO games (id, first, second, winner, error, moves, layout, record, "
+                               "firstModule, secondModule) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", games)
+            cursor.executemany("INSERT INTO sides (game, player, opponent, first, won, hill, tunnel, module, "
+                               "opponentModule) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", sides)
+            cursor.executemany("INSERT INTO positions VALUES (?, ?, ?)", positionRows)
+        return [game[0] for game in games]
+
+    ##
+    #getRecord
+    #Description: Reads a game's record
+    #
+    #Return: the record (GameRecord), or None if there is no such game
+    ##
+    def getRecord(self, gameId):
+        row = self.connection.execute("SELECT record FROM games WHERE id = ?", (gameId,)).fetchone()
+        if row == None:
+            return None
+        return GameRecord.fromBytes(row[0])
+
+    ##
+    #countGames
+    #Description: The number of games in the database
+    ##
+    def countGames(self):
+        return self.connection.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    ##
+    #findGames
+    #Description: Finds the games a player played that match all of the
+    #   given conditions (the ones left as None aren't checked)
+    #
+    #Parameters:
+    #   player - the author (or module) of a player in the game (string)
+    #   opponent - the author (or module) of the other player (string)
+    #   won - whether player won (boolean)
+    #   first - whether player moved first (boolean)
+    #   hill - where player put their anthill (as they see the board) (tuple)
+    #   minMoves, maxMoves - the shortest and longest games to find (int)
+    #   layout - the game's layoutHash (int)
+    #   limit - the most games to find (int)
+    #   byModule - whether player and opponent are AI modules (boolean)
+    #
+    #Return: the ids of the games, in the order they were added (int[])
+    ##
+    def findGames(self, player=None, opponent=None, won=None, first=None, hill=None, minMoves=None,
+                  maxMoves=None, layout=None, limit=None, byModule=False):
+        conditions = []
+        values = []
+        playerColumn, opponentColumn = playerColumns(byModule)
+        for column, value in (("sides." + playerColumn, player), ("sides." + opponentColumn, opponent),
+                              ("sides.won", won), ("sides.first", first), ("games.layout", layout)):
+            if value != None:
+                conditions.append(column + " = ?")
+                values.append(int(value) if type(value) == bool else value)
+        if hill != None:
+            conditions.append("sides.hill = ?")
+            values.append(packCoord(hill))
+        if minMoves != None:
+            conditions.append("games.moves >= ?")
+            values.append(minMoves)
+        if maxMoves != None:
+            conditions.append("games.moves <= ?")
+            values.append(maxMoves)
+        query = "SELECT DISTINCT games.id FROM games JOIN sides ON sides.game = games.id"
+        if len(conditions) > 0:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY games.id"
+        if limit != None:
+            query += " LIMIT " + str(int(limit))
+        return [row[0] for row in self.connection.execute(query, values)]
+
+    ##
+    #winRates
+    #Description: Counts a player's wins and games, grouped by one of their
+    #   sides' columns, e.g. the win rate of "TD Bot" against "Booger" by
+    #   where TD Bot put its anthill
+    #
+    #Parameters:
+    #   player - the player's author (or module) (string)
+    #   opponent - only count games against this author (or module), or
+    #       None (string)
+    #   groupBy - one of SIDE_COLUMNS, or None for the totals (string)
+    #   byModule - whether player and opponent are AI modules (boolean)
+    #
+    #Return: {group: (wins, games)}; a hill or tunnel group is an (x, y)
+    #   tuple and the totals are under None (dict)
+    ##
+    def winRates(self, player, opponent=None, groupBy=None, byModule=False):
+        if groupBy != None and groupBy not in SIDE_COLUMNS:
+            raise ValueError("can't group by " + str(groupBy))
+        group = groupBy if groupBy != None else "NULL"
+        playerColumn, opponentColumn = playerColumns(byModule)
+        query = ("SELECT " + group + ", SUM(won), COUNT(*) FROM sides WHERE " + playerColumn +
+                 " = ? AND won IS NOT NULL")
+        values = [player]
+        if opponent != None:
+            query += " AND " + opponentColumn + " = ?"
+            values.append(opponent)
+        query += " GROUP BY " + group
+        result = {}
+        for key, wins, games in self.connection.execute(query, values):
+            if groupBy in COORD_COLUMNS and key != None:
+                key = unpackCoord(key)
+            result[key] = (wins, games)
+        return result
+
+    ##
+    #gamesWithPosition
+    #Description: Finds the turns that ended in a position
+    #
+    #Parameters:
+    #   stateHash - the position's GameState.getHash (int)
+    #
+    #Return: (game id, event index) for each time the position was reached
+    #   (list of tuples); replay(record, event + 1) rebuilds it
+    ##
+    def gamesWithPosition(self, stateHash):
+        return [(row[0], row[1]) for row in self.connection.execute(
+            "SELECT game, event FROM positions WHERE hash = ? ORDER BY game, event", (toSigned(stateHash),))]
+
+
+##
+#playerColumns
+#Description: The columns of sides that hold a player and their opponent
+#
+#Parameters:
+#   byModule - whether to look players up by AI module instead of author
+#       (boolean)
+#
+#Return: (player column, opponent column) (tuple of strings)
+##
+def playerColumns(byModule):
+    if byModule:
+        return ("module", "opponentModule")
+    return ("player", "opponent")
+
+##
+#layoutHash
+#Description: A hash of a game's setup (every placement of both players)
+#
+#Return: the hash (a signed 64 bit int)
+##
+def layoutHash(record):
+    data = bytearray()
+    for event in record.events:
+        if event[0] == EVENT_PLACE:
+            data += bytearray([packCoord(coord) for coord in event[1]])
+            data.append(NO_VALUE)
+    return struct.unpack('<q', hashlib.sha1(bytes(data)).digest()[:8])[0]
+
+##
+#homeCoords
+#Description: Where each player put their anthill and tunnel, as they see
+#   the board (the second player's board is flipped)
+#
+#Return: ([first's hill, second's hill], [first's tunnel, second's tunnel])
+#   as packed coords (see GameRecord.packCoord), None if not placed
+##
+def homeCoords(record):
+    hills = [None, None]
+    tunnels = [None, None]
+    places = [event[1] for event in record.events if event[0] == EVENT_PLACE]
+    for side in (0, 1):
+        if len(places) > side and len(places[side]) >= 2:
+            hill, tunnel = places[side][0], places[side][1]
+            if side == 1:
+                hill = (BOARD_LENGTH - 1 - hill[0], BOARD_LENGTH - 1 - hill[1])
+                tunnel = (BOARD_LENGTH - 1 - tunnel[0], BOARD_LENGTH - 1 - tunnel[1])
+            hills[side] = packCoord(hill)
+            tunnels[side] = packCoord(tunnel)
+    return hills, tunnels
+
+##
+#turnHashes
+#Description: Replays a game and hashes the position at the end of each
+#   turn
+#
+#Return: (event index, hash) for each END move (list of tuples)
+##
+def turnHashes(record):
+    result = []
+    index = 0
+    for event, state in positions(record):
+        if event[0] == EVENT_END:
+            #(the hash is then kept up to date by the moves)
+            result.append((index, state.getHash()))
+        index += 1
+    return result
+
+##
+#toSigned
+#Description: Turns a 64 bit hash into the signed int SQLite can store
+##
+def toSigned(value):
+    if value >= 1 << 63:
+        return value - (1 << 64)
+    return value
@@ -0,0 +1,358 @@
+import struct
+from itertools import islice
+from Constants import *
+from Move import Move
+from GameRules import applyAttack
+from HeadlessGame import HeadlessGame, setupConstructions
+
+##
+# GameRecord.py
+#
+# Saves games so they can be looked at again without playing them.  A
+# GameRecord holds the names of the two players (the one that moved first
+# first) and of their AI modules (two AIs can have the same author), every
+# placement, move and attack of the game in the order they
+# were made (in board coordinates, as player one sees the board) and the
+# result.  Set a HeadlessGame's recorder to a GameRecorder to record the
+# games it plays:
+#
+#    game.recorder = GameRecorder("games.rec")
+#    game.playGames(PLAYER_ONE, PLAYER_TWO, 100)
+#    ...
+#    for record in readRecords("games.rec"):
+#        state = replay(record, 200)         #the state after 200 events
+#
+# replay and positions rebuild the states of a game by carrying out its
+# events with HeadlessGame's own rules (no AI is asked for anything and no
+# move is checked), so a slow or crashing game can be looked at position by
+# position.
+#
+# A record is written as bytes: a coordinate takes one byte (x * 10 + y) and
+# an event takes one byte plus its coordinates, which comes to a few KB for
+# a whole game.  A record file is a list of records, each after its length.
+#
+
+#the kinds of events (the first byte of each event)
+EVENT_PLACE = 0     #(EVENT_PLACE, coords): one setup turn's placements
+EVENT_MOVE = 1      #(EVENT_MOVE, coords): a MOVE_ANT move along the path coords
+EVENT_BUILD = 2     #(EVENT_BUILD, coord, buildType): a BUILD move
+EVENT_END = 3       #(EVENT_END,): an END move
+EVENT_ATTACK = 4    #(EVENT_ATTACK, coord): the ant that just moved attacks coord
+
+#the version of the byte format (version 1 records have no module names)
+RECORD_VERSION = 2
+
+#marks a value that is None
+NO_VALUE = 255
+
+#added to a build type (constructions have negative types) to fit it in a byte
+BUILD_TYPE_OFFSET = 128
+
+#the length written before each record in a record file
+LENGTH = struct.Struct('<I')
+
+
+##
+#GameRecord
+#Description: The names, events and result of one game
+#
+#Variables:
+#   names - the authors of the players, the first player first (string[2])
+#   modules - the AI modules of the players (e.g. "Random"), the first
+#       player first, or None if they aren't known (string[2])
+#   events - the events of the game in order (tuple[], see above)
+#   winner - 0 if the first player won, 1 if the second did, None if the
+#       game isn't over or an AI crashed (int)
+#   error - the error code (see Constants) if the game ended because a
+#       player made an invalid move, took too long or raised an exception
+#       (AI_EXCEPTION), or None (int)
+##
+class GameRecord(object):
+
+    def __init__(self, names, events=None, winner=None, error=None, modules=None):
+        self.names = list(names)
+        self.modules = list(modules) if modules != None else None
+        self.events = events if events != None else []
+        self.winner = winner
+        self.error = error
+
+    ##
+    #addPlacement
+    #Description: Adds one setup turn's placements
+    #
+    #Parameters:
+    #   targets - the coords, in board coordinates (list of tuples)
+    ##
+    def addPlacement(self, targets):
+        self.events.append((EVENT_PLACE, tuple([tuple(coord) for coord in targets])))
+
+    ##
+    #addMove
+    #Description: Adds a move (with its coords in board coordinates)
+    ##
+    def addMove(self, move):
+        if move.moveType == MOVE_ANT:
+            self.events.append((EVENT_MOVE, tuple([tuple(coord) for coord in move.coordList])))
+        elif move.moveType == BUILD:
+            self.events.append((EVENT_BUILD, tuple(move.coordList[0]), move.buildType))
+        else:
+            self.events.append((EVENT_END,))
+
+    ##
+    #addAttack
+    #Description: Adds the attack of the ant moved by the last move
+    ##
+    def addAttack(self, coord):
+        self.events.append((EVENT_ATTACK, tuple(coord)))
+
+    ##
+    #numMoves
+    #Description: The number of moves in the game (not counting placements
+    #   and attacks)
+    ##
+    def numMoves(self):
+        return len([event for event in self.events if event[0] in (EVENT_MOVE, EVENT_BUILD, EVENT_END)])
+
+    ##
+    #toBytes
+    #Description: Packs the record into bytes
+    #
+    #Return: the bytes (bytes)
+    ##
+    def toBytes(self):
+        data = bytearray([RECORD_VERSION])
+        packNames(data, self.names)
+        #the module names, after how many there are
+        modules = self.modules if self.modules != None else []
+        data.append(len(modules))
+        packNames(data, modules)
+        data.append(NO_VALUE if self.winner == None else self.winner)
+        data.append(NO_VALUE if self.error == None else self.error)
+        for event in self.events:
+            kind = event[0]
+            data.append(kind)
+            if kind == EVENT_PLACE or kind == EVENT_MOVE:
+                data.append(len(event[1]))
+                data += bytearray([packCoord(coord) for coord in event[1]])
+            elif kind == EVENT_BUILD:
+                data.append(packCoord(event[1]))
+                data.append(NO_VALUE if event[2] == None else event[2] + BUILD_TYPE_OFFSET)
+            elif kind == EVENT_ATTACK:
+                data.append(packCoord(event[1]))
+        return bytes(data)
+
+    ##
+    #fromBytes
+    #Description: Unpacks a record packed by toBytes
+    #
+    #Return: the record (GameRecord)
+    ##
+    @staticmethod
+    def fromBytes(data):
+        data = bytearray(data)
+        if data[0] not in (1, RECORD_VERSION):
+            raise ValueError("unknown game record version " + str(data[0]))
+        names, index = unpackNames(data, 1, 2)
+        modules = None
+        if data[0] >= 2:
+            numModules = data[index]
+            modules, index = unpackNames(data, index + 1, numModules)
+            if numModules == 0:
+                modules = None
+        winner = None if data[index] == NO_VALUE else data[index]
+        error = None if data[index + 1] == NO_VALUE else data[index + 1]
+        index += 2
+        events = []
+        while index < len(data):
+            kind = data[index]
+            if kind == EVENT_PLACE or kind == EVENT_MOVE:
+                count = data[index + 1]
+                coords = tuple([unpackCoord(value) for value in data[index + 2:index + 2 + count]])
+                events.append((kind, coords))
+                index += 2 + count
+            elif kind == EVENT_BUILD:
+                buildType = None if data[index + 2] == NO_VALUE else data[index + 2] - BUILD_TYPE_OFFSET
+                events.append((EVENT_BUILD, unpackCoord(data[index + 1]), buildType))
+                index += 3
+            elif kind == EVENT_ATTACK:
+                events.append((EVENT_ATTACK, unpackCoord(data[index + 1])))
+                index += 2
+            elif kind == EVENT_END:
+                events.append((EVENT_END,))
+                index += 1
+            else:
+                raise ValueError("unknown game record event " + str(kind))
+        return GameRecord(names, events, winner, error, modules)
+
+
+##
+#GameRecorder
+#Description: Records the games a HeadlessGame plays (set it as the game's
+#   recorder).  Each finished record is added to a file, kept in a list, or
+#   both.
+#
+#Variables:
+#   path - the record file finished games are added to, or None (string)
+#   records - the finished records, if keep is set (GameRecord[])
+#   keep - whether to keep the finished records in records (boolean)
+#   record - the record of the game being played (GameRecord)
+##
+class GameRecorder(object):
+
+    def __init__(self, path=None, keep=False):
+        self.path = path
+        self.keep = keep
+        self.records = []
+        self.record = None
+
+    def startGame(self, names, modules=None):
+        self.record = GameRecord(names, modules=modules)
+
+    def addPlacement(self, targets):
+        self.record.addPlacement(targets)
+
+    def addMove(self, move):
+        self.record.addMove(move)
+
+    def addAttack(self, coord):
+        self.record.addAttack(coord)
+
+    def addError(self, errorCode):
+        self.record.error = errorCode
+
+    def endGame(self, winner):
+        self.record.winner = winner
+        if self.path != None:
+            writeRecords(self.path, [self.record])
+        if self.keep:
+            self.records.append(self.record)
+
+
+##
+#packNames
+#Description: Adds names to a record's bytes, each after its length
+##
+def packNames(data, names):
+    for name in names:
+        encoded = name.encode('utf-8')[:255]
+        data.append(len(encoded))
+        data += encoded
+
+##
+#unpackNames
+#Description: Reads names packed by packNames
+#
+#Parameters:
+#   data - the record's bytes (bytearray)
+#   index - where the first name starts (int)
+#   count - how many names to read (int)
+#
+#Return: (the names, the index after the last one)
+##
+def unpackNames(data, index, count):
+    names = []
+    for i in range(0, count):
+        length = data[index]
+        names.append(bytes(data[index + 1:index + 1 + length]).decode('utf-8'))
+        index += 1 + length
+    return names, index
+
+##
+#packCoord
+#Description: Packs a board coordinate into a byte
+##
+def packCoord(coord):
+    return coord[0] * BOARD_LENGTH + coord[1]
+
+##
+#unpackCoord
+#Description: Unpacks a coordinate packed by packCoord
+##
+def unpackCoord(value):
+    return (value // BOARD_LENGTH, value % BOARD_LENGTH)
+
+##
+#writeRecords
+#Description: Adds records to the end of a record file
+#
+#Parameters:
+#   path - the file (string)
+#   records - the records (GameRecord[])
+##
+def writeRecords(path, records):
+    data = bytearray()
+    for record in records:
+        packed = record.toBytes()
+        data += LENGTH.pack(len(packed))
+        data += packed
+    with open(path, 'ab') as file:
+        file.write(data)
+
+##
+#readRecords
+#Description: Reads the records in a record file one at a time (a record
+#   cut short at the end of the file is left out)
+#
+#Return: a generator of the records (GameRecord)
+##
+def readRecords(path):
+    with open(path, 'rb') as file:
+        while True:
+            header = file.read(LENGTH.size)
+            if len(header) < LENGTH.size:
+                return
+            length = LENGTH.unpack(header)[0]
+            data = file.read(length)
+            if len(data) < length:
+                return
+            yield GameRecord.fromBytes(data)
+
+##
+#positions
+#Description: Carries out a record's events one at a time
+#
+#Parameters:
+#   record - the game (GameRecord)
+#
+#Return: a generator of (event, state) for each event, where state is the
+#   state after the event.  The same GameState is changed by each event;
+#   clone it to keep a position.
+##
+def positions(record):
+    game = HeadlessGame([])
+    game.state.phase = SETUP_PHASE_1
+    constrsToPlace = setupConstructions(PLAYER_ONE)
+    movedAnt = None
+    for event in record.events:
+        kind = event[0]
+        if kind == EVENT_PLACE:
+            game.placeConstructions(constrsToPlace, list(event[1]))
+        elif kind == EVENT_MOVE:
+            movedAnt = game.moveAnt(Move(MOVE_ANT, list(event[1]), None))
+        elif kind == EVENT_BUILD:
+            game.build(Move(BUILD, [event[1]], event[2]))
+        elif kind == EVENT_END:
+            game.endTurn()
+        elif kind == EVENT_ATTACK:
+            applyAttack(game.state, movedAnt, event[1])
+        yield event, game.state
+
+##
+#replay
+#Description: Rebuilds a position of a recorded game
+#
+#Parameters:
+#   record - the game (GameRecord)
+#   numEvents - how many of its events to carry out (default: all of them)
+#
+#Return: the state after that many events (GameState)
+##
+def replay(record, numEvents=None):
+    if numEvents == None:
+        numEvents = len(record.events)
+    game = HeadlessGame([])
+    game.state.phase = SETUP_PHASE_1
+    state = game.state
+    for event, state in islice(positions(record), max(numEvents, 0)):
+        pass
+    return state.clone()
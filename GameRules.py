@@ -0,0 +1,472 @@
+from Constants import *
+from Ant import Ant, UNIT_STATS
+from Building import Building
+from Construction import CONSTR_STATS
+from Occupancy import tupleCoords
+from Zobrist import antKey, constrKey, foodKey, turnKey
+
+##
+# GameRules.py
+#
+# The rules for carrying out moves.  Game and HeadlessGame use these
+# functions to play moves, and AIs can use them to look ahead: getNextState
+# returns the state a move leads to, and applyMove/undoMove change a state in
+# place and put it back, which lets a search walk down and back up a game
+# tree with a single state instead of cloning the state for every node:
+#
+#    record = applyMove(state, move)
+#    ...evaluate or search state...
+#    undoMove(state, record)
+#
+# States that have worked out their Zobrist hash (GameState.getHash) have it
+# updated as they change, and put back by undoMove.
+#
+# Moves are assumed to be legal for the player whose turn it is (as listed by
+# AIPlayerUtils.listAllLegalMoves); they are not checked.  Works for states
+# with or without a board of their own (see GameState.fastclone); only a
+# state's own board is updated, as one built from the inventories is rebuilt
+# when it is next read.
+#
+# States made with GameState.lightclone share their ants, constructions and
+# inventory lists with the state they were copied from.  In such states the
+# functions here copy an ant, construction or list before its first change
+# (see ownItem and ownList), so a search that makes many child states only
+# allocates the pieces each move changes.
+#
+
+#Kinds of entries in an undo record
+UNDO_SET = 0        #(UNDO_SET, object, attribute name, old value)
+UNDO_APPEND = 1     #(UNDO_APPEND, list)
+UNDO_REMOVE = 2     #(UNDO_REMOVE, list, index, item)
+UNDO_REPLACE = 3    #(UNDO_REPLACE, list, index, old item)
+
+##
+#applyMove
+#Description: Carries out a move on the given state, changing the state.
+#   A MOVE_ANT move is followed by the ant's attack if it has an enemy in
+#   range, as it is in the game.
+#
+#Parameters:
+#   state - the state to change (GameState)
+#   move - a legal move for the player whose turn it is (Move)
+#   attackCoord - where the moved ant attacks.  If None or not a valid
+#       target, the first target in the enemy's inventory is attacked.
+#
+#Return: an undo record to pass to undoMove (list)
+##
+def applyMove(state, move, attackCoord=None):
+    record = []
+    carryOutMove(state, move, attackCoord, record)
+    return record
+
+##
+#getNextState
+#Description: Returns the state that a move leads to without changing the
+#   given state.  A state without a board of its own (see
+#   GameState.fastclone) is copied with fastclone, which is much faster than
+#   clone.
+#
+#Parameters:
+#   state - the current state (GameState)
+#   move - a legal move for the player whose turn it is (Move)
+#   attackCoord - see applyMove
+#   share - if True the next state is made with GameState.lightclone and
+#       shares everything the move does not change with the given state.
+#       Both states must then only be changed through these functions.
+#
+#Return: the next state (GameState)
+##
+def getNextState(state, move, attackCoord=None, share=False):
+    if share:
+        nextState = state.lightclone()
+    elif not state.hasBoard():
+        nextState = state.fastclone()
+    else:
+        nextState = state.clone()
+    nextState._hash = state.__dict__.get('_hash')
+    carryOutMove(nextState, move, attackCoord, None)
+    return nextState
+
+##
+#carryOutMove
+#Description: Does the work of applyMove and getNextState
+#
+#Parameters:
+#   state - the state to change (GameState)
+#   move - a legal move for the player whose turn it is (Move)
+#   attackCoord - see applyMove
+#   record - an undo record to add to, or None (list)
+##
+def carryOutMove(state, move, attackCoord, record):
+    if move.moveType == MOVE_ANT:
+        ant = applyMoveAnt(state, move, record)
+        targets = listAttackTargets(state, ant)
+        if len(targets) > 0:
+            if attackCoord == None or tupleCoords(attackCoord) not in targets:
+                attackCoord = targets[0]
+            applyAttack(state, ant, attackCoord, record)
+    elif move.moveType == BUILD:
+        applyBuild(state, move, record)
+    elif move.moveType == END:
+        applyEndTurn(state, record)
+
+##
+#undoMove
+#Description: Puts a state back the way it was before applyMove.  Moves must
+#   be undone in the reverse of the order they were applied.
+#
+#Parameters:
+#   state - the state that was changed (GameState)
+#   record - the undo record returned by applyMove (list)
+##
+def undoMove(state, record):
+    listsChanged = False
+    for entry in reversed(record):
+        if entry[0] == UNDO_SET:
+            setattr(entry[1], entry[2], entry[3])
+        elif entry[0] == UNDO_APPEND:
+            entry[1].pop()
+            listsChanged = True
+        elif entry[0] == UNDO_REMOVE:
+            entry[1].insert(entry[2], entry[3])
+            listsChanged = True
+        else:
+            entry[1][entry[2]] = entry[3]
+            listsChanged = True
+    if listsChanged:
+        forgetOccupancy(state)
+
+##
+#getWinner
+#Description: Checks whether the game is over, using the same tests as
+#   Game.hasWon
+#
+#Parameters:
+#   state - the state to check (GameState)
+#
+#Return: the id of the winning player or None if nobody has won
+##
+def getWinner(state):
+    if state.phase != PLAY_PHASE:
+        return None
+    for playerId in (PLAYER_ONE, PLAYER_TWO):
+        myInv = state.inventories[playerId]
+        enemyInv = state.inventories[(playerId + 1) % 2]
+        if enemyInv.getQueen() == None or enemyInv.getAnthill().captureHealth <= 0 or \
+           myInv.foodCount >= FOOD_GOAL or (enemyInv.foodCount == 0 and len(enemyInv.ants) == 1):
+            return playerId
+    return None
+
+##
+#applyMoveAnt
+#Description: Moves an ant along a MOVE_ANT move (without attacking)
+#
+#Parameters:
+#   state - the state to change (GameState)
+#   move - a legal move of type MOVE_ANT (Move)
+#   record - an undo record to add to, or None (list)
+#
+#Return: the Ant that was moved
+##
+def applyMoveAnt(state, move, record=None):
+    startCoord = tupleCoords(move.coordList[0])
+    endCoord = tupleCoords(move.coordList[-1])
+    ant = ownItem(state, state.getOccupancy().ants.get(startCoord), record)
+
+    saveHash(state, record)
+    toggleHash(state, antKey, ant)
+    setValue(ant, 'coords', endCoord, record)
+    setValue(ant, 'hasMoved', True, record)
+    toggleHash(state, antKey, ant)
+    if state.hasBoard():
+        setValue(state.board[startCoord[0]][startCoord[1]], 'ant', None, record)
+        setValue(state.board[endCoord[0]][endCoord[1]], 'ant', ant, record)
+    return ant
+
+##
+#listAttackTargets
+#Description: Lists the coords of the enemy ants an ant can attack, in the
+#   order the game offers them to the player.
+#
+#Parameters:
+#   state - the current state (GameState)
+#   attackingAnt - the ant that is attacking (Ant)
+#   coords - where the ant attacks from, if not where it is now (tuple)
+#
+#Return: a list of coords (tuples)
+##
+def listAttackTargets(state, attackingAnt, coords=None):
+    targets = []
+    attackRange = UNIT_STATS[attackingAnt.type][RANGE] ** 2
+    if coords == None:
+        coords = attackingAnt.coords
+    x, y = coords[0], coords[1]
+    for ant in state.inventories[(attackingAnt.player + 1) % 2].ants:
+        if (ant.coords[0] - x) ** 2 + (ant.coords[1] - y) ** 2 <= attackRange:
+            targets.append(tupleCoords(ant.coords))
+    return targets
+
+##
+#applyAttack
+#Description: Carries out an attack, removing the attacked ant if it dies
+#
+#Parameters:
+#   state - the state to change (GameState)
+#   attackingAnt - the ant that is attacking (Ant)
+#   attackCoord - a valid target of the attack (tuple)
+#   record - an undo record to add to, or None (list)
+##
+def applyAttack(state, attackingAnt, attackCoord, record=None):
+    attackCoord = tupleCoords(attackCoord)
+    attackedAnt = ownItem(state, state.getOccupancy().ants.get(attackCoord), record)
+    health = attackedAnt.health - UNIT_STATS[attackingAnt.type][ATTACK]
+    saveHash(state, record)
+    toggleHash(state, antKey, attackedAnt)
+    setValue(attackedAnt, 'health', health, record)
+
+    #check for dead ant
+    if health <= 0:
+        if state.hasBoard():
+            setValue(state.board[attackCoord[0]][attackCoord[1]], 'ant', None, record)
+        removeItem(state, ownList(state, state.inventories[attackedAnt.player], 'ants', record),
+                   attackedAnt, record)
+    else:
+        toggleHash(state, antKey, attackedAnt)
+
+##
+#applyBuild
+#Description: Carries out a BUILD move.  A new tunnel is added to the
+#   builder's inventory as well as the board.
+#
+#Parameters:
+#   state - the state to change (GameState)
+#   move - a legal move of type BUILD (Move)
+#   record - an undo record to add to, or None (list)
+##
+def applyBuild(state, move, record=None):
+    coord = tupleCoords(move.coordList[0])
+    me = state.whoseTurn
+    myInv = state.inventories[me]
+    saveHash(state, record)
+    toggleFood(state, me)
+
+    if move.buildType == TUNNEL:
+        setValue(myInv, 'foodCount', myInv.foodCount - CONSTR_STATS[TUNNEL][BUILD_COST], record)
+        tunnel = Building(coord, TUNNEL, me)
+        if state.hasBoard():
+            setValue(state.board[coord[0]][coord[1]], 'constr', tunnel, record)
+        appendItem(state, ownList(state, myInv, 'constrs', record), tunnel, record)
+        toggleHash(state, constrKey, tunnel)
+    else:
+        setValue(myInv, 'foodCount', myInv.foodCount - UNIT_STATS[move.buildType][COST], record)
+        ant = Ant(coord, move.buildType, me)
+        ant.hasMoved = True
+        if state.hasBoard():
+            setValue(state.board[coord[0]][coord[1]], 'ant', ant, record)
+        appendItem(state, ownList(state, myInv, 'ants', record), ant, record)
+        toggleHash(state, antKey, ant)
+    toggleFood(state, me)
+
+##
+#applyEndTurn
+#Description: Carries out an END move: captures, food pickup and delivery
+#   for the current player's ants, then switches whose turn it is.
+#
+#Parameters:
+#   state - the state to change (GameState)
+#   record - an undo record to add to, or None (list)
+##
+def applyEndTurn(state, record=None):
+    me = state.whoseTurn
+    myInv = state.inventories[me]
+    constrAt = state.getOccupancy().constrs.get
+    saveHash(state, record)
+    toggleFood(state, me)
+    for ant in list(myInv.ants):
+        toggleHash(state, antKey, ant)
+        constrUnderAnt = constrAt(tupleCoords(ant.coords))
+        if constrUnderAnt != None:
+            #if constr is enemy's and ant hasnt moved, affect capture health of buildings
+            if type(constrUnderAnt) is Building and not ant.hasMoved and not constrUnderAnt.player == me:
+                constrUnderAnt = ownItem(state, constrUnderAnt, record)
+                toggleHash(state, constrKey, constrUnderAnt)
+                setValue(constrUnderAnt, 'captureHealth', constrUnderAnt.captureHealth - 1, record)
+                if constrUnderAnt.captureHealth == 0 and constrUnderAnt.type != ANTHILL:
+                    captureBuilding(state, constrUnderAnt, record)
+                toggleHash(state, constrKey, constrUnderAnt)
+            #have all worker ants on food sources gather food
+            elif constrUnderAnt.type == FOOD and ant.type == WORKER:
+                if not ant.carrying:
+                    ant = ownItem(state, ant, record)
+                    setValue(ant, 'carrying', True, record)
+            #deposit carried food (only workers carry)
+            elif (constrUnderAnt.type == ANTHILL or constrUnderAnt.type == TUNNEL) and ant.carrying == True:
+                ant = ownItem(state, ant, record)
+                setValue(myInv, 'foodCount', myInv.foodCount + 1, record)
+                setValue(ant, 'carrying', False, record)
+
+        #reset hasMoved on all ants of player
+        if ant.hasMoved:
+            ant = ownItem(state, ant, record)
+            setValue(ant, 'hasMoved', False, record)
+        toggleHash(state, antKey, ant)
+    toggleFood(state, me)
+
+    #switch whose turn it is
+    toggleHash(state, turnKey, me)
+    setValue(state, 'whoseTurn', (me + 1) % 2, record)
+    toggleHash(state, turnKey, state.whoseTurn)
+
+##
+#captureBuilding
+#Description: Gives a building to the player whose turn it is and moves it
+#   to that player's inventory
+##
+def captureBuilding(state, building, record=None):
+    me = state.whoseTurn
+    if building.player != NEUTRAL:
+        removeItem(state, ownList(state, state.inventories[building.player], 'constrs', record),
+                   building, record)
+    setValue(building, 'player', me, record)
+    setValue(building, 'captureHealth', CONSTR_STATS[building.type][CAP_HEALTH], record)
+    appendItem(state, ownList(state, state.inventories[me], 'constrs', record), building, record)
+
+##
+#setValue
+#Description: Sets an attribute, adding its old value to the undo record
+##
+def setValue(obj, name, value, record):
+    if record != None:
+        record.append((UNDO_SET, obj, name, getattr(obj, name)))
+    setattr(obj, name, value)
+
+##
+#saveHash
+#Description: Adds the state's hash to the undo record (if it has one) so
+#   undoMove can put it back
+##
+def saveHash(state, record):
+    if record != None and state.__dict__.get('_hash') != None:
+        record.append((UNDO_SET, state, '_hash', state._hash))
+
+##
+#toggleHash
+#Description: XORs the key of something in the state into the state's hash
+#   (if it has one).  Called once before something changes, to take its old
+#   key out of the hash, and once after, to put its new key in.
+#
+#Parameters:
+#   state - the state (GameState)
+#   keyFunction - the Zobrist function that gives the key (function)
+#   item - what to pass to keyFunction
+##
+def toggleHash(state, keyFunction, item):
+    if state.__dict__.get('_hash') != None:
+        state._hash ^= keyFunction(item)
+
+##
+#toggleFood
+#Description: XORs the key of a player's food count into the state's hash
+##
+def toggleFood(state, playerId):
+    if state.__dict__.get('_hash') != None:
+        state._hash ^= foodKey(playerId, state.inventories[playerId].foodCount)
+
+##
+#appendItem
+#Description: Appends an ant or construction to an inventory list
+##
+def appendItem(state, items, item, record):
+    if record != None:
+        record.append((UNDO_APPEND, items))
+    items.append(item)
+    owned = state.__dict__.get('_owned')
+    if owned != None:
+        owned.add(id(item))
+    forgetOccupancy(state)
+
+##
+#removeItem
+#Description: Removes an ant or construction from an inventory list
+##
+def removeItem(state, items, item, record):
+    index = items.index(item)
+    if record != None:
+        record.append((UNDO_REMOVE, items, index, item))
+    del items[index]
+    forgetOccupancy(state)
+
+##
+#ownList
+#Description: Returns an inventory list that the state may change.  In a
+#   state that shares its lists (see GameState.lightclone) the list is
+#   copied the first time it is needed and the copy put in the inventory.
+#
+#Parameters:
+#   state - the state (GameState)
+#   inv - the inventory (Inventory)
+#   name - the name of the list: 'ants' or 'constrs'
+#   record - an undo record to add to, or None (list)
+#
+#Return: the list (list)
+##
+def ownList(state, inv, name, record):
+    items = getattr(inv, name)
+    owned = state.__dict__.get('_owned')
+    if owned == None or id(items) in owned:
+        return items
+    items = list(items)
+    setValue(inv, name, items, record)
+    owned.add(id(items))
+    return items
+
+##
+#ownItem
+#Description: Returns an ant or player's construction that the state may
+#   change.  In a state that shares its ants and constructions (see
+#   GameState.lightclone) the item is copied the first time it is changed
+#   and the copy put in its place in the inventory, occupancy index and
+#   board.
+#
+#Parameters:
+#   state - the state (GameState)
+#   item - the Ant or Building that is about to change
+#   record - an undo record to add to, or None (list)
+#
+#Return: the item or its copy
+##
+def ownItem(state, item, record):
+    owned = state.__dict__.get('_owned')
+    if owned == None or id(item) in owned:
+        return item
+    index = state.getOccupancy()
+    if isinstance(item, Ant):
+        name, table, cellName = 'ants', index.ants, 'ant'
+    else:
+        name, table, cellName = 'constrs', index.constrs, 'constr'
+    inv = state.inventories[item.player]
+    oldItems = getattr(inv, name)
+    items = ownList(state, inv, name, record)
+    if items is not oldItems:
+        #the new list holds the same objects, so the index still fits it
+        index.rekey(state.inventories)
+    position = items.index(item)
+    copy = item.clone()
+    if record != None:
+        record.append((UNDO_REPLACE, items, position, item))
+    items[position] = copy
+    index.replace(table, item, copy)
+    if state.hasBoard():
+        coords = copy.coords
+        setValue(state.board[coords[0]][coords[1]], cellName, copy, record)
+    owned.add(id(copy))
+    return copy
+
+##
+#forgetOccupancy
+#Description: Makes the state rebuild its occupancy index the next time it
+#   is needed.  Called whenever an inventory list changes.
+##
+def forgetOccupancy(state):
+    if '_occupancy' in state.__dict__:
+        state._occupancy = None
@@ -3,6 +3,8 @@ from Constants import *
 from Inventory import Inventory
 from Building import Building
 from Location import *
+from Occupancy import OccupancyIndex, occupancyKey
+from Zobrist import computeHash
 
 def addCoords(tuple1, tuple2):
     if len(tuple1) != len(tuple2):
@@ -22,7 +24,10 @@ def subtractCoords(tuple1, tuple2):
 #Description: The current state of the game.
 #
 #Variables:
-#   board - The game Board being used.
+#   board - The game Board being used.  A state made without a board (such
+#       as a fastclone) builds one from its inventories when board is first
+#       read, and builds it again if its ants or constructions have moved
+#       since.
 #   inventories - A tuple containing the Inventory for each player.
 #   phase - The current phase of the game.
 #    whoseTurn - The ID of the Player who's turn it currently is.
@@ -41,10 +46,137 @@ class GameState(object):
     #   inputTurn - The ID of the Player who's turn it is (int)
     ##
     def __init__(self, inputBoard, inputInventories, inputPhase, inputTurn):
+        self._lazyBoard = None
+        self._lazyBoardKey = None
         self.board = inputBoard
         self.inventories = inputInventories
         self.phase = inputPhase
         self.whoseTurn = inputTurn
+        self._occupancy = None
+        self._hash = None
+        self._owned = None
+        self._sharedNeutral = False
+
+    ##
+    #board
+    #Description: The board, built from the inventories if this state was
+    #   made without one
+    ##
+    @property
+    def board(self):
+        board = self._board
+        if board != None:
+            return board
+        return self.getLazyBoard()
+
+    @board.setter
+    def board(self, value):
+        self._board = value
+        self._lazyBoard = None
+        self._lazyBoardKey = None
+
+    ##
+    #hasBoard
+    #Description: Returns whether this state has a board of its own (rather
+    #   than one that is built from the inventories when it is needed).
+    #   Code that updates the board when the state changes only needs to do
+    #   so when this is True.
+    ##
+    def hasBoard(self):
+        return self._board != None
+
+    ##
+    #getLazyBoard
+    #Description: Builds (or reuses) a board from the inventories for a
+    #   state that doesn't have one of its own.  The board is built again
+    #   whenever an ant or construction has been added, removed or moved
+    #   since it was last built.
+    #
+    #Return: the board (Location[][])
+    ##
+    def getLazyBoard(self):
+        index = self.getOccupancy()
+        key = self._lazyBoardKey
+        if self._lazyBoard == None or key[0] is not index or key[1] != index.version:
+            board = [[Location((col, row)) for row in range(0, BOARD_LENGTH)] for col in range(0, BOARD_LENGTH)]
+            for coords, ant in index.ants.items():
+                board[coords[0]][coords[1]].ant = ant
+            for coords, constr in index.constrs.items():
+                board[coords[0]][coords[1]].constr = constr
+            self._lazyBoard = board
+            self._lazyBoardKey = (index, index.version)
+        return self._lazyBoard
+
+    ##
+    #getOccupancy
+    #Description: Returns an index of the ants and constructions in this
+    #   state by their coordinates.  The index is built from the
+    #   inventories the first time it is needed (so it works for fastclone'd
+    #   states) and follows the ants and constructions as they move.  It is
+    #   rebuilt if ants or constructions are added to or removed from the
+    #   inventories.
+    #
+    #Return: an OccupancyIndex
+    ##
+    def getOccupancy(self):
+        key = occupancyKey(self.inventories)
+        index = self.__dict__.get('_occupancy')
+        if index == None or index.key != key:
+            index = OccupancyIndex(self.inventories, key, self.__dict__.get('_owned'))
+            self._occupancy = index
+        return index
+
+    ##
+    #getHash
+    #Description: Returns the Zobrist hash of this state (see Zobrist.py).  It
+    #   is worked out the first time it is needed and then kept up to date by
+    #   the functions in GameRules.  Code that changes a state some other way
+    #   must call forgetHash afterwards.
+    #
+    #Return: the hash (a 64 bit int)
+    ##
+    def getHash(self):
+        if self.__dict__.get('_hash') == None:
+            self._hash = computeHash(self)
+        return self._hash
+
+    ##
+    #forgetHash
+    #Description: Throws away this state's hash so it is worked out again the
+    #   next time it is needed.
+    ##
+    def forgetHash(self):
+        self._hash = None
+
+    ##
+    #__getstate__
+    #Description: Leaves the occupancy index and any board built from the
+    #   inventories out when a state is pickled or copied (they are rebuilt
+    #   when needed).
+    ##
+    def __getstate__(self):
+        result = self.__dict__.copy()
+        result['_occupancy'] = None
+        result['_lazyBoard'] = None
+        result['_lazyBoardKey'] = None
+        #a copy shares nothing with this state
+        result['_owned'] = None
+        result['_sharedNeutral'] = False
+        return result
+
+    ##
+    #__setstate__
+    #Description: Restores a pickled or copied state (including ones pickled
+    #   before the board was built lazily)
+    ##
+    def __setstate__(self, state):
+        if 'board' in state:
+            state['_board'] = state.pop('board')
+        state.setdefault('_lazyBoard', None)
+        state.setdefault('_lazyBoardKey', None)
+        state.setdefault('_owned', None)
+        state.setdefault('_sharedNeutral', False)
+        self.__dict__.update(state)
 
     ##
     #coordLookup
@@ -68,6 +200,8 @@ class GameState(object):
     #
     ##
     def flipBoard(self):
+        self.forgetHash()
+        self.ownPieces()
         for col in self.board:
             col.reverse()
             
@@ -79,12 +213,54 @@ class GameState(object):
             for constr in inv.constrs:
                 constr.coords = self.coordLookup(constr.coords, PLAYER_TWO)
       
+    ##
+    #ownPieces
+    #Description: Copies the ants and constructions that this state shares
+    #   with other states (the grass and food after a fastclone, anything not
+    #   yet copied after a lightclone) so that they can be moved without
+    #   changing the other states.  Called by flipBoard.
+    ##
+    def ownPieces(self):
+        owned = self.__dict__.get('_owned')
+        sharedNeutral = self.__dict__.get('_sharedNeutral')
+        if owned == None and not sharedNeutral:
+            return
+        for inv in self.inventories:
+            if owned != None:
+                inv.ants = [self.ownPiece(ant, owned, 'ant') for ant in inv.ants]
+            if owned != None or inv is self.inventories[NEUTRAL]:
+                inv.constrs = [self.ownPiece(constr, owned, 'constr') for constr in inv.constrs]
+        self._owned = None
+        self._sharedNeutral = False
+
+    ##
+    #ownPiece
+    #Description: Returns an ant or construction of this state that no other
+    #   state has (a copy, put on this state's board, if it is shared)
+    #
+    #Parameters:
+    #   piece - the Ant or Construction
+    #   owned - the ids of the pieces this state owns, or None if it owns
+    #       none of the ones ownPieces copies (set)
+    #   cellName - the Location attribute the piece is in: 'ant' or 'constr'
+    ##
+    def ownPiece(self, piece, owned, cellName):
+        if owned != None and id(piece) in owned:
+            return piece
+        copy = piece.clone()
+        if self.hasBoard() and piece.coords != None:
+            loc = self._board[piece.coords[0]][piece.coords[1]]
+            if getattr(loc, cellName) is piece:
+                setattr(loc, cellName, copy)
+        return copy
+
     ##
     #clearConstrs
     #Description: Clears the board of all constructions (so Player Two doesn't see Player One's setup)
     #
     ##
     def clearConstrs(self):
+        self.forgetHash()
         for col in self.board:
             for loc in col:
                 loc.constr = None
@@ -130,9 +306,12 @@ class GameState(object):
     ##
     #fastclone
     #
-    #Description: Returns a deep copy of itself *without* a board (which is set
-    # to None).  Omitting the board makes the clone run much faster and, if
-    # necessary, the board can be reconstructed from the inventories.
+    #Description: Returns a deep copy of itself *without* a board of its own.
+    # Omitting the board makes the clone run much faster; if the board is
+    # read, it is reconstructed from the inventories (see getLazyBoard).
+    # Neutral constructions (grass and food) never change once the game is
+    # set up, so the clone shares them with this state instead of copying
+    # them (flipBoard copies them before it moves them, in either state).
     #
     #Return: a GameState object _almost_ identical to the original
     ##
@@ -164,7 +343,7 @@ class GameState(object):
             cons2[conIndex2] = constr.clone()
             conIndex2 += 1
         for constr in self.inventories[NEUTRAL].constrs:
-            cons3[conIndex3] = constr.clone()
+            cons3[conIndex3] = constr
             conIndex3 += 1
 
         #clone the list of inventory objects
@@ -174,4 +353,34 @@ class GameState(object):
                            Inventory(PLAYER_TWO, ants2, cons2, food2),
                            Inventory(NEUTRAL, [], cons3, 0) ]
         
-        return GameState(newBoard, newInventories, self.phase, self.whoseTurn)
+        result = GameState(newBoard, newInventories, self.phase, self.whoseTurn)
+        #(copied by ownPieces before either state moves them)
+        self._sharedNeutral = True
+        result._sharedNeutral = True
+        return result
+
+    ##
+    #lightclone
+    #
+    #Description: Returns a copy of itself, without a board of its own, that
+    # shares its ants, constructions and inventory lists with this state.
+    # Only the three Inventory objects are new, so the copy is much cheaper
+    # than fastclone.  From then on GameRules copies an ant, construction or
+    # list the first time it changes it in either state (see
+    # GameRules.ownItem), so moves made in one state are not seen in the
+    # other.  Both states must only be changed through GameRules.
+    #
+    #Return: a GameState object _almost_ identical to the original
+    ##
+    def lightclone(self):
+        newInventories = [ Inventory(inv.player, inv.ants, inv.constrs, inv.foodCount)
+                           for inv in self.inventories ]
+        result = GameState(None, newInventories, self.phase, self.whoseTurn)
+        result._hash = self.__dict__.get('_hash')
+        index = self.__dict__.get('_occupancy')
+        if index != None and index.key == occupancyKey(newInventories):
+            result._occupancy = index.copy()
+        #neither state owns anything the other can see
+        self._owned = set()
+        result._owned = set()
+        return result
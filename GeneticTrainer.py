@@ -0,0 +1,279 @@
+import os, sys, time, random, pickle, argparse, multiprocessing
+from Constants import *
+from Player import PlayerWrapper
+from HeadlessGame import HeadlessGame, loadAIPlayer
+from Tournament import runWorkers, playOrForfeit
+
+##
+# GeneticTrainer.py
+#
+# Evolves the placement genes of a genetic algorithm AI (gene.py,
+# genetic_algorithm.py, rowland17_larsonma16_gene.py) without the user
+# interface.  Played in a normal tournament, such an AI scores one gene per
+# game (or per gamesToEval games) in registerWin, so a generation takes a
+# whole tournament.  Here every gene of a generation is scored at once on a
+# set of worker processes (see Tournament.runWorkers): each worker loads the
+# AI and the opponents once, and scores a gene by playing it numGames times
+# against every opponent (the AI moving first) and asking the AI for the
+# gene's fitness.  A gene whose worker dies is played again by a new one.
+# The next generation is bred with the AI's own genNextGenes.
+#
+# A gene that has already been scored (in this generation or an earlier
+# one) is not played again; its fitness is kept in a cache.  After every
+# generation the population and the cache are written to the checkpoint
+# file, and a run started with --resume carries on from it.
+#
+#   Usage:  python GeneticTrainer.py <AI> [--opponents AI ...] [--games N] [--generations G]
+#               [--population P] [--processes P] [--seed S] [--checkpoint FILE] [--resume]
+#
+# The AI must have the useGene, scoreGame and geneFitness methods and the
+# population, fitnessList, popSize and nextGen variables that the genetic
+# AIs share.
+#
+
+#the default file the populations are written to
+CHECKPOINT_FILE = "genes.p"
+
+#The AI and game used by this worker process (see initWorker)
+workerPlayer = None
+workerGame = None
+
+##
+#GenePlayer
+#Description: Wraps a genetic AI so that the games it plays only add to its
+#   gene's score (registerWin would also move on to the next gene and breed)
+#
+#Variables:
+#   player - the genetic AI (AIPlayer)
+##
+class GenePlayer(PlayerWrapper):
+
+    def registerWin(self, hasWon):
+        self.player.scoreGame(hasWon)
+
+
+##
+#initWorker
+#Description: Loads the genetic AI and its opponents into a worker process
+#
+#Parameters:
+#   aiName - the genetic AI (string)
+#   opponentNames - the AIs it plays (string[])
+##
+def initWorker(aiName, opponentNames):
+    global workerPlayer, workerGame
+    workerPlayer = loadAIPlayer(aiName)
+    workerGame = HeadlessGame([GenePlayer(workerPlayer)] +
+                              [loadAIPlayer(name) for name in opponentNames])
+
+##
+#scoreGene
+#Description: Plays a gene against every opponent in a worker process.  An
+#   AI that raises an exception forfeits the game (see
+#   Tournament.playOrForfeit), which counts towards the gene's score.
+#
+#Parameters:
+#   task - a tuple of (gene, numGames, seed)
+#
+#Return: a tuple of (gene, fitness)
+##
+def scoreGene(task):
+    gene, numGames, seed = task
+    if seed != None:
+        random.seed(seed)
+    game = workerGame
+    numOpponents = len(game.players) - 1
+    workerPlayer.useGene(list(gene), numGames * numOpponents)
+    for opponent in range(1, numOpponents + 1):
+        for i in range(0, numGames):
+            playOrForfeit(game, 0, opponent)
+    return (gene, workerPlayer.geneFitness())
+
+##
+#scorePopulation
+#Description: Scores the genes of a population that aren't in the cache
+#   across a set of processes
+#
+#Parameters:
+#   aiName, opponentNames - see initWorker
+#   population - the genes (int[][])
+#   cache - the fitness of each gene scored so far, by tuple(gene); the new
+#       scores are added to it (dict)
+#   numGames - how many games to play against each opponent (int)
+#   numProcesses - how many worker processes to use (int)
+#   seed - used to derive a seed for each gene, or None (int)
+#
+#Return: the fitness of each gene in the population (int[])
+##
+def scorePopulation(aiName, opponentNames, population, cache, numGames, numProcesses, seed=None):
+    genes = []
+    for gene in population:
+        if tuple(gene) not in cache and tuple(gene) not in genes:
+            genes.append(tuple(gene))
+
+    tasks = []
+    for i in range(0, len(genes)):
+        geneSeed = None
+        if seed != None:
+            geneSeed = seed + len(cache) + i
+        tasks.append((genes[i], numGames, geneSeed))
+
+    #adds a gene's fitness to the cache as it comes in
+    def addResult(task, result):
+        gene, fitness = result
+        cache[gene] = fitness
+
+    runWorkers(tasks, numProcesses, initWorker, (aiName, opponentNames), scoreGene, addResult)
+    return [cache[tuple(gene)] for gene in population]
+
+##
+#breed
+#Description: Makes the next generation with the genetic AI's own
+#   selection and crossover (genNextGenes)
+#
+#Parameters:
+#   player - the genetic AI (AIPlayer)
+#   population - the genes (int[][])
+#   fitness - the fitness of each gene (int[])
+#
+#Return: the next generation, the same size as the population (int[][])
+##
+def breed(player, population, fitness):
+    player.popSize = len(population)
+    player.population = [list(gene) for gene in population]
+    player.fitnessList = list(fitness)
+    player.genNextGenes()
+    nextGen = [list(gene) for gene in player.nextGen]
+    #genNextGenes makes pairs of children: an odd population keeps its best
+    ranked = sorted(range(0, len(population)), key=lambda i: -fitness[i])
+    for i in ranked[:len(population) - len(nextGen)]:
+        nextGen.append(list(population[i]))
+    return nextGen
+
+##
+#firstPopulation
+#Description: Makes a random population with the genetic AI's
+#   initPopulation
+#
+#Return: the genes (int[][])
+##
+def firstPopulation(player, popSize):
+    player.popSize = popSize
+    player.population = []
+    player.fitnessList = []
+    player.initPopulation()
+    return [list(gene) for gene in player.population]
+
+##
+#saveCheckpoint
+#Description: Writes a run's progress to a file
+#
+#Parameters:
+#   path - the file (string)
+#   checkpoint - a dict with the aiName, opponentNames, generation (the
+#       number of the population), population and cache of the run
+##
+def saveCheckpoint(path, checkpoint):
+    #written to another file first so a run stopped part way through
+    #doesn't leave half a checkpoint
+    with open(path + ".tmp", 'wb') as file:
+        pickle.dump(checkpoint, file, 2)
+    os.rename(path + ".tmp", path)
+
+##
+#loadCheckpoint
+#Description: Reads a checkpoint written by saveCheckpoint
+##
+def loadCheckpoint(path):
+    with open(path, 'rb') as file:
+        return pickle.load(file)
+
+##
+#evolve
+#Description: Runs the genetic algorithm for a number of generations
+#
+#Parameters:
+#   aiName - the genetic AI (string)
+#   opponentNames - the AIs each gene plays (string[])
+#   numGenerations - how many generations to score (int)
+#   popSize - the size of the population (int)
+#   numGames - how many games each gene plays against each opponent (int)
+#   numProcesses - how many worker processes to use; defaults to one per
+#       core (int)
+#   seed - makes the run repeatable, or None (int)
+#   checkpointPath - the file to write the progress to, or None (string)
+#   checkpoint - a checkpoint to carry on from, or None (dict)
+#   verbose - print each generation's scores (boolean)
+#
+#Return: the last checkpoint (dict), whose 'best' is the (fitness, gene)
+#   of the best gene scored
+##
+def evolve(aiName, opponentNames, numGenerations, popSize=20, numGames=1, numProcesses=None,
+           seed=None, checkpointPath=None, checkpoint=None, verbose=False):
+    if numProcesses == None:
+        numProcesses = multiprocessing.cpu_count()
+    if seed != None:
+        random.seed(seed)
+    player = loadAIPlayer(aiName)
+    if checkpoint == None:
+        checkpoint = {'aiName': aiName, 'opponentNames': list(opponentNames), 'generation': 0,
+                      'population': firstPopulation(player, popSize), 'cache': {}, 'best': None}
+
+    for i in range(0, numGenerations):
+        startTime = time.time()
+        cached = len(checkpoint['cache'])
+        population = checkpoint['population']
+        fitness = scorePopulation(aiName, opponentNames, population, checkpoint['cache'], numGames,
+                                  numProcesses, seed)
+        best = max(range(0, len(population)), key=lambda index: fitness[index])
+        if checkpoint['best'] == None or fitness[best] > checkpoint['best'][0]:
+            checkpoint['best'] = (fitness[best], list(population[best]))
+        if verbose:
+            print("generation " + str(checkpoint['generation']) + ": best " + str(fitness[best]) +
+                  ", mean " + ("%.1f" % (float(sum(fitness)) / len(fitness))) + ", " +
+                  str(len(checkpoint['cache']) - cached) + " genes played in " +
+                  ("%.2f" % (time.time() - startTime)) + " seconds")
+
+        #saved before breeding too, so the games aren't lost if it fails
+        if checkpointPath != None:
+            saveCheckpoint(checkpointPath, checkpoint)
+        checkpoint['population'] = breed(player, population, fitness)
+        checkpoint['generation'] += 1
+        if checkpointPath != None:
+            saveCheckpoint(checkpointPath, checkpoint)
+    return checkpoint
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Evolves the placement genes of a genetic algorithm AI.")
+    parser.add_argument("ai", help="the genetic AI (e.g., genetic_algorithm)")
+    parser.add_argument("--opponents", nargs="+", default=["Random"], help="the AIs each gene plays")
+    parser.add_argument("--games", type=int, default=1, help="games each gene plays against each opponent")
+    parser.add_argument("--generations", type=int, default=1, help="number of generations to run")
+    parser.add_argument("--population", type=int, default=20, help="number of genes in a generation")
+    parser.add_argument("--processes", type=int, default=None, help="number of worker processes (default: one per core)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for python's random module")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE, help="file to write the populations to")
+    parser.add_argument("--resume", action="store_true", help="carry on from the checkpoint file")
+    args = parser.parse_args()
+
+    #always run from the directory that contains the AI folder
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    checkpoint = None
+    aiName = args.ai
+    opponentNames = args.opponents
+    if args.resume:
+        checkpoint = loadCheckpoint(args.checkpoint)
+        aiName = checkpoint['aiName']
+        opponentNames = checkpoint['opponentNames']
+        print("resuming " + aiName + " at generation " + str(checkpoint['generation']))
+    for name in [aiName] + opponentNames:
+        if loadAIPlayer(name) == None:
+            print("ERROR:  AI '" + name + "' not found.")
+            sys.exit(1)
+
+    startTime = time.time()
+    checkpoint = evolve(aiName, opponentNames, args.generations, args.population, args.games,
+                        args.processes, args.seed, args.checkpoint, checkpoint, True)
+    print(str(args.generations) + " generations in " + ("%.2f" % (time.time() - startTime)) + " seconds")
+    print("best gene (fitness " + str(checkpoint['best'][0]) + "): " + str(checkpoint['best'][1]))
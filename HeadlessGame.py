@@ -0,0 +1,971 @@
+import os, re, sys, time, random, argparse
+import HumanPlayer
+from Construction import *
+from Constants import *
+from GameState import *
+from Inventory import *
+from Building import *
+from Location import *
+from Ant import *
+from Move import *
+from GameRules import applyMoveAnt, applyBuild, applyEndTurn, applyAttack
+from PlayerProcess import ProcessPlayer, PlayerTimeout
+
+##
+#HeadlessGame
+#Description: Runs games between AI players without a UserInterface.  The
+#   setup, move, attack and end-of-turn rules are the same ones that Game
+#   uses (Game is a subclass of this class) so a batch of headless games
+#   produces the same outcomes as a tournament for the same random seed.
+#
+#   Usage:  python HeadlessGame.py --p1 <AI> --p2 <AI> [--games N] [--seed S] [--timeout T] [--ponder]
+#               [--record FILE]
+#
+#   where <AI> is the module name of a file in the AI folder (e.g., Random)
+#   or the author name of its AIPlayer.
+#
+#   If recorder is set, it is told about every placement, move and attack
+#   of each game (see GameRecord.GameRecorder).
+##
+class HeadlessGame(object):
+
+    #told about each game as it is played, or None
+    recorder = None
+
+    #the AI module each player was loaded from, by id, to record with the
+    #games (authors aren't unique), or None
+    moduleNames = None
+
+    ##
+    #__init__
+    #Description: Creates a new HeadlessGame
+    #
+    #Parameters:
+    #   inputPlayers - the Players that will take part in the games (Player[])
+    ##
+    def __init__(self, inputPlayers):
+        #players are given ids by their position in the list, just like
+        #Game.submitClickedCallback does
+        self.players = []
+        for i in range(0, len(inputPlayers)):
+            inputPlayers[i].playerId = i
+            self.players.append([inputPlayers[i], ACTIVE])
+        self.playerScores = [[player[0].author, 0, 0] for player in self.players]
+        self.initGame()
+
+    ##
+    #initGame
+    #Description: resets the game's attributes to their starting state
+    #
+    ##
+    def initGame(self):
+        board = [[Location((col, row)) for row in range(0,BOARD_LENGTH)] for col in range(0,BOARD_LENGTH)]
+        p1Inventory = Inventory(PLAYER_ONE, [], [], 0)
+        p2Inventory = Inventory(PLAYER_TWO, [], [], 0)
+        neutralInventory = Inventory(NEUTRAL, [], [], 0)
+        self.state = GameState(board, [p1Inventory, p2Inventory, neutralInventory], MENU_PHASE, PLAYER_ONE)
+        self.currentPlayers = []
+        self.errorNotify = False
+        self.gameOver = False
+        self.winner = None
+        self.loser = None
+
+    ##
+    #notify
+    #Description: Shows a message to a human player.  There is nobody to
+    #   show it to in a headless game.  (Game overrides this.)
+    #
+    #Parameters:
+    #   msg - the message to show (string)
+    ##
+    def notify(self, msg):
+        pass
+
+    ##
+    #playGame
+    #Description: Plays a single game to completion
+    #
+    #Parameters:
+    #   playerOneId - id of the Player that goes first (int)
+    #   playerTwoId - id of the Player that goes second (int)
+    #
+    #Return: the id of the winning player
+    ##
+    def playGame(self, playerOneId, playerTwoId):
+        self.initGame()
+        self.currentPlayers = [self.players[playerOneId][0], self.players[playerTwoId][0]]
+        self.state.phase = SETUP_PHASE_1
+        if self.recorder != None:
+            modules = None
+            if self.moduleNames != None:
+                modules = [self.moduleNames[playerOneId], self.moduleNames[playerTwoId]]
+            self.recorder.startGame([player.author for player in self.currentPlayers], modules)
+        try:
+            self.runGame()
+        except PlayerTimeout:
+            #a player that takes too long forfeits
+            self.error(AI_TIMEOUT, sys.exc_info()[1])
+        except Exception:
+            #keep the record of a game an AI crashed in so it can be replayed
+            #(a crash in registerWin comes after the game is decided)
+            if self.recorder != None:
+                if self.gameOver:
+                    self.recorder.endGame(self.recordedWinner())
+                else:
+                    self.recorder.addError(AI_EXCEPTION)
+                    self.recorder.endGame(None)
+            raise
+        if self.recorder != None:
+            self.recorder.endGame(self.recordedWinner())
+
+        #adjust the wins and losses of players
+        self.playerScores[self.winner][1] += 1
+        self.playerScores[self.loser][2] += 1
+        return self.winner
+
+    ##
+    #recordedWinner
+    #Description: The winner of the finished game as a GameRecord gives it
+    #
+    #Return: 0 if the player that moved first won, otherwise 1
+    ##
+    def recordedWinner(self):
+        return 0 if self.winner == self.currentPlayers[0].playerId else 1
+
+    ##
+    #playGames
+    #Description: Plays a number of games between two players
+    #
+    #Parameters:
+    #   playerOneId - id of the Player that goes first (int)
+    #   playerTwoId - id of the Player that goes second (int)
+    #   numGames - how many games to play (int)
+    ##
+    def playGames(self, playerOneId, playerTwoId, numGames):
+        for i in range(0, numGames):
+            self.playGame(playerOneId, playerTwoId)
+
+    ##
+    # runGame
+    #
+    # Description: the main game loop.  This is Game.runGame without
+    # the human player and UI handling.
+    #
+    ##
+    def runGame(self):
+        #build a list of things to place for player 1 in setup phase 1
+        #1 anthill/queen, 1 tunnel/worker, 9 obstacles
+        constrsToPlace = setupConstructions(PLAYER_ONE)
+
+        while not self.gameOver:
+            #create a copy of the state to share with the player
+            theState = self.state.clone()
+            #if the player is player two, flip the board
+            if theState.whoseTurn == PLAYER_TWO:
+                theState.flipBoard()
+
+            currentPlayer = self.currentPlayers[self.state.whoseTurn]
+
+            if self.state.phase == SETUP_PHASE_1 or self.state.phase == SETUP_PHASE_2:
+                #hide the 1st player's set anthill and grass placement from the 2nd player
+                if theState.whoseTurn == PLAYER_TWO and self.state.phase == SETUP_PHASE_1:
+                    theState.clearConstrs()
+
+                #get the placement from the player
+                targets = []
+                targets += currentPlayer.getPlacement(theState)
+                #only want to place as many targets as constructions to place
+                if len(targets) > len(constrsToPlace):
+                    targets = targets[:len(constrsToPlace)]
+
+                if not self.isValidPlacement(constrsToPlace, targets):
+                    #cause current player to lose game because AIs aren't allowed to make mistakes.
+                    self.error(INVALID_PLACEMENT, targets)
+                    break
+
+                #translate coords to match player
+                targets = [self.state.coordLookup(target, self.state.whoseTurn) for target in targets]
+                if self.recorder != None:
+                    self.recorder.addPlacement(targets)
+                self.placeConstructions(constrsToPlace, targets)
+
+            elif self.state.phase == PLAY_PHASE:
+                move = currentPlayer.getMove(theState)
+
+                if move != None and move.coordList != None:
+                    for i in range(0,len(move.coordList)):
+                        #translate coords of move to match player
+                        move.coordList[i] = self.state.coordLookup(move.coordList[i], self.state.whoseTurn)
+
+                #AIs aren't allowed to make invalid moves
+                if not self.isValidMove(move):
+                    self.error(INVALID_MOVE, move)
+                    break
+
+                if self.recorder != None:
+                    self.recorder.addMove(move)
+                if move.moveType == MOVE_ANT:
+                    antToMove = self.moveAnt(move)
+                    #check and take action for attack
+                    self.resolveAttack(antToMove, currentPlayer)
+                elif move.moveType == BUILD:
+                    self.build(move)
+                elif move.moveType == END:
+                    self.endTurn()
+
+            #determine if if someone is a winner.
+            if self.hasWon(PLAYER_ONE):
+                self.setWinner(PLAYER_ONE)
+
+            elif self.hasWon(PLAYER_TWO):
+                self.setWinner(PLAYER_TWO)
+
+    ##
+    #placeConstructions
+    #Description: Puts constructions on the board during the setup phases.
+    #   Once the current player has placed all of theirs, the next
+    #   constructions to place are added to the list and the turn passes to
+    #   the other player (or the play phase starts, after the food).
+    #
+    #Parameters:
+    #   constrsToPlace - the constructions the current player has left to
+    #       place, in order; the placed ones are taken off (Construction[])
+    #   targets - where to put them, in board coordinates (list of tuples)
+    ##
+    def placeConstructions(self, constrsToPlace, targets):
+        for target in targets:
+            #get construction to place
+            constr = constrsToPlace.pop(0)
+            #give constr its coords
+            constr.coords = target
+            #put constr on board
+            self.state.board[target[0]][target[1]].constr = constr
+            if constr.type == ANTHILL or constr.type == TUNNEL:
+                #update the inventory
+                self.state.inventories[self.state.whoseTurn].constrs.append(constr)
+            else:  #grass and food
+                self.state.inventories[NEUTRAL].constrs.append(constr)
+
+        if not constrsToPlace:
+            if self.state.phase == SETUP_PHASE_1:
+                if self.state.whoseTurn == PLAYER_ONE:
+                    constrsToPlace += setupConstructions(PLAYER_TWO)
+                elif self.state.whoseTurn == PLAYER_TWO:
+                    constrsToPlace += [Construction(None, FOOD) for i in range(0,2)]
+                    self.state.phase = SETUP_PHASE_2
+            elif self.state.phase == SETUP_PHASE_2:
+                if self.state.whoseTurn == PLAYER_ONE:
+                    constrsToPlace += [Construction(None, FOOD) for i in range(0,2)]
+                elif self.state.whoseTurn == PLAYER_TWO:
+                    self.startPlayPhase()
+
+            #change player turn in state
+            self.state.whoseTurn = (self.state.whoseTurn + 1) % 2
+
+    ##
+    #startPlayPhase
+    #Description: Called once both players have finished placing their
+    #   constructions.  Adds the queens and workers and moves to the play phase.
+    #
+    ##
+    def startPlayPhase(self):
+        p1inventory = self.state.inventories[PLAYER_ONE]
+        p2inventory = self.state.inventories[PLAYER_TWO]
+        #get anthill coords
+        p1AnthillCoords = p1inventory.constrs[0].coords
+        p2AnthillCoords = p2inventory.constrs[0].coords
+        #get tunnel coords
+        p1TunnelCoords = p1inventory.constrs[1].coords
+        p2TunnelCoords = p2inventory.constrs[1].coords
+        #create queen and worker ants
+        p1Queen = Ant(p1AnthillCoords, QUEEN, PLAYER_ONE)
+        p2Queen = Ant(p2AnthillCoords, QUEEN, PLAYER_TWO)
+        p1Worker = Ant(p1TunnelCoords, WORKER, PLAYER_ONE)
+        p2Worker = Ant(p2TunnelCoords, WORKER, PLAYER_TWO)
+        #put ants on board
+        self.state.board[p1Queen.coords[0]][p1Queen.coords[1]].ant = p1Queen
+        self.state.board[p2Queen.coords[0]][p2Queen.coords[1]].ant = p2Queen
+        self.state.board[p1Worker.coords[0]][p1Worker.coords[1]].ant = p1Worker
+        self.state.board[p2Worker.coords[0]][p2Worker.coords[1]].ant = p2Worker
+        #add the queens to the inventories
+        p1inventory.ants.append(p1Queen)
+        p2inventory.ants.append(p2Queen)
+        p1inventory.ants.append(p1Worker)
+        p2inventory.ants.append(p2Worker)
+        #give the players the initial food
+        p1inventory.foodCount = 1
+        p2inventory.foodCount = 1
+        #change to play phase
+        self.state.phase = PLAY_PHASE
+
+    ##
+    #moveAnt
+    #Description: Moves an ant along a valid MOVE_ANT move
+    #
+    #Parameters:
+    #   move - a valid Move of type MOVE_ANT (Move)
+    #
+    #Return: the Ant that was moved
+    ##
+    def moveAnt(self, move):
+        return applyMoveAnt(self.state, move)
+
+    ##
+    #build
+    #Description: Carries out a valid BUILD move
+    #
+    #Parameters:
+    #   move - a valid Move of type BUILD (Move)
+    ##
+    def build(self, move):
+        applyBuild(self.state, move)
+
+    ##
+    #endTurn
+    #Description: takes care of end of turn business for ants and
+    #   constructions and then switches whose turn it is.
+    #
+    ##
+    def endTurn(self):
+        applyEndTurn(self.state)
+
+    ##
+    #resolveAttack
+    #Description: Checks a player wants to attack and takes appropriate action.
+    #
+    #Parameters:
+    #   attackingAnt - The Ant that has an available attack (Ant)
+    #   currentPlayer - The Player whose turn it currently is (Player)
+    ##
+    def resolveAttack(self, attackingAnt, currentPlayer):
+        #check if player wants to attack
+        validAttackCoords = []
+        opponentId = (self.state.whoseTurn + 1) % 2
+        for ant in self.state.inventories[opponentId].ants:
+            if self.isValidAttack(attackingAnt, ant.coords):
+                #keep track of valid attack coords (flipped for player two)
+                validAttackCoords.append(self.state.coordLookup(ant.coords, currentPlayer.playerId))
+        if validAttackCoords == []:
+            return
+
+        #Create a clone of the state to give to the player
+        theState = self.state.clone()
+        if theState.whoseTurn == PLAYER_TWO:
+            theState.flipBoard()
+
+        #get the attack from the player (flipped for player two)
+        attackCoord = self.state.coordLookup(currentPlayer.getAttack(theState, attackingAnt.clone(), validAttackCoords), currentPlayer.playerId)
+
+        #AIs aren't allowed to make invalid attacks
+        if not self.isValidAttack(attackingAnt, attackCoord):
+            self.error(INVALID_ATTACK, attackCoord)
+            return
+
+        if self.recorder != None:
+            self.recorder.addAttack(attackCoord)
+        #damage the attacked ant (and remove it if it dies)
+        applyAttack(self.state, attackingAnt, attackCoord)
+
+    
+    ##
+    #setWinner
+    #Description: Given a current player ID (0 or 1), sets that player to be the winner of the current game.
+    #
+    #Parameters:
+    #   id - the current player ID. (int)
+    ##
+    def setWinner(self, id):
+        self.gameOver = True
+        self.winner = self.currentPlayers[id].playerId
+        self.loser = self.currentPlayers[(id + 1) % 2].playerId
+         
+        #tell the players if they won or lost
+        self.currentPlayers[id].registerWin(True)
+        self.currentPlayers[(id + 1) % 2].registerWin(False)
+
+    ##
+    # errorReport
+    #
+    # Description:  Notifies the user of an invalid move.  For AI
+    # players, this takes the form of a message on the console.
+    #
+    # Parameters:
+    #   msg - the message to send
+    #
+    def errorReport(self, msg):
+        currentPlayer = self.currentPlayers[self.state.whoseTurn]
+        if type(currentPlayer) is HumanPlayer.HumanPlayer:
+            return
+        print (msg)
+        
+    ##
+    #isValidMove(Move)
+    #Description: Checks to see if the move is valid for the current player.
+    # 
+    #Parameters:
+    #   move - The Move to check (Move)
+    #
+    #Returns: None if no move is given, true if the given move is valid, or false if the given move is invalid
+    ##
+    def isValidMove(self, move):
+        #check for no move
+        if move == None:
+            self.errorReport("ERROR: Invalid Move: " + str(move))
+            return None
+        
+        #check that the move is well-formed typewise (tuples, ints, etc)
+        if type(move) != Move:
+            self.errorReport("ERROR: Invalid Move: " + str(move))
+            self.errorReport("ERROR:  player did not supply an object of type 'Move'")
+            return False
+        if type(move.moveType) != int:
+            self.errorReport("ERROR: Invalid Move: " + str(move))
+            self.errorReport("       Move type must be an integer.")
+            return False
+        #for END type moves, lots we don't need to check
+        if move.moveType == END:
+            return True
+        if move.coordList == None or type(move.coordList) != list or len(move.coordList) == 0:
+            self.errorReport("ERROR: Invalid Move: " + str(move))
+            self.errorReport("       The coordinate list is empty!")
+            return False
+        index = 0
+        for coord in move.coordList:
+            if (type(coord) != tuple):
+                self.errorReport("ERROR: Invalid Move: " + str(move))
+                self.errorReport("       Coordinate at index " + str(index) + " is not a tuple.")
+                return False
+            if (len(coord) != 2):
+                self.errorReport("ERROR: Invalid Move: " + str(move))
+                self.errorReport("       Coordinate at index " + str(index) + " has " + str(len(coord)) + "entries instead of 2.")
+                return False
+            if (type(coord[0]) != int) or (type(coord[1]) != int):
+                self.errorReport("ERROR: Invalid Move: " + str(move))
+                self.errorReport("       Coordinate at index " + str(index) + " contains a value that is not an int.")
+                return False
+            index += 1
+        if type(move.buildType) != type(None) and type(move.buildType) != int:
+            return False
+
+        #for MOVE_ANT and BUILD type moves
+        if move.moveType == MOVE_ANT:
+            firstCoord = move.coordList[0]
+            #check valid start location (good coords and ant ownership)
+            if self.checkMoveStart(firstCoord):
+                #get ant to move
+                antToMove = self.state.board[firstCoord[0]][firstCoord[1]].ant
+                movePoints = UNIT_STATS[antToMove.type][MOVEMENT]             
+                previousCoord = None
+
+                index = 0
+                for coord in move.coordList:
+                    #if first runthough, need to set up previous coord
+                    if previousCoord == None:
+                        previousCoord = coord
+                        continue  
+                    #if any to-coords are invalid, return invalid move
+                    if not self.checkMovePath(previousCoord, coord):
+                        self.errorReport("ERROR: Invalid Move: " + str(move))
+                        self.errorReport("       Illegal movement path at index" + str(index))
+                        return False
+                        
+                    #subtract cost of loc from movement points
+                    constrAtLoc = self.state.board[coord[0]][coord[1]].constr
+                    if constrAtLoc == None or antToMove.type == DRONE:
+                        movePoints -= 1
+                    else:
+                        movePoints -= CONSTR_STATS[constrAtLoc.type][MOVE_COST]
+                        
+                    previousCoord = coord
+                    index += 1
+                    
+                #Check for Queen ant trying to leave her territory
+                if (antToMove.type == QUEEN):
+                    for coord in move.coordList:
+                        if (coord[1] == BOARD_LENGTH / 2 - 1) \
+                        or (coord[1] == BOARD_LENGTH / 2):
+                            self.errorReport("ERROR: Invalid Move: " + str(move))
+                            self.errorReport("       Queen ant may not leave her own territory")
+                            return False
+                            
+                #within movement range and hasn't moved yet?
+                if (movePoints < 0):
+                    self.errorReport("ERROR: Invalid Move: " + str(move))
+                    self.errorReport("       Ant has insufficient movement points for this move")
+                    return False
+                if antToMove.hasMoved:
+                    self.errorReport("ERROR: Invalid Move: " + str(move))
+                    self.errorReport("       Ant has already made a move this turn")
+                    return False
+                else:
+                    return True
+                        
+        elif move.moveType == BUILD:
+            #coord list must contain one point for build
+            if len(move.coordList) != 1:
+                self.errorReport("ERROR: Invalid Move: " + str(move))
+                self.errorReport("       for a BUILD move, the coordinate list should contain exactly 1 coordinate")
+                return False
+        
+            buildCoord = move.coordList[0]
+            #check valid start location
+            if self.checkBuildStart(buildCoord):
+                #we're building either an ant or constr for sure
+               
+                if self.state.board[buildCoord[0]][buildCoord[1]].ant == None:
+                #we know we're building an ant
+                    buildCost = None
+                    #check buildType for valid ant
+                    if move.buildType == WORKER:
+                        buildCost = UNIT_STATS[WORKER][COST]
+                    elif move.buildType == DRONE:
+                        buildCost = UNIT_STATS[DRONE][COST]
+                    elif move.buildType == SOLDIER:
+                        buildCost = UNIT_STATS[SOLDIER][COST]
+                    elif move.buildType == R_SOLDIER:
+                        buildCost = UNIT_STATS[R_SOLDIER][COST]
+                    else:
+                        self.errorReport("ERROR: Invalid Move: " + str(move))
+                        self.errorReport("       the buildType must be one of:  WORKER, DRONE, SOLDIER or R_SOLDIER.")
+                        return False
+                    
+                    #check the player has enough food
+                    currFood = self.state.inventories[self.state.whoseTurn].foodCount
+                    if currFood >= buildCost:
+                        self.notify("")
+                        return True
+                    else:
+                        self.errorReport("ERROR: Invalid Move: " + str(move))
+                        self.errorReport("       Player has " + str(currFood) + " food but needs " + str(buildCost) + " to build this ant")
+                        self.notify("Requires " + str(buildCost) + " food.")
+                        self.errorNotify = True
+                        return False
+                else:
+                #we know we're building a construction
+                    adjacentCoords = []
+                    adjacentCoords.append(addCoords(buildCoord, (0, -1)))
+                    adjacentCoords.append(addCoords(buildCoord, (0, 1)))
+                    adjacentCoords.append(addCoords(buildCoord, (-1, 0)))
+                    adjacentCoords.append(addCoords(buildCoord, (1, 0)))
+                
+                    #check that there's no food in adjacent locations
+                    for aCoord in adjacentCoords:
+                        if aCoord[0] >= 0 and aCoord[0] < 10 and aCoord[1] >= 0 and aCoord[1] < 10:
+                            if (self.state.board[aCoord[0]][aCoord[1]].constr != None and
+                                    self.state.board[aCoord[0]][aCoord[1]].constr.type == FOOD):
+                                self.errorReport("ERROR: Invalid Move: " + str(move))
+                                self.errorReport("       Cannot tunnel build next to food.")
+                                self.notify("Cannot tunnel build next to food.")
+                                self.errorNotify = True
+                                return False
+                 
+                    buildCost = CONSTR_STATS[TUNNEL][BUILD_COST]
+                    if self.state.inventories[self.state.whoseTurn].foodCount >= buildCost:
+                        self.notify("")
+                        return True
+                    else:
+                        self.notify("Requires "+ str(buildCost) + " food.")
+                        self.errorNotify = True
+                        self.errorReport("ERROR: Invalid Move: " + str(move))
+                        self.errorReport("       Must have at least " + str(buildCost) + " food to build a tunnel.")
+                        return False
+            else:  #invalid build start
+                self.errorReport("ERROR: Invalid Move: " + str(move))
+                self.errorReport("       Build location invalid.  Possible cause:")
+                loc = self.state.board[buildCoord[0]][buildCoord[1]]
+                if loc.ant == None:  #building ant
+                    self.errorReport("         - Anthill does not belong to current player")
+                else:
+                    if (move.buildType != TUNNEL):
+                        self.errorReport("         - Anthill is already occupied")
+                    elif (loc.ant.hasMoved):
+                        self.errorReport("         - Worker ant has already moved this turn")
+                    else:
+                        self.errorReport("         - Worker ant does not belong to current player")
+        else:
+            #invalid numeric move type
+            return False
+            
+    ##
+    #isValidPlacement
+    #Description: Checks that the given placement of Constructions is valid
+    #
+    #Paramters:
+    #   items - The items to place (Construction[])
+    #   targets - A list of the coordinates to place the items at ((int,int)[])
+    #
+    #Returns None if no target is given, true if it is a valid placement, or false if it is an invalid placement
+    ##
+    def isValidPlacement(self, items, targets):
+        #check for well-formed input of targets (from players)
+        if type(targets) == type(None) or type(targets) != list:
+            return False
+         #If no target, return None (human vs ai caught by caller)
+        if len(targets) == 0:
+            return None
+        for coord in targets:
+            if not self.isValidCoord(coord):
+                return False
+
+        for i in range(0, len(targets)):
+            #Nobody can place in the center two rows of the board or on their opponents side
+                 
+            #check item type
+            if items[i].type == ANTHILL or items[i].type == TUNNEL or items[i].type == GRASS:
+                #check targets[i] is within proper boundaries y-wise
+                #must be on own side
+                if not self.isInHomeTerritory(targets[i]):
+                    return False
+            #check item type
+            elif items[i].type == FOOD:
+                #check targets[i] is within proper boundaries y-wise
+                #must be on opponent's side
+                if not self.isInEnemyTerritory(targets[i]):
+                    return False
+            else:
+                #I don't know what this type is.
+                return False
+            
+            #change target to access appropriate players locations
+            aTarget = self.state.coordLookup(targets[i], self.state.whoseTurn)
+            #make sure nothing is there yet
+            if not self.state.board[aTarget[0]][aTarget[1]].constr == None:
+                return False
+                    
+        return True
+      
+    ##
+    #isValidAttack
+    #Description: Determines whether the attack with the given parameters is valid
+    #   Attacking ant is assured to exist and belong to the player whose turn it is
+    #
+    #Parameters:
+    #   attackingAnt - The Ant that is attacking (Ant)
+    #   attackCoord - The coordinates of the Ant that is being attacked ((int,int))
+    #
+    #Returns: None if there is no attackCoord, true if valid attack, or false if invalid attack
+    ##  
+    def isValidAttack(self, attackingAnt, attackCoord):
+        if attackCoord == None:
+            return None
+        
+        #check for well-formed input from players
+        if not self.isValidCoord(attackCoord):
+            return False
+    
+        attackLoc = self.state.board[attackCoord[0]][attackCoord[1]]
+        
+        if attackLoc.ant == None or attackLoc.ant.player == attackingAnt.player:
+            return False
+        
+        #we know we have an enemy ant
+        range = UNIT_STATS[attackingAnt.type][RANGE]
+        diffX = abs(attackingAnt.coords[0] - attackCoord[0])
+        diffY = abs(attackingAnt.coords[1] - attackCoord[1])
+        
+        #pythagoras would be proud
+        if range ** 2 >= diffX ** 2 + diffY ** 2:
+            #return True if within range
+            return True
+        else:
+            return False
+   
+    ##
+    #isValidCoord
+    #Description: Retruns whether this coord represents a valid board location. 
+    #
+    #Parameters:
+    #   coord - The coord to be checked trying to be checked ((int, int))
+    #
+    #Returns: True if the coordinate is between (0,0) and (9,9)
+    ##
+    def isValidCoord(self, coord):
+        #check for well-formed coord
+        if type(coord) != tuple or len(coord) != 2 or type(coord[0]) != int or type(coord[1]) != int:
+            return False
+        
+        #check boundaries
+        if coord[0] < 0 or coord[1] < 0 or coord[0] >= BOARD_LENGTH or coord[1] >= BOARD_LENGTH:
+            return False
+            
+        return True
+   
+    ##
+    # isInHomeTerritory
+    #
+    # Description: determines whether the position is in the player's
+    # home territory
+    #
+    # Parameters:
+    #   coord - The coord to be checked trying to be checked ((int, int))
+    #
+    # Returns: True if it is and False otherwise
+    #
+    ##
+    def isInHomeTerritory(self, coord):
+        if not self.isValidCoord(coord):
+            return False
+        if not (coord[1] >= 0 and coord[1] < BOARD_LENGTH / 2 - 1):
+            return False
+        return True
+
+    ##
+    # isInEnemyTerritory
+    #
+    # Description: determines whether the position is in the player's
+    # enemy's territory
+    #
+    # Parameters:
+    #   coord - The coord to be checked trying to be checked ((int, int))
+    #
+    # Returns: True if it is and False otherwise
+    #
+    ##
+    def isInEnemyTerritory(self, coord):
+        if not self.isValidCoord(coord):
+            return False
+        if not (coord[1] < BOARD_LENGTH and coord[1] >= BOARD_LENGTH / 2 + 1):
+            return False
+        return True
+
+    ##
+    #checkMoveStart 
+    #Description: Checks if the location is valid to move from.
+    #  (bounds and ant ownership)
+    #
+    #Parameters:
+    #   coord - The starting point for the move ((int, int))
+    #
+    #Returns: True if it is a valid starting point for a move and false if not
+    ##
+    def checkMoveStart(self, coord):
+        #check location is on board
+        if self.isValidCoord(coord):
+            antToMove = self.state.board[coord[0]][coord[1]].ant
+            #check that an ant exists at the loc
+            if antToMove != None:
+                #check that it's the player's ant and that it hasn't moved
+                if antToMove.player == self.state.whoseTurn and not antToMove.hasMoved:
+                    return True
+                                      
+        return False
+
+    ##
+    #checkMovePath
+    #Description: Checks if the location is valid to move to.
+    #  (clear path, adjacent locations) 
+    #
+    #Parameters:
+    #   fromCoord - The Ant's current coordinate ((int, int))
+    #   toCoord - The coorinate to move the Ant to ((int, int))
+    #
+    #Returns: True if it is a valid move and false otherwise
+    #
+    #Note: fromCoord must always have been checked by the time it's passed
+    #  (either in checkMoveStart or previous checkMovePath call)
+    ##
+    def checkMovePath(self, fromCoord, toCoord):
+        #check location is on board
+        if self.isValidCoord(toCoord):
+            #check that squares are adjacent (difference on only one axis is 1)
+            if ((abs(fromCoord[0] - toCoord[0]) == 1 and abs(fromCoord[1] - toCoord[1]) == 0) or
+                    (abs(fromCoord[0] - toCoord[0]) == 0 and abs(fromCoord[1] - toCoord[1]) == 1)):
+                antAtLoc = self.state.board[toCoord[0]][toCoord[1]].ant
+                #check if an ant exists at the loc
+                if antAtLoc ==  None:
+                    return True
+                    
+        return False
+
+    ##
+    #checkBuildStart 
+    #Description: Checks if the location is valid to build from.
+    #  (bounds and building ownership)
+    #
+    #Parameters:
+    #   coord - The coordinate trying to be used to build ((int, int))
+    #
+    #Returns: True if it is a valid build location and false otherwise
+    ##    
+    def checkBuildStart(self, coord):
+        #check location is on board
+        if self.isValidCoord(coord):
+            loc = self.state.board[coord[0]][coord[1]]
+            #check that an empty anthill exists at the loc
+            if loc.constr != None and loc.constr.type == ANTHILL and loc.ant == None:
+                #check that it's the player's anthill
+                if loc.constr.player == self.state.whoseTurn:
+                    return True
+            #check that an ant exists at an empty location
+            elif loc.ant != None and loc.ant.type == WORKER and loc.constr == None:       
+                #check that it's the player's ant and it hasn't moved
+                if loc.ant.player == self.state.whoseTurn and not loc.ant.hasMoved:
+                    return True
+                    
+        return False
+
+    ##
+    #hasWon(int)
+    #Description: Determines whether the game has ended in victory for the given player.
+    #
+    #Parameters:
+    #   playerId - The ID of the player being checked for winning (int)
+    #   
+    #Returns: True if the player with playerId has won the game.
+    ##
+    def hasWon(self, playerId):
+        opponentId = (playerId + 1) % 2
+        
+        if ((self.state.phase == PLAY_PHASE) and 
+        ((self.state.inventories[opponentId].getQueen() == None) or
+        (self.state.inventories[opponentId].getAnthill().captureHealth <= 0) or
+        (self.state.inventories[playerId].foodCount >= FOOD_GOAL) or
+        (self.state.inventories[opponentId].foodCount == 0 and 
+            len(self.state.inventories[opponentId].ants) == 1))):
+            return True
+        else:
+            return False
+
+    ##
+    #error
+    #Description: Called when an AI player makes an error. Gives a description
+    #    of what went wrong and exits the program.
+    #
+    #Parameters:
+    #   errorCode - A code indicating the type of error
+    #        info - the offending object that caused the error
+    ##
+    def error(self, errorCode, info):
+        errorMsg = "AI ERROR: "
+
+        if errorCode == INVALID_PLACEMENT:
+            #info is a coord list
+            errorMsg += "invalid placement\nCoords given: "
+            lastCoord = info.pop()
+            for coord in info:
+                errorMsg += "(" + str(coord[0]) + ", " + str(coord[1]) + "), "
+            errorMsg += "(" + str(lastCoord[0]) + ", " + str(lastCoord[1]) + ")"
+
+        elif errorCode == INVALID_MOVE:
+            #info is a move
+            errorMsg += "invalid move: " + str(info) + "\n"
+            if info == None:
+                errorMsg += "Move is non-move type: None"
+            elif type(info) != Move:
+                errorMsg += "Move is non-move type: " + str(type(info))
+            elif info.moveType == None:
+                errorMsg += "moveType is non-int type: None"
+            elif type(info.moveType) != int:
+                errorMsg += "moveType is non-int type: " + str(type(info.moveType))
+            elif info.moveType < MOVE_ANT or info.moveType > END:
+                errorMsg += "moveType not a recognized value: " + str(info.moveType)
+            elif info.moveType == MOVE_ANT:
+                pass
+
+        elif errorCode == AI_TIMEOUT:
+            #info is a PlayerTimeout
+            errorMsg += str(info)
+
+        else: #INVALID_ATTACK
+            #info is a coord          
+            errorMsg += "invalid attack\n"
+            errorMsg += "(" + str(info[0]) + ", " + str(info[1]) + ")"
+    
+        print (errorMsg)
+        if self.recorder != None:
+            self.recorder.addError(errorCode)
+        self.setWinner((self.state.whoseTurn + 1) % 2)
+
+##
+#setupConstructions
+#Description: The constructions a player places in setup phase 1: their
+#   anthill (where the queen starts), tunnel (where the worker starts) and 9
+#   grass obstacles
+#
+#Return: the constructions, in the order they are placed (Construction[])
+##
+def setupConstructions(playerId):
+    constrs = [Building(None, ANTHILL, playerId), Building(None, TUNNEL, playerId)]
+    constrs += [Construction(None, GRASS) for i in range(0,9)]
+    return constrs
+
+##
+#loadAIPlayer
+#Description: Loads an AIPlayer from the AI subdirectory.  Like
+#   Game.loadAIs, the module is imported (and the player created) from
+#   inside the AI folder so that AIs that load files at startup find them.
+#
+#Parameters:
+#   name - the module name of the AI (e.g., "Random") or the author name
+#       of an already loaded AIPlayer (string)
+#
+#Return: a new instance of the AIPlayer or None if it could not be found
+##
+def loadAIPlayer(name):
+    if name.endswith(".py"):
+        name = name[:-3]
+    moduleNames = [file[:-3] for file in os.listdir("AI") if re.match(".*\.py$", file)]
+    os.chdir('AI')
+    sys.path.insert(0, os.getcwd())
+    try:
+        if name in moduleNames:
+            return __import__(name, globals(), locals(), []).AIPlayer(-1)
+        #fall back to searching by author name
+        for moduleName in moduleNames:
+            try:
+                player = __import__(moduleName, globals(), locals(), []).AIPlayer(-1)
+            except Exception:
+                #skip AIs that can't be loaded by this python
+                continue
+            if player.author == name:
+                return player
+        return None
+    finally:
+        sys.path.pop(0)
+        os.chdir('..')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Plays AI vs. AI games without the user interface.")
+    parser.add_argument("--p1", required=True, help="the AI that moves first")
+    parser.add_argument("--p2", required=True, help="the AI that moves second")
+    parser.add_argument("--games", type=int, default=1, help="number of games to play")
+    parser.add_argument("--seed", type=int, default=None, help="seed for python's random module")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="run each AI in its own process and forfeit any move that takes longer than this many seconds")
+    parser.add_argument("--ponder", action="store_true",
+                        help="run each AI in its own process and let it think while the other AI moves")
+    parser.add_argument("--record", default=None, help="add a record of every game to this file (see GameRecord)")
+    args = parser.parse_args()
+
+    #always run from the directory that contains the AI folder
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    players = []
+    for name in (args.p1, args.p2):
+        player = loadAIPlayer(name)
+        if player == None:
+            print("ERROR:  AI '" + name + "' not found.")
+            sys.exit(1)
+        if args.timeout != None or args.ponder:
+            player = ProcessPlayer(name, timeLimit=args.timeout or AI_MOVE_TIMEOUT, ponder=args.ponder)
+        players.append(player)
+
+    if args.seed != None:
+        random.seed(args.seed)
+        for i in range(0, len(players)):
+            if isinstance(players[i], ProcessPlayer):
+                players[i].seed(args.seed + i)
+
+    game = HeadlessGame(players)
+    if args.record != None:
+        from GameRecord import GameRecorder
+        game.recorder = GameRecorder(args.record)
+        game.moduleNames = [args.p1, args.p2]
+    startTime = time.time()
+    game.playGames(PLAYER_ONE, PLAYER_TWO, args.games)
+    elapsed = time.time() - startTime
+
+    for score in game.playerScores:
+        print(score[0] + ": " + str(score[1]) + " wins, " + str(score[2]) + " losses")
+    print(str(args.games) + " games in " + ("%.2f" % elapsed) + " seconds (" +
+          ("%.1f" % (args.games / max(elapsed, 1e-9))) + " games/sec)")
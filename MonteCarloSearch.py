@@ -0,0 +1,499 @@
+import math, random, time
+from Constants import *
+from Ant import UNIT_STATS
+from Move import Move
+from AIPlayerUtils import listAllLegalMoves, ADJACENT_CELLS
+from GameRules import getNextState, carryOutMove, listAttackTargets, applyBuild, \
+    applyEndTurn, getWinner
+from Occupancy import tupleCoords
+from TurnGenerator import listMoveAttacks
+
+##
+# MonteCarloSearch.py
+#
+# A Monte Carlo tree search (UCT) that any AI can use:
+#
+#    self.searcher = MonteCarloSearch(timeLimit=1)
+#    ...
+#    return self.searcher.search(currentState)
+#
+# Each playout walks down the tree picking the child with the best UCT score,
+# adds one new child, plays the game on from there with a cheap rollout
+# policy for a turn each, and passes the result back up the tree.  Every move
+# (END included) is one level of the tree, with one child per target for a
+# move whose ant can attack more than one enemy.  The search returns the most
+# visited move at the root; its target is kept in bestAttack for getAttack.
+#
+# Tree states are made with GameRules.getNextState(share=True), so a new node
+# only copies what its move changes.  A rollout copies its starting state
+# once with fastclone and then plays every move on that copy with the
+# GameRules functions.  The rollout policy builds workers and fighters at
+# the anthill, sends workers between food and home, sends fighters at the
+# nearest enemy ant (then the queen, then the anthill) and otherwise leaves
+# ants where they are.  A rollout that doesn't end the game is scored with
+# an estimate of each player's chance of winning.
+#
+# The tree is kept between searches: when the next search starts from a
+# state in the old tree (found by its Zobrist hash), that part of the tree is
+# used again.  Between searches, ponder can carry on making playouts below
+# the move the last search picked (through the opponent's likely replies,
+# once the turn is over) so the next search starts with a bigger tree.
+#
+
+#the default most time (seconds) a search may take
+MCTS_TIME_LIMIT = 1.0
+
+#how much UCT favours trying moves that have had few playouts
+UCT_CONSTANT = 0.7
+
+#the number of turns (END moves) a rollout plays before it is scored (longer
+#rollouts cost more playouts than they are worth)
+ROLLOUT_TURNS = 2
+
+#the chance a rollout ant takes a random step instead of the best one
+RANDOM_STEP_CHANCE = 0.1
+
+#the chance a rollout spends spare food on a fighter
+BUILD_FIGHTER_CHANCE = 0.3
+
+#the most playouts ponder makes between two searches
+PONDER_PLAYOUTS = 20000
+
+##
+#MCTSNode
+#Description: A state in the search tree
+#
+#Variables:
+#   state - the state (shares unchanged pieces with its parent) (GameState)
+#   key - the state's hash (int)
+#   move - the Move that led here from the parent (or None for the root)
+#   attack - the coord the move's ant attacked, or None (tuple)
+#   mover - the player who made that move (int)
+#   parent - the parent MCTSNode, or None
+#   children - the MCTSNodes expanded so far (list)
+#   untried - the (move, attack) pairs not yet expanded, or None if they
+#       haven't been listed (list)
+#   visits - how many playouts have passed through this node (int)
+#   value - the total reward of those playouts for the mover (number)
+##
+class MCTSNode(object):
+
+    __slots__ = ('state', 'key', 'move', 'attack', 'mover', 'parent', 'children', 'untried',
+                 'visits', 'value')
+
+    def __init__(self, state, move=None, mover=None, parent=None, attack=None):
+        self.state = state
+        self.key = state.getHash()
+        self.move = move
+        self.attack = attack
+        self.mover = mover
+        self.parent = parent
+        self.children = []
+        self.untried = None
+        self.visits = 0
+        self.value = 0.0
+
+
+##
+#MonteCarloSearch
+#Description: A UCT Monte Carlo tree search
+#
+#Variables:
+#   timeLimit - the most time (seconds) a search may take (number)
+#   rolloutTurns - how many turns a rollout plays (int)
+#   evaluate - gives the chance of winning of a state (function)
+#   root - the root MCTSNode of the last search, or None
+#   ponderNode - the MCTSNode of the move the last search picked (where
+#       ponder makes its playouts), or None
+#   bestAttack - where the ant of the move the last search picked should
+#       attack, or None (tuple)
+#   playouts - how many playouts the last search made (int)
+#   reused - the playouts the last search's root inherited (int)
+#   pondered - how many playouts ponder has made since the last search (int)
+##
+class MonteCarloSearch(object):
+
+    ##
+    #__init__
+    #Description: Creates a new search
+    #
+    #Parameters:
+    #   timeLimit - the most time (seconds) a search may take (number)
+    #   rolloutTurns - how many turns a rollout plays before it is scored (int)
+    #   evaluate - evaluate(state, playerId) returns the player's chance of
+    #       winning (0 to 1); defaults to estimateWinChance
+    ##
+    def __init__(self, timeLimit=MCTS_TIME_LIMIT, rolloutTurns=ROLLOUT_TURNS, evaluate=None):
+        self.timeLimit = timeLimit
+        self.rolloutTurns = rolloutTurns
+        if evaluate == None:
+            evaluate = estimateWinChance
+        self.evaluate = evaluate
+        self.root = None
+        self.ponderNode = None
+        self.bestAttack = None
+        self.playouts = 0
+        self.reused = 0
+        self.pondered = 0
+
+    ##
+    #search
+    #Description: Finds the best move for the player whose turn it is
+    #
+    #Parameters:
+    #   currentState - the state to move from (not changed) (GameState)
+    #   timeLimit - the most time (seconds) to take, if not self.timeLimit
+    #
+    #Return: the best Move found
+    ##
+    def search(self, currentState, timeLimit=None):
+        if timeLimit == None:
+            timeLimit = self.timeLimit
+        deadline = time.time() + timeLimit
+
+        root = self.findNode(currentState.getHash())
+        if root == None:
+            root = MCTSNode(currentState.fastclone())
+        root.parent = None
+        self.root = root
+        self.reused = root.visits
+        self.playouts = 0
+
+        while True:
+            self.playout(root)
+            self.playouts += 1
+            if time.time() > deadline:
+                break
+
+        best = None
+        for child in root.children:
+            if best == None or child.visits > best.visits:
+                best = child
+        self.ponderNode = best
+        self.pondered = 0
+        if best == None:
+            self.bestAttack = None
+            return Move(END, None, None)
+        self.bestAttack = best.attack
+        return best.move
+
+    ##
+    #ponder
+    #Description: Makes playouts below the move the last search picked, to
+    #   be used by the next search (see Player.ponder)
+    #
+    #Parameters:
+    #   timeLimit - about how long (seconds) to spend (number)
+    #
+    #Return: True if there is more pondering to do
+    ##
+    def ponder(self, timeLimit):
+        node = self.ponderNode
+        if node == None or getWinner(node.state) != None or self.pondered >= PONDER_PLAYOUTS:
+            return False
+        deadline = time.time() + timeLimit
+        while self.pondered < PONDER_PLAYOUTS:
+            self.playout(node)
+            self.pondered += 1
+            if time.time() > deadline:
+                break
+        return True
+
+    ##
+    #findNode
+    #Description: Looks for a state in the tree kept from the last search
+    #
+    #Parameters:
+    #   key - the hash of the state (int)
+    #
+    #Return: the MCTSNode of the state or None
+    ##
+    def findNode(self, key):
+        if self.root == None:
+            return None
+        nodes = [self.root]
+        while len(nodes) > 0:
+            nextNodes = []
+            for node in nodes:
+                if node.key == key:
+                    return node
+                nextNodes.extend(node.children)
+            nodes = nextNodes
+        return None
+
+    ##
+    #reset
+    #Description: Throws away the tree (call when a game ends)
+    ##
+    def reset(self):
+        self.root = None
+        self.ponderNode = None
+
+    ##
+    #playout
+    #Description: Makes one playout: selection, expansion, rollout and
+    #   backing up the result
+    ##
+    def playout(self, root):
+        node = root
+        winner = getWinner(node.state)
+        #walk down the fully expanded part of the tree
+        while winner == None and node.untried != None and len(node.untried) == 0 \
+                and len(node.children) > 0:
+            node = self.selectChild(node)
+            winner = getWinner(node.state)
+
+        #add a child
+        if winner == None:
+            if node.untried == None:
+                node.untried = [(move, attack) for move in listAllLegalMoves(node.state, True)
+                                for attack in listMoveAttacks(node.state, move)]
+                random.shuffle(node.untried)
+            if len(node.untried) > 0:
+                move, attack = node.untried.pop()
+                child = MCTSNode(getNextState(node.state, move, attack, share=True), move,
+                                 node.state.whoseTurn, node, attack)
+                node.children.append(child)
+                node = child
+                winner = getWinner(node.state)
+
+        #play on and score the result for player one
+        if winner != None:
+            reward = 1.0 if winner == PLAYER_ONE else 0.0
+        else:
+            reward = self.rollout(node.state)
+
+        while node != None:
+            node.visits += 1
+            if node.mover == PLAYER_ONE:
+                node.value += reward
+            elif node.mover == PLAYER_TWO:
+                node.value += 1.0 - reward
+            node = node.parent
+
+    ##
+    #selectChild
+    #Description: Picks the child with the best UCT score
+    ##
+    def selectChild(self, node):
+        logVisits = math.log(node.visits)
+        best = None
+        bestScore = None
+        for child in node.children:
+            score = child.value / child.visits + UCT_CONSTANT * math.sqrt(logVisits / child.visits)
+            if best == None or score > bestScore:
+                best = child
+                bestScore = score
+        return best
+
+    ##
+    #rollout
+    #Description: Plays the game on from a state with the rollout policy
+    #
+    #Parameters:
+    #   state - the state to start from (not changed) (GameState)
+    #
+    #Return: player one's reward: 1 for a win, 0 for a loss, or its chance of
+    #   winning if the game hasn't ended
+    ##
+    def rollout(self, state):
+        state = state.fastclone()
+        for turn in range(0, self.rolloutTurns):
+            winner = playRolloutTurn(state)
+            if winner != None:
+                return 1.0 if winner == PLAYER_ONE else 0.0
+        return self.evaluate(state, PLAYER_ONE)
+
+
+##
+#playRolloutTurn
+#Description: Plays out the rest of the current player's turn with the
+#   rollout policy (see above), ending with END unless the game is won
+#
+#Parameters:
+#   state - the state to play on (changed) (GameState)
+#
+#Return: the winner or None if the game hasn't ended
+##
+def playRolloutTurn(state):
+    me = state.whoseTurn
+    myInv = state.inventories[me]
+
+    hillCoords = tupleCoords(myInv.getAnthill().coords)
+    if hillCoords not in state.getOccupancy().ants:
+        buildType = chooseRolloutBuild(myInv)
+        if buildType != None:
+            applyBuild(state, Move(BUILD, [hillCoords], buildType))
+
+    for ant in list(myInv.ants):
+        if ant.hasMoved:
+            continue
+        path = findRolloutPath(state, ant)
+        if path == None:
+            continue
+        carryOutMove(state, Move(MOVE_ANT, path, None), None, None)
+        winner = getWinner(state)
+        if winner != None:
+            return winner
+
+    applyEndTurn(state)
+    return getWinner(state)
+
+##
+#chooseRolloutBuild
+#Description: Decides what (if anything) a rollout builds at the anthill
+#
+#Return: the type of ant to build or None
+##
+def chooseRolloutBuild(inv):
+    food = inv.foodCount
+    workers = 0
+    for ant in inv.ants:
+        if ant.type == WORKER:
+            workers += 1
+    if workers < 2 and food >= UNIT_STATS[WORKER][COST]:
+        return WORKER
+    if food >= UNIT_STATS[SOLDIER][COST] and random.random() < BUILD_FIGHTER_CHANCE:
+        return random.choice((DRONE, SOLDIER))
+    return None
+
+##
+#findRolloutTarget
+#Description: Picks where a rollout ant heads for
+#
+#Return: the target coords or None if the ant should stay where it is
+##
+def findRolloutTarget(state, ant):
+    me = ant.player
+    coords = ant.coords
+    if ant.type == QUEEN:
+        return None
+    if ant.type == WORKER:
+        if ant.carrying:
+            places = [constr for constr in state.inventories[me].constrs
+                      if constr.type == ANTHILL or constr.type == TUNNEL]
+        else:
+            places = [constr for constr in state.inventories[NEUTRAL].constrs if constr.type == FOOD]
+        return findNearest(coords, places)
+
+    enemyInv = state.inventories[1 - me]
+    target = findNearest(coords, [enemy for enemy in enemyInv.ants if enemy.type != QUEEN])
+    if target == None:
+        target = findNearest(coords, [enemy for enemy in enemyInv.ants])
+    if target == None:
+        target = findNearest(coords, [enemyInv.getAnthill()])
+    return target
+
+##
+#findNearest
+#Description: Returns the coords of the nearest (by steps, ignoring what is
+#   in the way) of some ants or constructions, or None if there are none
+##
+def findNearest(coords, items):
+    best = None
+    bestDist = None
+    for item in items:
+        dist = abs(item.coords[0] - coords[0]) + abs(item.coords[1] - coords[1])
+        if best == None or dist < bestDist:
+            best = item.coords
+            bestDist = dist
+    return best
+
+##
+#findRolloutPath
+#Description: Builds a legal movement path for a rollout ant: a step at a
+#   time toward its target while each step gets closer and the ant has the
+#   movement points for it (with the odd random step).  A queen standing on
+#   her anthill steps off it.
+#
+#Return: the path (a list of coords) or None if the ant doesn't move
+##
+def findRolloutPath(state, ant):
+    start = tupleCoords(ant.coords)
+    index = state.getOccupancy()
+    antAt = index.ants
+    constrAt = index.constrs.get
+    target = findRolloutTarget(state, ant)
+    movement = UNIT_STATS[ant.type][MOVEMENT]
+    path = [start]
+    current = start
+    if target != None:
+        dist = abs(target[0] - start[0]) + abs(target[1] - start[1])
+
+    while True:
+        options = []
+        for cell in ADJACENT_CELLS[current]:
+            if cell in antAt or cell in path:
+                continue
+            if ant.type == QUEEN and (cell[1] == BOARD_LENGTH / 2 - 1 or cell[1] == BOARD_LENGTH / 2):
+                continue
+            constr = constrAt(cell)
+            cost = 1
+            if constr != None and ant.type != DRONE:
+                cost = constr.movementCost
+            if cost <= movement:
+                options.append((cell, cost))
+        if len(options) == 0:
+            break
+
+        if target == None:
+            #only a queen on her anthill moves without a target
+            if ant.type != QUEEN or len(path) > 1 or constrAt(start) == None or \
+                    constrAt(start).type != ANTHILL:
+                break
+            cell, cost = random.choice(options)
+        elif random.random() < RANDOM_STEP_CHANCE:
+            cell, cost = random.choice(options)
+        else:
+            cell, cost = None, None
+            for option in options:
+                optionDist = abs(target[0] - option[0][0]) + abs(target[1] - option[0][1])
+                if optionDist < dist:
+                    cell, cost = option
+                    dist = optionDist
+            if cell == None:
+                break
+        path.append(cell)
+        movement -= cost
+        current = cell
+        if target != None:
+            dist = abs(target[0] - cell[0]) + abs(target[1] - cell[1])
+
+    if len(path) == 1:
+        #an ant that stays put only "moves" (in place) to attack
+        if ant.type == WORKER or ant.type == QUEEN or len(listAttackTargets(state, ant)) == 0:
+            return None
+    return path
+
+##
+#estimateWinChance
+#Description: A rough chance of winning for a player in a game that hasn't
+#   ended, from each side's food, ants (by their cost) and the health of
+#   the queen and anthill
+#
+#Return: a number between 0 and 1
+##
+def estimateWinChance(state, playerId):
+    mine = scoreSide(state, playerId)
+    theirs = scoreSide(state, 1 - playerId)
+    return mine / (mine + theirs)
+
+##
+#scoreSide
+#Description: The strength of one player for estimateWinChance (always
+#   above 0)
+##
+def scoreSide(state, playerId):
+    inv = state.inventories[playerId]
+    score = 1.0 + 2 * inv.foodCount
+    for ant in inv.ants:
+        if ant.type == QUEEN:
+            score += ant.health
+        else:
+            score += UNIT_STATS[ant.type][COST]
+            if ant.carrying:
+                score += 1
+    anthill = inv.getAnthill()
+    if anthill != None:
+        score += anthill.captureHealth
+    return score
@@ -0,0 +1,281 @@
+import pickle
+import numpy as np
+from Constants import *
+from Ant import UNIT_STATS
+
+##
+# NeuralNetwork.py
+#
+# A feed-forward neural network with sigmoid units, kept as NumPy arrays, for
+# AIs that evaluate states with a network (like OLD-AI/neural_network.py,
+# which loops over every weight in Python).  A layer is worked out for a whole
+# batch of inputs with one matrix product, so a search can evaluate all of the
+# children of a state at once:
+#
+#    self.network = NeuralNetwork.load("AI/network.p")
+#    ...
+#    values = evaluateStates(self.network, childStates)
+#
+# train and trainBatch learn from many samples at a time (mini-batch back
+# propagation); NeuralTrainer.py trains a network from the states of
+# recorded games.  stateInputs turns a state into the inputs that
+# neural_network.py used, and loadOldWeights reads the weights it saved.
+#
+
+#the default learning rate (the gradient is averaged over each mini-batch)
+LEARNING_RATE = 0.5
+
+#the default number of samples in a mini-batch
+BATCH_SIZE = 32
+
+#the number of inputs stateInputs makes
+NUM_STATE_INPUTS = 8
+
+
+##
+#NeuralNetwork
+#Description: A feed-forward network of sigmoid units
+#
+#Variables:
+#   layerSizes - the number of units in each layer, inputs first (int[])
+#   weights - one (inputs x outputs) weight array per layer after the first
+#   biases - one bias array per layer after the first
+#   learningRate - how far each training step moves the weights (number)
+##
+class NeuralNetwork(object):
+
+    ##
+    #__init__
+    #Description: Creates a network with random weights between -1 and 1
+    #
+    #Parameters:
+    #   layerSizes - the number of units in each layer, inputs first and
+    #       outputs last, e.g. [8, 16, 1] (int[])
+    #   learningRate - see above (number)
+    #   seed - seeds the random weights, if not None (int)
+    ##
+    def __init__(self, layerSizes, learningRate=LEARNING_RATE, seed=None):
+        if len(layerSizes) < 2:
+            raise ValueError("a network needs an input and an output layer")
+        random = np.random.RandomState(seed)
+        self.layerSizes = list(layerSizes)
+        self.learningRate = learningRate
+        self.weights = []
+        self.biases = []
+        for i in range(1, len(layerSizes)):
+            self.weights.append(random.uniform(-1, 1, (layerSizes[i - 1], layerSizes[i])))
+            self.biases.append(random.uniform(-1, 1, layerSizes[i]))
+
+    ##
+    #forward
+    #Description: Runs a batch of inputs through the network
+    #
+    #Parameters:
+    #   inputs - one row of inputs per sample (2D array)
+    #
+    #Return: the outputs of every layer (the inputs first), one row per sample
+    #   (list of 2D arrays)
+    ##
+    def forward(self, inputs):
+        activations = [np.asarray(inputs, dtype=np.float64)]
+        for weights, biases in zip(self.weights, self.biases):
+            activations.append(sigmoid(activations[-1].dot(weights) + biases))
+        return activations
+
+    ##
+    #outputs
+    #Description: The network's outputs for a batch of inputs
+    #
+    #Parameters:
+    #   inputs - one row of inputs per sample (2D array)
+    #
+    #Return: one row of outputs per sample (2D array)
+    ##
+    def outputs(self, inputs):
+        result = np.asarray(inputs, dtype=np.float64)
+        for weights, biases in zip(self.weights, self.biases):
+            result = sigmoid(result.dot(weights) + biases)
+        return result
+
+    ##
+    #output
+    #Description: The network's output for one set of inputs
+    #
+    #Parameters:
+    #   inputs - the inputs (list or 1D array)
+    #
+    #Return: the output (float), or the outputs (1D array) if the network
+    #   has more than one
+    ##
+    def output(self, inputs):
+        result = self.outputs(np.asarray(inputs, dtype=np.float64).reshape(1, -1))[0]
+        if len(result) == 1:
+            return float(result[0])
+        return result
+
+    ##
+    #trainBatch
+    #Description: Takes one back propagation step on a batch of samples,
+    #   moving the weights down the gradient of the squared error averaged
+    #   over the batch
+    #
+    #Parameters:
+    #   inputs - one row of inputs per sample (2D array)
+    #   targets - one row of target outputs per sample (2D array)
+    #
+    #Return: the mean squared error of the batch before the step (float)
+    ##
+    def trainBatch(self, inputs, targets):
+        activations = self.forward(inputs)
+        targets = np.asarray(targets, dtype=np.float64).reshape(activations[-1].shape)
+        error = targets - activations[-1]
+        count = len(error)
+        #each unit's error times the slope of its sigmoid, last layer first
+        gamma = error * activations[-1] * (1 - activations[-1])
+        for layer in range(len(self.weights) - 1, -1, -1):
+            below = activations[layer]
+            nextGamma = None
+            if layer > 0:
+                nextGamma = gamma.dot(self.weights[layer].T) * below * (1 - below)
+            self.weights[layer] += self.learningRate * below.T.dot(gamma) / count
+            self.biases[layer] += self.learningRate * gamma.sum(axis=0) / count
+            gamma = nextGamma
+        return float(np.mean(error ** 2))
+
+    ##
+    #train
+    #Description: Trains the network on a set of samples
+    #
+    #Parameters:
+    #   inputs - one row of inputs per sample (2D array)
+    #   targets - one row of target outputs per sample (2D array)
+    #   epochs - how many times to go through the samples (int)
+    #   batchSize - the number of samples in each step (int)
+    #   seed - seeds the order the samples are shuffled into, if not None (int)
+    #
+    #Return: the mean squared error over the last epoch (float)
+    ##
+    def train(self, inputs, targets, epochs=1, batchSize=BATCH_SIZE, seed=None):
+        inputs = np.asarray(inputs, dtype=np.float64)
+        targets = np.asarray(targets, dtype=np.float64).reshape(len(inputs), -1)
+        random = np.random.RandomState(seed)
+        error = 0.0
+        for epoch in range(0, epochs):
+            order = random.permutation(len(inputs))
+            total = 0.0
+            for start in range(0, len(inputs), batchSize):
+                batch = order[start:start + batchSize]
+                total += self.trainBatch(inputs[batch], targets[batch]) * len(batch)
+            error = total / max(len(inputs), 1)
+        return error
+
+    ##
+    #save
+    #Description: Writes the network to a file
+    ##
+    def save(self, path):
+        with open(path, 'wb') as file:
+            pickle.dump((self.layerSizes, self.learningRate, self.weights, self.biases), file, 2)
+
+    ##
+    #load
+    #Description: Reads a network written by save
+    #
+    #Return: the network (NeuralNetwork)
+    ##
+    @staticmethod
+    def load(path):
+        with open(path, 'rb') as file:
+            layerSizes, learningRate, weights, biases = pickle.load(file)
+        network = NeuralNetwork(layerSizes, learningRate)
+        network.weights = weights
+        network.biases = biases
+        return network
+
+
+##
+#sigmoid
+#Description: The activation function, g(x) = 1 / (1 + e^-x)
+##
+def sigmoid(values):
+    #clipped so large inputs don't overflow exp
+    return 1.0 / (1.0 + np.exp(-np.clip(values, -500, 500)))
+
+##
+#loadOldWeights
+#Description: Makes a network from the weights OLD-AI/neural_network.py
+#   saved (a pickled (firstWeights, secondWeights) pair, with each unit's
+#   bias weight last)
+#
+#Return: the network (NeuralNetwork)
+##
+def loadOldWeights(path):
+    with open(path, 'rb') as file:
+        firstWeights, secondWeights = pickle.load(file)
+    first = np.array(firstWeights, dtype=np.float64)
+    second = np.array(secondWeights, dtype=np.float64)
+    network = NeuralNetwork([first.shape[1] - 1, first.shape[0], 1])
+    network.weights = [first[:, :-1].T.copy(), second[:-1].reshape(-1, 1)]
+    network.biases = [first[:, -1].copy(), second[-1:].copy()]
+    return network
+
+##
+#stateInputs
+#Description: Turns a state into network inputs between 0 and 1, from the
+#   point of view of the player whose turn it is (the inputs
+#   OLD-AI/neural_network.py used):
+#       0 - the player has lost
+#       1 - the player has won
+#       2 - the player's queen is on its anthill
+#       3 - the row of the player's queen / 3
+#       4 - how many workers the player has (up to 2) / 2
+#       5, 6 - the distance from the player's first and second workers to
+#           the enemy queen / 20
+#       7 - the enemy queen's health / the most it can have
+#
+#Parameters:
+#   state - the state (GameState)
+#
+#Return: the inputs (float[NUM_STATE_INPUTS])
+##
+def stateInputs(state):
+    playerInv = state.inventories[state.whoseTurn]
+    enemyInv = state.inventories[1 - state.whoseTurn]
+    playerQueen = playerInv.getQueen()
+    enemyQueen = enemyInv.getQueen()
+    anthill = playerInv.getAnthill()
+    workers = [ant for ant in playerInv.ants if ant.type == WORKER]
+    inputs = [0.0] * NUM_STATE_INPUTS
+
+    if playerQueen == None or enemyInv.foodCount >= FOOD_GOAL:
+        inputs[0] = 1.0
+    if enemyQueen == None or playerInv.foodCount >= FOOD_GOAL:
+        inputs[1] = 1.0
+    if playerQueen != None:
+        if anthill != None and playerQueen.coords == anthill.coords:
+            inputs[2] = 1.0
+        inputs[3] = playerQueen.coords[1] / 3.0
+    inputs[4] = min(2, len(workers)) / 2.0
+    if enemyQueen != None:
+        for i in range(0, min(2, len(workers))):
+            inputs[5 + i] = (abs(workers[i].coords[0] - enemyQueen.coords[0]) +
+                             abs(workers[i].coords[1] - enemyQueen.coords[1])) / 20.0
+        inputs[7] = float(enemyQueen.health) / UNIT_STATS[QUEEN][HEALTH]
+    return inputs
+
+##
+#evaluateStates
+#Description: Evaluates a list of states with a one-output network, all in
+#   one batch
+#
+#Parameters:
+#   network - the network (NeuralNetwork)
+#   states - the states (GameState[])
+#   inputs - turns a state into the network's inputs (function)
+#
+#Return: the network's output for each state (float[])
+##
+def evaluateStates(network, states, inputs=stateInputs):
+    if len(states) == 0:
+        return []
+    return network.outputs([inputs(state) for state in states])[:, 0].tolist()
@@ -0,0 +1,169 @@
+import os, sys, time, random, argparse
+import numpy as np
+from Constants import *
+from Player import PlayerWrapper
+from HeadlessGame import HeadlessGame, loadAIPlayer
+from NeuralNetwork import *
+
+##
+# NeuralTrainer.py
+#
+# Trains a NeuralNetwork (see NeuralNetwork.py) offline to predict, from a
+# state, how likely the player whose turn it is is to win.  Games between
+# two AIs are played headlessly; every state a player is asked to move from
+# is recorded (as the network's inputs) and labelled 1 if that player went
+# on to win the game and 0 if it lost.  The network is then trained on all
+# of the recorded states in mini-batches.  The samples can be saved and
+# trained on again later without replaying the games.
+#
+#   Usage:  python NeuralTrainer.py [--p1 <AI>] [--p2 <AI>] [--games N] [--samples FILE]
+#               [--hidden H ...] [--epochs E] [--batch B] [--rate R] [--seed S] [--out FILE]
+#
+# If the --samples file exists its samples are trained on, and no games are
+# played unless --games is given.  The samples of any games played are added
+# to the --samples file.
+#
+
+#the default number of units in each hidden layer
+HIDDEN_LAYERS = [2 * NUM_STATE_INPUTS]
+
+##
+#RecordingPlayer
+#Description: Wraps another Player and records the inputs of every state it
+#   is asked to move from.  When the game ends they are labelled with the
+#   result and added to the samples.
+#
+#Variables:
+#   player - the Player that makes the moves (Player)
+#   inputs - turns a state into network inputs (function)
+#   gameInputs - the inputs recorded during the current game (list)
+#   samples - (inputs, target) for each state of each finished game (list)
+##
+class RecordingPlayer(PlayerWrapper):
+
+    def __init__(self, player, inputs=stateInputs):
+        super(RecordingPlayer, self).__init__(player)
+        self.inputs = inputs
+        self.gameInputs = []
+        self.samples = []
+
+    def getMove(self, currentState):
+        self.gameInputs.append(self.inputs(currentState))
+        return super(RecordingPlayer, self).getMove(currentState)
+
+    def registerWin(self, hasWon):
+        target = 1.0 if hasWon else 0.0
+        self.samples += [(inputs, target) for inputs in self.gameInputs]
+        self.gameInputs = []
+        super(RecordingPlayer, self).registerWin(hasWon)
+
+
+##
+#recordGames
+#Description: Plays games between two AIs and records their states
+#
+#Parameters:
+#   p1Name, p2Name - the AIs (see HeadlessGame.loadAIPlayer) (string)
+#   numGames - how many games to play (int)
+#   inputs - turns a state into network inputs (function)
+#
+#Return: (inputs, targets): one row of inputs per recorded state (2D
+#   array) and whether the player to move went on to win (1D array)
+##
+def recordGames(p1Name, p2Name, numGames, inputs=stateInputs):
+    players = []
+    for name in (p1Name, p2Name):
+        player = loadAIPlayer(name)
+        if player == None:
+            raise ValueError("AI '" + name + "' not found.")
+        players.append(RecordingPlayer(player, inputs))
+    game = HeadlessGame(players)
+    game.playGames(PLAYER_ONE, PLAYER_TWO, numGames)
+    samples = players[0].samples + players[1].samples
+    return (np.array([sample[0] for sample in samples], dtype=np.float64).reshape(len(samples), -1),
+            np.array([sample[1] for sample in samples], dtype=np.float64))
+
+##
+#saveSamples
+#Description: Writes recorded samples to a file (NumPy's .npz format)
+##
+def saveSamples(path, inputs, targets):
+    with open(path, 'wb') as file:
+        np.savez_compressed(file, inputs=inputs, targets=targets)
+
+##
+#loadSamples
+#Description: Reads samples written by saveSamples
+#
+#Return: (inputs, targets)
+##
+def loadSamples(path):
+    data = np.load(path)
+    return data['inputs'], data['targets']
+
+##
+#trainNetwork
+#Description: Trains a new network on recorded samples
+#
+#Parameters:
+#   inputs, targets - the samples (see recordGames)
+#   hiddenLayers - the number of units in each hidden layer (int[])
+#   epochs, batchSize - see NeuralNetwork.train
+#   learningRate - see NeuralNetwork
+#   seed - seeds the weights and the sample order, if not None (int)
+#   verbose - whether to print the error as training goes (boolean)
+#
+#Return: the trained network (NeuralNetwork)
+##
+def trainNetwork(inputs, targets, hiddenLayers=HIDDEN_LAYERS, epochs=100, batchSize=BATCH_SIZE,
+                 learningRate=LEARNING_RATE, seed=None, verbose=False):
+    network = NeuralNetwork([inputs.shape[1]] + list(hiddenLayers) + [1], learningRate, seed)
+    for epoch in range(0, epochs):
+        epochSeed = None if seed == None else seed + epoch
+        error = network.train(inputs, targets, 1, batchSize, epochSeed)
+        if verbose and (epoch + 1) % max(epochs // 10, 1) == 0:
+            print("epoch " + str(epoch + 1) + ": mean squared error " + ("%.4f" % error))
+    return network
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Trains a neural network to evaluate states from recorded games.")
+    parser.add_argument("--p1", default="Random", help="the AI that moves first in the recorded games")
+    parser.add_argument("--p2", default="Random", help="the AI that moves second in the recorded games")
+    parser.add_argument("--games", type=int, default=None, help="number of games to record (default 100)")
+    parser.add_argument("--samples", default=None, help="file of recorded samples to train on or to save to")
+    parser.add_argument("--hidden", type=int, nargs="*", default=HIDDEN_LAYERS,
+                        help="number of units in each hidden layer")
+    parser.add_argument("--epochs", type=int, default=100, help="number of passes over the samples")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="number of samples in a mini-batch")
+    parser.add_argument("--rate", type=float, default=LEARNING_RATE, help="learning rate")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the games and the network")
+    parser.add_argument("--out", default="AI/network.p", help="file to write the trained network to")
+    args = parser.parse_args()
+
+    #always run from the directory that contains the AI folder
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    if args.seed != None:
+        random.seed(args.seed)
+
+    inputs = np.zeros((0, NUM_STATE_INPUTS))
+    targets = np.zeros(0)
+    if args.samples != None and os.path.isfile(args.samples):
+        inputs, targets = loadSamples(args.samples)
+        print("loaded " + str(len(inputs)) + " samples from " + args.samples)
+    if args.games != None or len(inputs) == 0:
+        numGames = args.games if args.games != None else 100
+        startTime = time.time()
+        newInputs, newTargets = recordGames(args.p1, args.p2, numGames)
+        print("recorded " + str(len(newInputs)) + " samples from " + str(numGames) + " games in " +
+              ("%.2f" % (time.time() - startTime)) + " seconds")
+        inputs = np.concatenate([inputs, newInputs])
+        targets = np.concatenate([targets, newTargets])
+        if args.samples != None:
+            saveSamples(args.samples, inputs, targets)
+
+    startTime = time.time()
+    network = trainNetwork(inputs, targets, args.hidden, args.epochs, args.batch, args.rate, args.seed, True)
+    print("trained in " + ("%.2f" % (time.time() - startTime)) + " seconds")
+    network.save(args.out)
+    print("network written to " + args.out)
@@ -0,0 +1,228 @@
+import weakref
+
+##
+#TrackedCoords
+#Description: The descriptor used for the coords attribute of Ants and
+#   Constructions.  It has no __get__ so reading coords is as fast as reading
+#   any other attribute.  Setting coords also moves the object in every
+#   OccupancyIndex that it has been added to (an object can be in the
+#   inventories of more than one state).
+#
+#Variables:
+#   table - the name of the OccupancyIndex dictionary the object lives in
+##
+class TrackedCoords(object):
+
+    def __init__(self, table):
+        self.table = table
+
+    def __set__(self, obj, value):
+        objDict = obj.__dict__
+        indexRefs = objDict.get('_occupancy')
+        if indexRefs != None:
+            for indexRef in indexRefs:
+                index = indexRef()
+                if index != None:
+                    index.relocate(getattr(index, self.table), obj, objDict.get('coords'), value)
+        objDict['coords'] = value
+
+
+##
+#OccupancyIndex
+#Description: Maps board coordinates to the ant and the construction at
+#   those coordinates so that they can be found in O(1) time.  The index is
+#   built from a GameState's inventories (so it works for states that have no
+#   board) and is kept up to date when the coords of an indexed ant or
+#   construction change.  Adding or removing ants and constructions from an
+#   inventory, or replacing an inventory's list, is noticed by
+#   GameState.getOccupancy, which then builds a new index.  (Code that puts
+#   one object in place of another in an inventory list must call
+#   GameRules.forgetOccupancy.)
+#
+#Variables:
+#   ants - a dictionary of coords to Ant
+#   constrs - a dictionary of coords to Construction
+#   key - see occupancyKey
+#   version - incremented every time an indexed object moves
+#   layout - cached result of getLayoutKey (or None)
+#   layoutVersion - the version the layout was computed at
+#   costKey - cached result of getCostKey (or None)
+##
+class OccupancyIndex(object):
+
+    __slots__ = ('ants', 'constrs', 'key', 'version', 'layout', 'layoutVersion', 'costKey',
+                 '__weakref__')
+
+    ##
+    #__init__
+    #Description: Builds a new index
+    #
+    #Parameters:
+    #   inventories - the inventories of the state to index (Inventory[])
+    #   key - see occupancyKey
+    #   owned - if the state shares objects with others (see
+    #       GameState.lightclone), the ids of the ones it owns; the shared
+    #       ones are never moved, so they aren't tracked (set)
+    ##
+    def __init__(self, inventories, key, owned=None):
+        self.ants = {}
+        self.constrs = {}
+        self.key = key
+        self.version = 0
+        self.layout = None
+        self.layoutVersion = 0
+        self.costKey = None
+        selfRef = weakref.ref(self)
+        #add the objects in reverse so that, as in AIPlayerUtils.getAntAt,
+        #the first one found in the inventories wins
+        for inv in reversed(inventories):
+            for ant in reversed(inv.ants):
+                if owned == None or id(ant) in owned:
+                    track(ant, selfRef)
+                self.ants[tupleCoords(ant.coords)] = ant
+            for constr in reversed(inv.constrs):
+                if owned == None or id(constr) in owned:
+                    track(constr, selfRef)
+                self.constrs[tupleCoords(constr.coords)] = constr
+
+    ##
+    #relocate
+    #Description: Moves an object from one coordinate to another.  Called by
+    #   TrackedCoords.
+    ##
+    def relocate(self, table, obj, oldCoords, newCoords):
+        if oldCoords != None:
+            oldCoords = tupleCoords(oldCoords)
+            if table.get(oldCoords) is obj:
+                del table[oldCoords]
+        if newCoords != None:
+            table[tupleCoords(newCoords)] = obj
+        self.version += 1
+        if table is self.constrs:
+            self.costKey = None
+
+    ##
+    #replace
+    #Description: Puts a copy of an object in the index in place of the
+    #   object (see GameRules.ownItem).  The copy is moved in this index when
+    #   its coords change.
+    #
+    #Parameters:
+    #   table - the dictionary the object is in (ants or constrs)
+    #   obj - the object being replaced
+    #   copy - its copy (at the same coordinates)
+    ##
+    def replace(self, table, obj, copy):
+        coords = tupleCoords(obj.coords)
+        if table.get(coords) is obj:
+            table[coords] = copy
+        copy._occupancy = (weakref.ref(self),)
+        self.version += 1
+
+    ##
+    #rekey
+    #Description: Updates the key after one of the inventory lists has been
+    #   replaced by a copy holding the same objects (see GameRules.ownList)
+    #
+    #Parameters:
+    #   inventories - the state's inventories (Inventory[])
+    ##
+    def rekey(self, inventories):
+        self.key = occupancyKey(inventories)
+
+    ##
+    #copy
+    #Description: Returns a copy of this index for a state that shares its
+    #   ants and constructions with this one (see GameState.lightclone).
+    #   The shared objects stay with this index; they are never moved while
+    #   they are shared, as each state copies an object before moving it.
+    ##
+    def copy(self):
+        result = OccupancyIndex([], self.key)
+        result.ants = self.ants.copy()
+        result.constrs = self.constrs.copy()
+        result.costKey = self.costKey
+        return result
+
+    ##
+    #getLayoutKey
+    #Description: Returns a hashable value that describes everything that
+    #   affects where an ant can move: the cells holding an ant and the
+    #   movement cost of every cell that does not cost 1.  Two states with the
+    #   same layout key have the same movement paths.
+    ##
+    def getLayoutKey(self):
+        if self.layout == None or self.layoutVersion != self.version:
+            self.layout = (frozenset(self.ants), self.getCostKey())
+            self.layoutVersion = self.version
+        return self.layout
+
+    ##
+    #getCostKey
+    #Description: Returns a hashable value that describes the movement cost of
+    #   every cell: the cells whose construction costs more (or less) than 1
+    #   to move onto, with their costs.  It only changes when a construction
+    #   that costs something other than 1 is added, removed or moved.
+    ##
+    def getCostKey(self):
+        if self.costKey == None:
+            self.costKey = frozenset([(coords, constr.movementCost) for coords, constr in self.constrs.items()
+                                      if constr.movementCost != 1])
+        return self.costKey
+
+
+##
+#occupancyKey
+#Description: Returns a value that changes when ants or constructions are
+#   added to or removed from any of the given inventories, or when one of
+#   their lists is replaced by a list of other objects.  It holds the lists
+#   themselves: two keys with the same lists compare equal at once, and
+#   two with different lists only if the lists hold the same objects.
+##
+def occupancyKey(inventories):
+    inv1, inv2, neutral = inventories
+    ants1, ants2, constrs1, constrs2, constrs3 = (inv1.ants, inv2.ants, inv1.constrs, inv2.constrs,
+                                                   neutral.constrs)
+    return (len(ants1), len(ants2), len(constrs1), len(constrs2), len(constrs3),
+            ants1, ants2, constrs1, constrs2, constrs3, neutral.ants)
+
+
+##
+#track
+#Description: Adds an index to the ones an ant or construction moves in
+#   when its coords change (dropping any that no longer exist)
+#
+#Parameters:
+#   obj - the Ant or Construction
+#   indexRef - a weak reference to the OccupancyIndex
+##
+def track(obj, indexRef):
+    indexRefs = obj.__dict__.get('_occupancy')
+    if indexRefs == None:
+        obj._occupancy = (indexRef,)
+    else:
+        index = indexRef()
+        obj._occupancy = tuple([ref for ref in indexRefs
+                                if ref() != None and ref() is not index]) + (indexRef,)
+
+
+##
+#tupleCoords
+#Description: Returns the given coordinates as a tuple (so they can be used
+#   as a dictionary key)
+##
+def tupleCoords(coords):
+    if type(coords) is tuple:
+        return coords
+    return tuple(coords)
+
+
+##
+#untrackedState
+#Description: Returns an object's __dict__ without its OccupancyIndex
+#   reference.  Used by Ant and Construction when they are pickled or copied.
+##
+def untrackedState(obj):
+    result = obj.__dict__.copy()
+    result.pop('_occupancy', None)
+    return result
@@ -0,0 +1,302 @@
+import os, sys, time, argparse, multiprocessing, traceback
+from Constants import *
+from Move import Move
+from AIPlayerUtils import listAllLegalMoves
+from AlphaBetaSearch import *
+from TranspositionTable import SharedTranspositionTable
+
+##
+# ParallelSearch.py
+#
+# Runs an AlphaBetaSearch on every core.  The moves at the root are dealt
+# out between a set of worker processes (the first to worker 0, the second
+# to worker 1, ...); each worker searches its share of the moves with
+# iterative deepening, and all of them keep their results in one
+# SharedTranspositionTable so positions reached from more than one root move
+# are only searched once.  When the time is up, the best move is picked from
+# the deepest search that every worker finished.
+#
+#    self.searcher = ParallelSearch(evaluate, timeLimit=5)
+#    ...
+#    return self.searcher.search(currentState)
+#    ...
+#    self.searcher.stop()    #when the AI is done with it
+#
+# The workers are started with the search and are given the evaluation
+# (and listMoves) function when they start, so on platforms that start
+# processes with "spawn" these must be functions defined at the top level of
+# a module.
+#
+# Run as a script, it times a ParallelSearch against an AlphaBetaSearch of
+# the same depth on positions from a game between two AIs:
+#
+#    python ParallelSearch.py --depth 3 --positions 5
+#
+
+#how long (seconds) to wait past the time limit for a worker to answer
+WORKER_GRACE_TIME = 1.0
+
+##
+#ParallelSearchError
+#Description: Raised when a search worker fails
+##
+class ParallelSearchError(Exception):
+    pass
+
+
+##
+#runSearchWorker
+#Description: The main loop of a search worker.  Runs the searches it is
+#   sent until the pipe is closed or it is sent None.
+#
+#Parameters:
+#   evaluate, listMoves, maxDepth, branchLimit - see AlphaBetaSearch
+#   table - the table shared by the workers (SharedTranspositionTable)
+#   conn - this process's end of the pipe (Connection)
+##
+def runSearchWorker(evaluate, listMoves, maxDepth, branchLimit, table, conn):
+    searcher = AlphaBetaSearch(evaluate, listMoves, maxDepth=maxDepth,
+                               branchLimit=branchLimit, table=table)
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message == None:
+            break
+
+        state, moves, timeLimit, generation = message
+        try:
+            #every worker starts from the same generation (search adds one)
+            table.generation = generation
+            searcher.search(state, timeLimit, moves)
+            results = [(value, moves.index(move)) for value, move in searcher.depthResults]
+            conn.send((True, (results, searcher.nodes)))
+        except Exception:
+            conn.send((False, traceback.format_exc()))
+
+
+##
+#ParallelSearch
+#Description: An AlphaBetaSearch split across worker processes
+#
+#Variables:
+#   evaluate, listMoves, timeLimit, maxDepth, branchLimit - see
+#       AlphaBetaSearch
+#   numWorkers - how many worker processes to use (int)
+#   table - the table the workers share (SharedTranspositionTable)
+#   workers - (Process, Connection) of each running worker (list)
+#   nodes - how many states the last search visited, over all workers (int)
+#   depthReached - the depth the best move was picked at (int)
+#   bestValue - the value of the move the last search returned (number)
+##
+class ParallelSearch(object):
+
+    ##
+    #__init__
+    #Description: Creates a new search (the workers start with the first
+    #   search)
+    #
+    #Parameters:
+    #   evaluate - see AlphaBetaSearch (a top level function)
+    #   listMoves - see AlphaBetaSearch (a top level function, or None)
+    #   timeLimit, maxDepth, branchLimit - see AlphaBetaSearch
+    #   numWorkers - how many worker processes to use; defaults to one per
+    #       core (int)
+    #   tableSize - the most results the shared table keeps (int)
+    ##
+    def __init__(self, evaluate, listMoves=None, timeLimit=SEARCH_TIME_LIMIT,
+                 maxDepth=SEARCH_MAX_DEPTH, branchLimit=None, numWorkers=None, tableSize=1 << 18):
+        self.evaluate = evaluate
+        if listMoves == None:
+            listMoves = listCanonicalMoves
+        self.listMoves = listMoves
+        self.timeLimit = timeLimit
+        self.maxDepth = maxDepth
+        self.branchLimit = branchLimit
+        if numWorkers == None:
+            numWorkers = multiprocessing.cpu_count()
+        self.numWorkers = max(numWorkers, 1)
+        self.table = SharedTranspositionTable(tableSize)
+        self.workers = []
+        self.nodes = 0
+        self.depthReached = 0
+        self.bestValue = None
+
+    ##
+    #start
+    #Description: Starts the worker processes (if they aren't running)
+    ##
+    def start(self):
+        if len(self.workers) > 0:
+            return
+        for i in range(0, self.numWorkers):
+            conn, childConn = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=runSearchWorker,
+                                              args=(self.evaluate, self.listMoves, self.maxDepth,
+                                                    self.branchLimit, self.table, childConn))
+            #make sure the workers die with the AI
+            process.daemon = True
+            process.start()
+            childConn.close()
+            self.workers.append((process, conn))
+
+    ##
+    #stop
+    #Description: Ends the worker processes
+    ##
+    def stop(self):
+        for process, conn in self.workers:
+            try:
+                conn.send(None)
+            except (IOError, OSError):
+                pass
+        for process, conn in self.workers:
+            process.join(1)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+            conn.close()
+        self.workers = []
+
+    ##
+    #search
+    #Description: Finds the best move for the player whose turn it is
+    #
+    #Parameters:
+    #   currentState - the state to move from (not changed) (GameState)
+    #   timeLimit - the most time (seconds) to take, if not self.timeLimit
+    #
+    #Return: the best Move found, or None if there are no moves
+    ##
+    def search(self, currentState, timeLimit=None):
+        if timeLimit == None:
+            timeLimit = self.timeLimit
+        self.nodes = 0
+        self.depthReached = 0
+        self.bestValue = None
+
+        state = currentState.fastclone()
+        moves = self.listMoves(state)
+        if len(moves) <= 1:
+            return moves[0] if len(moves) == 1 else None
+
+        self.start()
+        self.table.newGeneration()
+        shares = []
+        for i in range(0, min(self.numWorkers, len(moves))):
+            share = moves[i::self.numWorkers]
+            self.workers[i][1].send((state, share, timeLimit, self.table.generation))
+            shares.append(share)
+
+        deadline = time.time() + timeLimit + WORKER_GRACE_TIME
+        allResults = []
+        for i in range(0, len(shares)):
+            allResults.append(self.receive(i, deadline))
+
+        #pick the best move of the deepest search every worker finished
+        depth = min([len(results) for results in allResults])
+        if depth == 0:
+            return moves[0]
+        best = None
+        for i in range(0, len(shares)):
+            value, index = allResults[i][depth - 1]
+            if best == None or value > best[0]:
+                best = (value, shares[i][index])
+        self.depthReached = depth
+        self.bestValue = best[0]
+        return best[1]
+
+    ##
+    #receive
+    #Description: Waits for a worker's answer
+    #
+    #Return: the worker's (value, move index) for each depth it finished
+    ##
+    def receive(self, workerIndex, deadline):
+        process, conn = self.workers[workerIndex]
+        if not conn.poll(max(deadline - time.time(), 0)):
+            self.stop()
+            raise ParallelSearchError("search worker " + str(workerIndex) + " did not answer in time")
+        try:
+            ok, result = conn.recv()
+        except EOFError:
+            self.stop()
+            raise ParallelSearchError("search worker " + str(workerIndex) + " ended")
+        if not ok:
+            #the other workers' answers would be read by the next search
+            self.stop()
+            raise ParallelSearchError("search worker " + str(workerIndex) + " failed:\n" + result)
+        results, nodes = result
+        self.nodes += nodes
+        return results
+
+
+##
+#listCanonicalMoves
+#Description: The default listMoves: one move per ant per destination plus
+#   the builds and END (a top level function so it can be given to workers)
+##
+def listCanonicalMoves(state):
+    return listAllLegalMoves(state, True)
+
+
+##
+#benchmarkPositions
+#Description: Plays a game between two AIs and picks positions from it to
+#   search
+#
+#Parameters:
+#   aiNames - the module names of the two AIs (string[])
+#   numPositions - how many positions to pick (int)
+#
+#Return: states at the start of turns spread over the game (GameState[])
+##
+def benchmarkPositions(aiNames, numPositions):
+    from HeadlessGame import HeadlessGame, loadAIPlayer
+    from GameRecord import GameRecorder, positions, EVENT_END
+    game = HeadlessGame([loadAIPlayer(name) for name in aiNames])
+    game.recorder = GameRecorder(keep=True)
+    game.playGame(PLAYER_ONE, PLAYER_TWO)
+    states = [state.clone() for event, state in positions(game.recorder.records[0])
+              if event[0] == EVENT_END and getWinner(state) == None]
+    step = max(len(states) // max(numPositions, 1), 1)
+    return states[step // 2::step][:numPositions]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Times a ParallelSearch against an AlphaBetaSearch of the same depth.")
+    parser.add_argument("--depth", type=int, default=3, help="how many moves deep both searches go")
+    parser.add_argument("--positions", type=int, default=5, help="how many positions to search")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--p1", default="Random", help="the AI that moves first in the game the positions come from")
+    parser.add_argument("--p2", default="Random", help="the AI that moves second")
+    args = parser.parse_args()
+
+    #always run from the directory that contains the AI folder
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    from MonteCarloSearch import estimateWinChance
+    states = benchmarkPositions([args.p1, args.p2], args.positions)
+
+    #no time limit: both searches stop at the depth
+    timeLimit = 1e6
+    serial = AlphaBetaSearch(estimateWinChance, listCanonicalMoves, timeLimit, args.depth)
+    parallel = ParallelSearch(estimateWinChance, listCanonicalMoves, timeLimit, args.depth,
+                              numWorkers=args.workers)
+    parallel.start()
+    totals = [0.0, 0.0]
+    try:
+        for state in states:
+            times = []
+            for searcher in (serial, parallel):
+                startTime = time.time()
+                searcher.search(state)
+                times.append(time.time() - startTime)
+            totals[0] += times[0]
+            totals[1] += times[1]
+            print("serial %.3fs (%d nodes, value %.4f)  parallel %.3fs (%d nodes, value %.4f)" %
+                  (times[0], serial.nodes, serial.bestValue, times[1], parallel.nodes, parallel.bestValue))
+    finally:
+        parallel.stop()
+    print(str(len(states)) + " positions at depth " + str(args.depth) + " on " + str(parallel.numWorkers) +
+          " workers: " + ("%.2f" % (totals[0] / max(totals[1], 1e-9))) + "x the speed of one search")
@@ -70,3 +70,61 @@ class Player(object):
     def registerWin(self, hasWon):
         #method templaste, not implemented
         pass
+
+    ##
+    #ponder
+    #Description: Called over and over while the player is waiting for the
+    #   game (only for players run with pondering on; see PlayerProcess.py).
+    #   A player can use the time to think ahead, e.g. about the opponent's
+    #   likely replies.
+    #
+    #Parameters:
+    #   timeLimit - roughly how many seconds to spend before returning (number)
+    #
+    #Return: True to be called again, False to stop until the next move
+    #
+    def ponder(self, timeLimit):
+        #method template, not implemented
+        return False
+
+
+##
+#PlayerWrapper
+#Description: A Player that hands every call on to another Player, keeping
+#   the other Player's playerId the same as its own.  Subclasses override
+#   the calls they want to watch or change and call these to pass them on.
+#
+#Variables:
+#   player - the Player that makes the moves (Player)
+##
+class PlayerWrapper(Player):
+
+    ##
+    #__init__
+    #Description: Wraps a Player
+    #
+    #Parameters:
+    #   player - the Player to hand the calls on to (Player)
+    ##
+    def __init__(self, player):
+        super(PlayerWrapper, self).__init__(player.playerId, player.author)
+        self.player = player
+
+    def getPlacement(self, currentState):
+        self.player.playerId = self.playerId
+        return self.player.getPlacement(currentState)
+
+    def getMove(self, currentState):
+        self.player.playerId = self.playerId
+        return self.player.getMove(currentState)
+
+    def getAttack(self, currentState, attackingAnt, enemyLocations):
+        self.player.playerId = self.playerId
+        return self.player.getAttack(currentState, attackingAnt, enemyLocations)
+
+    def registerWin(self, hasWon):
+        self.player.playerId = self.playerId
+        self.player.registerWin(hasWon)
+
+    def ponder(self, timeLimit):
+        return self.player.ponder(timeLimit)
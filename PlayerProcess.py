@@ -0,0 +1,240 @@
+import sys, random, traceback, multiprocessing
+from Constants import *
+from Player import Player
+
+##
+# PlayerProcess.py
+#
+# Runs an AI player in a process of its own so that the game can stop
+# waiting for it.  A ProcessPlayer looks like any other Player to the game;
+# each call is sent to the AI's process over a pipe, and if the answer does
+# not come back within the time limit (AI_MOVE_TIMEOUT by default) the
+# process is killed and PlayerTimeout is raised.  HeadlessGame catches
+# PlayerTimeout and the slow player forfeits the game.  The AI is started
+# again, fresh, the next time it is needed.
+#
+# With pondering on, an AI's process calls the AI's ponder method (see
+# Player.ponder) whenever it is waiting for the game, a slice of
+# PONDER_SLICE seconds at a time, so the AI can think during the opponent's
+# turn.  A call that arrives while the AI is pondering waits for the slice to
+# end, and that wait counts against the time limit.
+#
+
+#how long (seconds) each call to an AI's ponder method should take
+PONDER_SLICE = 0.05
+
+##
+#PlayerTimeout
+#Description: Raised when a ProcessPlayer takes too long to answer
+#
+#Variables:
+#   author - the author of the AI that was too slow (string)
+#   method - the Player method it was asked to run (string)
+#   timeLimit - how many seconds it was given (number)
+##
+class PlayerTimeout(Exception):
+
+    def __init__(self, author, method, timeLimit):
+        super(PlayerTimeout, self).__init__(author + " took longer than " + str(timeLimit) +
+                                            " seconds in " + method)
+        self.author = author
+        self.method = method
+        self.timeLimit = timeLimit
+
+##
+#PlayerError
+#Description: Raised when the AI in a ProcessPlayer raises an exception.
+#   The message includes the traceback from the AI's process.
+##
+class PlayerError(Exception):
+    pass
+
+
+##
+#hostPlayer
+#Description: The main loop of an AI's process.  Loads the AI, sends back
+#   its author, then runs the calls it is sent until the pipe is closed or
+#   it is sent None.
+#
+#Parameters:
+#   aiName - the AI to load (see HeadlessGame.loadAIPlayer) (string)
+#   conn - this process's end of the pipe (Connection)
+#   ponder - whether to let the AI ponder between calls (boolean)
+##
+def hostPlayer(aiName, conn, ponder=False):
+    #imported here because HeadlessGame imports this module
+    from HeadlessGame import loadAIPlayer
+    player = loadAIPlayer(aiName)
+    if player == None:
+        conn.send((False, "AI '" + aiName + "' not found."))
+        return
+    conn.send((True, player.author))
+
+    pondering = False
+    while True:
+        #think until the next call comes (or the AI has nothing to think about)
+        while pondering and not conn.poll(0):
+            try:
+                pondering = player.ponder(PONDER_SLICE)
+            except Exception:
+                traceback.print_exc()
+                pondering = False
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message == None:
+            break
+
+        method, playerId, args = message
+        try:
+            if method == 'seed':
+                random.seed(args[0])
+                result = None
+            else:
+                player.playerId = playerId
+                result = getattr(player, method)(*args)
+            conn.send((True, result))
+        except Exception:
+            conn.send((False, traceback.format_exc()))
+        pondering = ponder
+
+
+##
+#ProcessPlayer
+#Description: A Player that hands every call to an AI running in its own
+#   process
+#
+#Variables:
+#   aiName - the AI that is run (string)
+#   timeLimit - the most seconds the AI may take to answer a call (number)
+#   pondering - whether the AI ponders between calls (boolean)
+#   process - the AI's process, or None when it is not running (Process)
+#   conn - the game's end of the pipe to the AI's process (Connection)
+#   seedValue - the last seed sent to the AI's process, or None (int)
+##
+class ProcessPlayer(Player):
+
+    ##
+    #__init__
+    #Description: Starts the AI's process
+    #
+    #Parameters:
+    #   aiName - the module name or author of the AI (string)
+    #   inputPlayerId - the id of the player (int)
+    #   timeLimit - the most seconds the AI may take to answer a call,
+    #       including starting up (number)
+    #   ponder - whether to let the AI ponder between calls (boolean)
+    ##
+    def __init__(self, aiName, inputPlayerId=-1, timeLimit=AI_MOVE_TIMEOUT, ponder=False):
+        self.aiName = aiName
+        self.timeLimit = timeLimit
+        self.pondering = ponder
+        self.process = None
+        self.conn = None
+        self.seedValue = None
+        self.author = aiName
+        author = self.start()
+        super(ProcessPlayer, self).__init__(inputPlayerId, author)
+
+    ##
+    #start
+    #Description: Starts (or restarts) the AI's process.  A restarted AI is
+    #   given the last seed again, so that a run with a seed is repeatable.
+    #
+    #Return: the AI's author
+    ##
+    def start(self):
+        self.conn, childConn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=hostPlayer, args=(self.aiName, childConn, self.pondering))
+        #make sure the AI dies with the game
+        self.process.daemon = True
+        self.process.start()
+        childConn.close()
+        author = self.receive('__init__')
+        if self.seedValue != None:
+            self.conn.send(('seed', self.playerId, (self.seedValue,)))
+            self.receive('seed')
+        return author
+
+    ##
+    #stop
+    #Description: Ends the AI's process
+    ##
+    def stop(self):
+        if self.process == None:
+            return
+        try:
+            self.conn.send(None)
+        except (IOError, OSError):
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.conn.close()
+        self.process = None
+        self.conn = None
+
+    ##
+    #call
+    #Description: Runs one of the AI's methods in its process
+    #
+    #Parameters:
+    #   method - the name of the method (string)
+    #   args - the arguments to pass it
+    #
+    #Return: what the method returned
+    ##
+    def call(self, method, *args):
+        if self.process == None or not self.process.is_alive():
+            self.stop()
+            self.start()
+        self.conn.send((method, self.playerId, args))
+        return self.receive(method)
+
+    ##
+    #receive
+    #Description: Waits (up to the time limit) for the answer to a call
+    ##
+    def receive(self, method):
+        if not self.conn.poll(self.timeLimit):
+            self.process.terminate()
+            self.stop()
+            raise PlayerTimeout(self.author, method, self.timeLimit)
+        try:
+            ok, result = self.conn.recv()
+        except EOFError:
+            self.stop()
+            raise PlayerError(self.author + "'s process ended during " + method)
+        if not ok:
+            raise PlayerError(self.author + " raised an exception in " + method + ":\n" + result)
+        return result
+
+    ##
+    #seed
+    #Description: Seeds python's random module in the AI's process
+    ##
+    def seed(self, value):
+        self.seedValue = value
+        self.call('seed', value)
+
+    def getPlacement(self, currentState):
+        return self.call('getPlacement', currentState)
+
+    def getMove(self, currentState):
+        return self.call('getMove', currentState)
+
+    def getAttack(self, currentState, attackingAnt, enemyLocations):
+        return self.call('getAttack', currentState, attackingAnt, enemyLocations)
+
+    ##
+    #registerWin
+    #Description: Tells the AI how the game went.  The game is already over,
+    #   so an AI that is slow or fails here only gets a warning.
+    ##
+    def registerWin(self, hasWon):
+        try:
+            self.call('registerWin', hasWon)
+        except (PlayerTimeout, PlayerError):
+            print("WARNING: " + str(sys.exc_info()[1]))
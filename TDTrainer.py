@@ -0,0 +1,304 @@
+import os, sys, time, random, argparse
+import numpy as np
+from Constants import *
+from Player import PlayerWrapper
+from HeadlessGame import HeadlessGame, loadAIPlayer
+from UtilityStore import UtilityStore
+
+##
+# TDTrainer.py
+#
+# Learns the utilities of a TD learning AI (tdbot.py, rowland17_creighton17.py,
+# ...) offline.  Those AIs learn one state at a time while they play, so they
+# learn only as fast as they can play.  Here games between any two AIs are
+# played headlessly and every state a player is asked to move from is
+# recorded as the learner would see it (with the learner's condense_state),
+# one episode per player per game.  The utilities are then learned from all of
+# the episodes at once with TD(lambda): each sweep works out the lambda-return
+# error of every recorded state with array operations, over a batch of
+# episodes at a time, and moves each state's utility by the average error of
+# its visits.  The utilities are written to the learner's own UtilityStore
+# (its state_list), which it loads when it starts.
+#
+# The condensed states can be any size of int (rowland17_creighton17.py's
+# don't fit in 64 bits), so the episodes keep each distinct state once, in a
+# list of keys, and refer to it by its index in the list.
+#
+#   Usage:  python TDTrainer.py <learner> [--p1 <AI>] [--p2 <AI>] [--games N] [--episodes FILE]
+#               [--sweeps S] [--alpha A] [--discount D] [--lambda L] [--seed S] [--out FILE]
+#
+# If the --episodes file exists its episodes are trained on, and no games
+# are played unless --games is given.  The episodes of any games played are
+# added to the --episodes file.
+#
+
+#the reward for the last move of a game that was won or lost, and for any
+#other move
+WIN_REWARD = 1.0
+LOSE_REWARD = -1.0
+STEP_REWARD = -0.07
+
+#the default step size, discount and trace decay
+ALPHA = 0.5
+DISCOUNT = 0.8
+LAMBDA = 0.8
+
+#how many episodes are worked on at once in a sweep
+EPISODE_BATCH = 4096
+
+##
+#TrajectoryPlayer
+#Description: Wraps another Player and records the condensed state of every
+#   state it is asked to move from.  When the game ends they are added to the
+#   episodes with the result.
+#
+#Variables:
+#   player - the Player that makes the moves (Player)
+#   condense - turns a state into the learner's int state (function)
+#   gameStates - the states recorded during the current game (int[])
+#   episodes - (states, hasWon) for each finished game (list)
+##
+class TrajectoryPlayer(PlayerWrapper):
+
+    def __init__(self, player, condense):
+        super(TrajectoryPlayer, self).__init__(player)
+        self.condense = condense
+        self.gameStates = []
+        self.episodes = []
+
+    def getMove(self, currentState):
+        self.gameStates.append(self.condense(currentState))
+        return super(TrajectoryPlayer, self).getMove(currentState)
+
+    def registerWin(self, hasWon):
+        if len(self.gameStates) > 0:
+            self.episodes.append((self.gameStates, hasWon))
+        self.gameStates = []
+        super(TrajectoryPlayer, self).registerWin(hasWon)
+
+
+##
+#recordEpisodes
+#Description: Plays games between two AIs and records both players' states
+#
+#Parameters:
+#   p1Name, p2Name - the AIs (see HeadlessGame.loadAIPlayer) (string)
+#   numGames - how many games to play (int)
+#   condense - turns a state into the learner's int state (function)
+#
+#Return: (keys, states, lengths, outcomes): the distinct states (int[]),
+#   the index in keys of the states of every episode one after another
+#   (int64 array), the number of states in each episode and whether the
+#   episode's player won it (1 or 0) (int arrays)
+##
+def recordEpisodes(p1Name, p2Name, numGames, condense):
+    players = []
+    for name in (p1Name, p2Name):
+        player = loadAIPlayer(name)
+        if player == None:
+            raise ValueError("AI '" + name + "' not found.")
+        players.append(TrajectoryPlayer(player, condense))
+    game = HeadlessGame(players)
+    game.playGames(PLAYER_ONE, PLAYER_TWO, numGames)
+    episodes = players[0].episodes + players[1].episodes
+    keys, states = indexStates([state for episode in episodes for state in episode[0]])
+    return (keys, states,
+            np.array([len(episode[0]) for episode in episodes], dtype=np.int64),
+            np.array([int(episode[1]) for episode in episodes], dtype=np.int64))
+
+##
+#indexStates
+#Description: Lists the distinct states of a list of states and where each
+#   state is in that list
+#
+#Parameters:
+#   states - the states (int[])
+#   keys - distinct states to add to, if not an empty list (int[])
+#
+#Return: (keys, indexes): the distinct states (int[]) and the index in keys
+#   of each state (int64 array)
+##
+def indexStates(states, keys=None):
+    keys = list(keys) if keys != None else []
+    index = dict([(keys[i], i) for i in range(0, len(keys))])
+    indexes = []
+    for state in states:
+        if state not in index:
+            index[state] = len(keys)
+            keys.append(state)
+        indexes.append(index[state])
+    return keys, np.array(indexes, dtype=np.int64)
+
+##
+#joinEpisodes
+#Description: Puts two sets of episodes together
+#
+#Parameters:
+#   first, second - (keys, states, lengths, outcomes) (see recordEpisodes)
+#
+#Return: (keys, states, lengths, outcomes)
+##
+def joinEpisodes(first, second):
+    keys, secondStates = indexStates([second[0][i] for i in second[1].tolist()], first[0])
+    return (keys, np.concatenate([first[1], secondStates]), np.concatenate([first[2], second[2]]),
+            np.concatenate([first[3], second[3]]))
+
+##
+#saveEpisodes
+#Description: Writes recorded episodes to a file (NumPy's .npz format).
+#   The keys are written as decimal strings, which hold ints of any size.
+##
+def saveEpisodes(path, keys, states, lengths, outcomes):
+    with open(path, 'wb') as file:
+        np.savez_compressed(file, keys=np.array([str(key) for key in keys], dtype=str), states=states,
+                            lengths=lengths, outcomes=outcomes)
+
+##
+#loadEpisodes
+#Description: Reads episodes written by saveEpisodes (or by its older
+#   version, which wrote the states themselves as int64s, without keys)
+#
+#Return: (keys, states, lengths, outcomes)
+##
+def loadEpisodes(path):
+    data = np.load(path)
+    if 'keys' in data.files:
+        keys = [int(key) for key in data['keys'].tolist()]
+        states = data['states']
+    else:
+        keys, states = indexStates(data['states'].tolist())
+    return keys, states, data['lengths'], data['outcomes']
+
+##
+#tdLambda
+#Description: Learns the utilities of the recorded states with offline
+#   TD(lambda).  A sweep finds, for every visit to a state, the error
+#   between the visit's lambda-return and the state's utility (the sum of
+#   the TD errors that follow it in its episode, each (discount * lambda)
+#   times the one before), and then adds alpha times the average error of
+#   each state's visits to its utility.
+#
+#Parameters:
+#   keys, states, lengths, outcomes - the episodes (see recordEpisodes)
+#   utilities - the utilities to start from; states not in it start at 0
+#       (dict or UtilityStore)
+#   sweeps - how many times to go through the episodes (int)
+#   alpha, discount, lam - the step size, discount and trace decay (number)
+#   rewards - the (win, lose, step) rewards (number tuple)
+#
+#Return: the new utility of each of the keys (array)
+##
+def tdLambda(keys, states, lengths, outcomes, utilities, sweeps=10, alpha=ALPHA, discount=DISCOUNT,
+             lam=LAMBDA, rewards=(WIN_REWARD, LOSE_REWARD, STEP_REWARD)):
+    ids = states
+    values = np.array([utilities.get(key, 0.0) for key in keys], dtype=np.float64)
+    if len(keys) == 0:
+        return values
+    visits = np.bincount(ids, minlength=len(keys))
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    #shortest episodes first so that each batch wastes little on padding
+    order = np.argsort(lengths, kind='mergesort')
+    batches = []
+    for first in range(0, len(order), EPISODE_BATCH):
+        episodes = order[first:first + EPISODE_BATCH]
+        width = lengths[episodes].max()
+        steps = np.arange(width)
+        valid = steps[None, :] < lengths[episodes][:, None]
+        index = np.where(valid, starts[episodes][:, None] + steps[None, :], 0)
+        batchIds = np.where(valid, ids[index], 0)
+        #the reward for moving on from each state: the last one's is the result
+        batchRewards = np.where(valid, rewards[2], 0.0)
+        last = lengths[episodes] - 1
+        batchRewards[np.arange(len(episodes)), last] = np.where(outcomes[episodes] == 1,
+                                                                rewards[0], rewards[1])
+        batches.append((batchIds, valid, batchRewards))
+
+    for sweep in range(0, sweeps):
+        totals = np.zeros(len(keys))
+        for batchIds, valid, batchRewards in batches:
+            current = np.where(valid, values[batchIds], 0.0)
+            #the state after the last one is the end of the game, worth 0
+            following = np.zeros_like(current)
+            following[:, :-1] = current[:, 1:]
+            deltas = np.where(valid, batchRewards + discount * following - current, 0.0)
+            errors = np.zeros_like(deltas)
+            running = np.zeros(len(deltas))
+            for step in range(deltas.shape[1] - 1, -1, -1):
+                running = deltas[:, step] + discount * lam * running
+                errors[:, step] = running
+            totals += np.bincount(batchIds[valid], weights=errors[valid], minlength=len(keys))
+        values += alpha * totals / visits
+    return values
+
+##
+#trainStore
+#Description: Learns from recorded episodes and writes the utilities to a
+#   store
+#
+#Parameters:
+#   store - the learner's utilities (UtilityStore)
+#   keys, states, lengths, outcomes - the episodes (see recordEpisodes)
+#   the rest - see tdLambda
+#
+#Return: how many utilities were written (int)
+##
+def trainStore(store, keys, states, lengths, outcomes, sweeps=10, alpha=ALPHA, discount=DISCOUNT,
+               lam=LAMBDA, rewards=(WIN_REWARD, LOSE_REWARD, STEP_REWARD)):
+    values = tdLambda(keys, states, lengths, outcomes, store, sweeps, alpha, discount, lam, rewards)
+    for key, value in zip(keys, values.tolist()):
+        store[key] = value
+    return store.flush()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Learns a TD learning AI's utilities from recorded games.")
+    parser.add_argument("learner", help="the TD learning AI (e.g., tdbot)")
+    parser.add_argument("--p1", default=None, help="the AI that moves first in the recorded games (default: the learner)")
+    parser.add_argument("--p2", default="Random", help="the AI that moves second in the recorded games")
+    parser.add_argument("--games", type=int, default=None, help="number of games to record (default 100)")
+    parser.add_argument("--episodes", default=None, help="file of recorded episodes to train on or to save to")
+    parser.add_argument("--sweeps", type=int, default=10, help="number of passes over the episodes")
+    parser.add_argument("--alpha", type=float, default=ALPHA, help="step size")
+    parser.add_argument("--discount", type=float, default=DISCOUNT, help="discount")
+    parser.add_argument("--lambda", type=float, default=LAMBDA, dest="lam", help="trace decay")
+    parser.add_argument("--seed", type=int, default=None, help="seed for python's random module")
+    parser.add_argument("--out", default=None, help="utility file to write to (default: the learner's own)")
+    args = parser.parse_args()
+
+    #always run from the directory that contains the AI folder
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    if args.seed != None:
+        random.seed(args.seed)
+    learner = loadAIPlayer(args.learner)
+    if learner == None or not hasattr(learner, "condense_state"):
+        print("ERROR:  '" + args.learner + "' is not a TD learning AI.")
+        sys.exit(1)
+    store = learner.state_list
+    if args.out != None:
+        store = UtilityStore(args.out, wideKeys=getattr(store, 'wideKeys', False))
+    if not isinstance(store, UtilityStore):
+        print("ERROR:  '" + args.learner + "' doesn't keep its utilities in a UtilityStore; use --out.")
+        sys.exit(1)
+
+    episodes = ([], np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+    if args.episodes != None and os.path.isfile(args.episodes):
+        episodes = loadEpisodes(args.episodes)
+        print("loaded " + str(len(episodes[2])) + " episodes from " + args.episodes)
+    if args.games != None or len(episodes[2]) == 0:
+        numGames = args.games if args.games != None else 100
+        p1Name = args.p1 if args.p1 != None else args.learner
+        startTime = time.time()
+        newEpisodes = recordEpisodes(p1Name, args.p2, numGames, learner.condense_state)
+        print("recorded " + str(len(newEpisodes[2])) + " episodes (" + str(len(newEpisodes[1])) +
+              " states) from " + str(numGames) + " games in " + ("%.2f" % (time.time() - startTime)) +
+              " seconds")
+        episodes = joinEpisodes(episodes, newEpisodes)
+        if args.episodes != None:
+            saveEpisodes(args.episodes, *episodes)
+
+    startTime = time.time()
+    keys, states, lengths, outcomes = episodes
+    written = trainStore(store, keys, states, lengths, outcomes, args.sweeps, args.alpha, args.discount,
+                         args.lam)
+    print("trained in " + ("%.2f" % (time.time() - startTime)) + " seconds")
+    print(str(written) + " utilities written to " + store.path)
@@ -0,0 +1,417 @@
+import os, re, sys, time, random, argparse, traceback, multiprocessing
+try:
+    import queue
+except ImportError:
+    #python 2, which most of the AIs need
+    import Queue as queue
+from Constants import *
+from HeadlessGame import *
+from GameRecord import GameRecord, GameRecorder
+from GameDatabase import GameDatabase
+
+##
+# Tournament.py
+#
+# Runs a round-robin tournament between AI players on every core of the
+# machine.  Every pairing of AIs is split into chunks of games and the
+# chunks are handed out to a set of worker processes.  Each worker loads
+# the AIs once (when it starts) and plays its chunks with a HeadlessGame.
+# Scores are added up as the chunks finish.
+#
+# With --timeout each worker runs every AI in a process of its own (see
+# PlayerProcess.py) and an AI that takes longer than the timeout to make a
+# move forfeits the game, so one slow AI can't hold up the tournament.
+# With --ponder the AIs are run in processes of their own too, and may think
+# while their opponent moves (see Player.ponder).
+#
+# Like Game's tournament mode, the first AI of a pairing (in the order given)
+# always moves first.  An AI that raises an exception forfeits the game it
+# was playing; the tournament carries on.  A chunk whose worker process dies
+# is played again by a new worker.
+#
+# With --database the workers record every game (see GameRecord.py) and send
+# the records back with their chunks' scores, and each chunk's games are
+# added to the database (see GameDatabase.py) as it comes in.
+#
+# Usage:  python Tournament.py [--games N] [--processes P] [--seed S] [--timeout T] [--ponder]
+#             [--database FILE] [AI ...]
+#
+# If no AIs are listed, every AI in the AI folder that can be loaded is used.
+#
+
+#how many times a task is handed to a new worker, after the worker doing it
+#died, before the tasks are given up on
+MAX_TASK_RETRIES = 2
+
+#The HeadlessGame used by this worker process (see initWorker)
+workerGame = None
+
+##
+#initWorker
+#Description: Loads the AIs into a worker process.  Called once when each
+#   worker starts.
+#
+#Parameters:
+#   aiNames - the AIs to load (string[])
+#   timeLimit - if not None, each AI runs in its own process and forfeits
+#       when a move takes longer than this many seconds (number)
+#   ponder - if True, each AI runs in its own process and ponders while
+#       its opponent moves (boolean)
+#   record - if True, the games are recorded (boolean)
+##
+def initWorker(aiNames, timeLimit=None, ponder=False, record=False):
+    global workerGame
+    if timeLimit == None and not ponder:
+        players = [loadAIPlayer(name) for name in aiNames]
+    else:
+        players = [ProcessPlayer(name, timeLimit=timeLimit or AI_MOVE_TIMEOUT, ponder=ponder)
+                   for name in aiNames]
+    workerGame = HeadlessGame(players)
+    if record:
+        workerGame.recorder = GameRecorder(keep=True)
+        workerGame.moduleNames = list(aiNames)
+
+##
+#stopWorker
+#Description: Ends the processes of a worker's ProcessPlayers.  Called when
+#   the worker is done.
+##
+def stopWorker():
+    for player in workerGame.players:
+        if isinstance(player[0], ProcessPlayer):
+            player[0].stop()
+
+##
+#playChunk
+#Description: Plays a chunk of games for one pairing in a worker process.
+#
+#Parameters:
+#   chunk - a tuple of (playerOneId, playerTwoId, numGames, seed)
+#
+#Return: a tuple of (playerOneId, playerTwoId, wins, losses, crashes,
+#   records) where wins and losses are counted for player one and records
+#   are the games' GameRecords packed into bytes (if they are recorded)
+##
+def playChunk(chunk):
+    playerOneId, playerTwoId, numGames, seed = chunk
+    game = workerGame
+    if game.recorder != None:
+        game.recorder.records = []
+    if seed != None:
+        random.seed(seed)
+        for i in range(0, len(game.players)):
+            if isinstance(game.players[i][0], ProcessPlayer):
+                game.players[i][0].seed(seed + i)
+
+    wins = 0
+    losses = 0
+    crashes = 0
+    for i in range(0, numGames):
+        winner, crashed = playOrForfeit(game, playerOneId, playerTwoId)
+        if crashed:
+            crashes += 1
+        if winner == playerOneId:
+            wins += 1
+        else:
+            losses += 1
+
+    records = []
+    if game.recorder != None:
+        records = [record.toBytes() for record in game.recorder.records]
+    return (playerOneId, playerTwoId, wins, losses, crashes, records)
+
+##
+#playOrForfeit
+#Description: Plays a game in which an AI that raises an exception forfeits
+#   (the tournament carries on).  An exception raised once the game is
+#   decided (by registerWin) doesn't change the result.
+#
+#Parameters:
+#   game - the game to play it with (HeadlessGame)
+#   playerOneId - id of the Player that goes first (int)
+#   playerTwoId - id of the Player that goes second (int)
+#
+#Return: (the id of the winner, whether an AI forfeited by crashing)
+##
+def playOrForfeit(game, playerOneId, playerTwoId):
+    try:
+        return game.playGame(playerOneId, playerTwoId), False
+    except Exception:
+        if game.gameOver:
+            #both players have been told the result (or have crashed being told)
+            print("WARNING: an AI raised an exception after the game ended:")
+            traceback.print_exc()
+            return game.winner, False
+        error = traceback.format_exc()
+
+    #the player whose turn it was forfeits the game
+    loser = game.state.whoseTurn
+    print("AI ERROR: " + game.currentPlayers[loser].author + " raised an exception:")
+    print(error.rstrip())
+    for index, hasWon in ((loser, False), ((loser + 1) % 2, True)):
+        try:
+            game.currentPlayers[index].registerWin(hasWon)
+        except Exception:
+            traceback.print_exc()
+    return game.currentPlayers[(loser + 1) % 2].playerId, True
+
+##
+#listPairings
+#Description: Builds the list of games to play.  Like
+#   Game.startGameCallback, each pair of players meets once with the
+#   earlier player in the list moving first.
+#
+#Parameters:
+#   numPlayers - how many players are in the tournament (int)
+#   numGames - how many games each pairing plays (int)
+#   chunkSize - the most games to put in a single chunk (int)
+#   seed - seed used to derive a seed for each chunk or None (int)
+#
+#Return: a list of (playerOneId, playerTwoId, numGames, seed) chunks
+##
+def listPairings(numPlayers, numGames, chunkSize, seed=None):
+    chunks = []
+    for i in range(0, numPlayers):
+        for j in range(i + 1, numPlayers):
+            remaining = numGames
+            while remaining > 0:
+                count = min(chunkSize, remaining)
+                chunkSeed = None
+                if seed != None:
+                    chunkSeed = seed + len(chunks)
+                chunks.append((i, j, count, chunkSeed))
+                remaining -= count
+    return chunks
+
+##
+#runTournament
+#Description: Plays a round-robin tournament across a set of processes
+#
+#Parameters:
+#   aiNames - the AIs to play (string[])
+#   numGames - how many games each pairing plays (int)
+#   numProcesses - how many worker processes to use; defaults to one per
+#       core (int)
+#   chunkSize - the most games a worker plays before reporting back (int)
+#   seed - makes the tournament repeatable no matter how the chunks are
+#       scheduled (int)
+#   verbose - print the standings as results come in (boolean)
+#   timeLimit, ponder - see initWorker
+#   database - if not None, every game is recorded and added to it
+#       (GameDatabase)
+#
+#Return: the scores in the same format as Game.playerScores:
+#   [[author, wins, losses], ...]
+##
+def runTournament(aiNames, numGames, numProcesses=None, chunkSize=25, seed=None, verbose=False,
+                  timeLimit=None, ponder=False, database=None):
+    if numProcesses == None:
+        numProcesses = multiprocessing.cpu_count()
+    authors = [loadAIPlayer(name).author for name in aiNames]
+    playerScores = [[author, 0, 0] for author in authors]
+    chunks = listPairings(len(aiNames), numGames, chunkSize, seed)
+    totalGames = sum([chunk[2] for chunk in chunks])
+
+    #(a list so that addResult can change it)
+    counts = [0, 0]
+    startTime = time.time()
+
+    #adds up a chunk's scores (and records) as it comes in
+    def addResult(chunk, result):
+        playerOneId, playerTwoId, wins, losses, chunkCrashes, records = result
+        if database != None:
+            database.addRecords([GameRecord.fromBytes(record) for record in records])
+        playerScores[playerOneId][1] += wins
+        playerScores[playerOneId][2] += losses
+        playerScores[playerTwoId][1] += losses
+        playerScores[playerTwoId][2] += wins
+        counts[0] += wins + losses
+        counts[1] += chunkCrashes
+        if verbose:
+            elapsed = time.time() - startTime
+            print(str(counts[0]) + "/" + str(totalGames) + " games (" +
+                  ("%.1f" % (counts[0] / max(elapsed, 1e-9))) + " games/sec, " +
+                  str(counts[1]) + " forfeited by crashes)")
+
+    runWorkers(chunks, numProcesses, initWorker, (aiNames, timeLimit, ponder, database != None),
+               playChunk, addResult, stopWorker)
+    return playerScores
+
+##
+#runWorkers
+#Description: Does a list of tasks on a set of worker processes.  Each
+#   worker runs init once, when it starts, then does one task at a time
+#   with work, and runs finish (if given) when it is done.  The results are
+#   handed to onResult, in this process, as they come in.  If a worker dies
+#   part way through a task the task is handed to a new worker, up to
+#   MAX_TASK_RETRIES times.
+#
+#   (The workers are not a multiprocessing.Pool because the processes of a
+#   pool can't start the processes that ProcessPlayers need.)
+#
+#Parameters:
+#   tasks - the tasks (list)
+#   numProcesses - how many worker processes to use (int)
+#   init - sets up a worker (a module level function)
+#   initArgs - the arguments to pass init (tuple)
+#   work - does a task in a worker and returns its result (a module level
+#       function)
+#   onResult - called with each task and its result (function)
+#   finish - cleans up a worker (a module level function), or None
+##
+def runWorkers(tasks, numProcesses, init, initArgs, work, onResult, finish=None):
+    if len(tasks) == 0:
+        return
+    numProcesses = max(1, min(numProcesses, len(tasks)))
+    results = multiprocessing.Queue()
+    pending = list(range(0, len(tasks)))
+    retries = [0] * len(tasks)
+    finished = [False] * len(tasks)
+    #each worker's process and task queue, and the task it is doing (or None)
+    workers = [None] * numProcesses
+    current = [None] * numProcesses
+
+    def startWorker(slot):
+        taskQueue = multiprocessing.Queue()
+        process = multiprocessing.Process(target=workerLoop,
+                                          args=(slot, init, initArgs, work, finish, taskQueue, results))
+        process.start()
+        workers[slot] = (process, taskQueue)
+
+    def handOut(slot):
+        if len(pending) > 0:
+            current[slot] = pending.pop(0)
+            workers[slot][1].put((current[slot], tasks[current[slot]]))
+
+    remaining = len(tasks)
+    try:
+        for slot in range(0, numProcesses):
+            startWorker(slot)
+            handOut(slot)
+        while remaining > 0:
+            try:
+                slot, index, result = results.get(True, 1)
+            except queue.Empty:
+                slot = None
+            if slot == None:
+                #(not started in the except block, or the new worker's
+                #tracebacks would show the queue.Empty too)
+                for slot in range(0, numProcesses):
+                    index = current[slot]
+                    if index == None or workers[slot][0].is_alive():
+                        continue
+                    retries[index] += 1
+                    if retries[index] > MAX_TASK_RETRIES:
+                        raise RuntimeError("worker processes died " + str(retries[index]) +
+                                           " times on the task " + str(tasks[index]))
+                    print("WARNING: a worker process died; its task is handed to a new one")
+                    pending.insert(0, index)
+                    startWorker(slot)
+                    handOut(slot)
+                continue
+            if current[slot] == index:
+                current[slot] = None
+                handOut(slot)
+            if not finished[index]:
+                finished[index] = True
+                remaining -= 1
+                onResult(tasks[index], result)
+    finally:
+        for worker in workers:
+            if worker != None and worker[0].is_alive():
+                worker[1].put(None)
+        for worker in workers:
+            if worker != None:
+                worker[0].join(1)
+                if worker[0].is_alive():
+                    worker[0].terminate()
+                    worker[0].join()
+
+##
+#workerLoop
+#Description: The main loop of a worker process (see runWorkers): does the
+#   tasks it takes from its task queue until it takes None
+#
+#Parameters:
+#   slot - the worker's number (int)
+#   init, initArgs, work, finish - see runWorkers
+#   tasks - the worker's (index, task) pairs (multiprocessing.Queue)
+#   results - where the (slot, index, result) of each task goes
+#       (multiprocessing.Queue)
+##
+def workerLoop(slot, init, initArgs, work, finish, tasks, results):
+    init(*initArgs)
+    try:
+        while True:
+            task = tasks.get()
+            if task == None:
+                break
+            results.put((slot, task[0], work(task[1])))
+    finally:
+        if finish != None:
+            finish()
+
+##
+#listLoadableAIs
+#Description: Lists the AIs in the AI folder that can be loaded by this
+#   python.
+#
+#Return: a list of module names (string[])
+##
+def listLoadableAIs():
+    result = []
+    for file in sorted(os.listdir("AI")):
+        if not re.match(".*\\.py$", file):
+            continue
+        try:
+            if loadAIPlayer(file[:-3]) != None:
+                result.append(file[:-3])
+        except Exception:
+            print("Skipping " + file + ": " + str(sys.exc_info()[1]))
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Plays a round-robin AI tournament on a pool of processes.")
+    parser.add_argument("ais", nargs="*", help="the AIs to play (default: every AI that can be loaded)")
+    parser.add_argument("--games", type=int, default=1, help="number of games for each pairing")
+    parser.add_argument("--processes", type=int, default=None, help="number of worker processes (default: one per core)")
+    parser.add_argument("--chunk", type=int, default=25, help="games a worker plays before reporting back")
+    parser.add_argument("--seed", type=int, default=None, help="seed for python's random module")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="run each AI in its own process and forfeit any move that takes longer than this many seconds")
+    parser.add_argument("--ponder", action="store_true",
+                        help="run each AI in its own process and let it think while its opponent moves")
+    parser.add_argument("--database", default=None, help="record every game in this game database (see GameDatabase)")
+    args = parser.parse_args()
+
+    #always run from the directory that contains the AI folder
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    aiNames = args.ais
+    if len(aiNames) == 0:
+        aiNames = listLoadableAIs()
+    for name in aiNames:
+        if loadAIPlayer(name) == None:
+            print("ERROR:  AI '" + name + "' not found.")
+            sys.exit(1)
+    if len(aiNames) < 2:
+        print("ERROR:  a tournament needs at least two AIs.")
+        sys.exit(1)
+
+    database = None
+    if args.database != None:
+        database = GameDatabase(args.database)
+
+    startTime = time.time()
+    scores = runTournament(aiNames, args.games, args.processes, args.chunk, args.seed, True, args.timeout,
+                           args.ponder, database)
+    elapsed = time.time() - startTime
+    if database != None:
+        print(str(database.countGames()) + " games in " + args.database)
+        database.close()
+
+    for score in scores:
+        print(score[0] + ": " + str(score[1]) + " wins, " + str(score[2]) + " losses")
+    totalGames = sum([score[1] for score in scores])
+    print(str(totalGames) + " games in " + ("%.2f" % elapsed) + " seconds (" +
+          ("%.1f" % (totalGames / max(elapsed, 1e-9))) + " games/sec)")
@@ -0,0 +1,331 @@
+import struct, ctypes, multiprocessing
+from collections import namedtuple
+
+##
+# TranspositionTable.py
+#
+# A fixed size table of search results keyed by state hash (see
+# GameState.getHash), so a search can skip positions it has already searched
+# through a different order of moves.  SharedTranspositionTable keeps its
+# results in shared memory so that searches in several processes can use
+# each other's results (see ParallelSearch.py).
+#
+
+#What kind of value a search result holds
+EXACT = 0           #the value of the position
+LOWER_BOUND = 1     #the search failed high: the value is at least this
+UPPER_BOUND = 2     #the search failed low: the value is at most this
+
+##
+#TTEntry
+#Description: One search result in a TranspositionTable.  A namedtuple so
+#   that a full table of entries made of numbers and tuples adds nothing to
+#   the work of Python's garbage collector.
+#
+#Variables:
+#   key - the hash of the position (int)
+#   depth - how deep the position was searched (int)
+#   value - the value the search found (number)
+#   bound - EXACT, LOWER_BOUND or UPPER_BOUND
+#   move - the best move found, or None (see AlphaBetaSearch.moveKey)
+#   generation - the TranspositionTable generation it was stored in (int)
+##
+TTEntry = namedtuple('TTEntry', ['key', 'depth', 'value', 'bound', 'move', 'generation'])
+
+
+##
+#TranspositionTable
+#Description: A bounded table of search results.  Each hash has one slot
+#   (picked from the low bits of the hash).  A new result replaces the one in
+#   its slot (for the same or another position) unless the old result is
+#   from the current generation (see newGeneration) and was searched deeper.
+#
+#Variables:
+#   size - the number of slots (a power of two)
+#   mask - size - 1, used to pick a slot from a hash
+#   slots - the stored TTEntrys (or None) (list)
+#   generation - the current generation (int)
+#   stores - results stored so far (int)
+#   hits - lookups that found their position (int)
+#   misses - lookups that did not (int)
+##
+class TranspositionTable(object):
+
+    ##
+    #__init__
+    #Description: Creates an empty table
+    #
+    #Parameters:
+    #   size - the most results to keep; rounded up to a power of two (int)
+    ##
+    def __init__(self, size=1 << 16):
+        self.size = 1
+        while self.size < size:
+            self.size *= 2
+        self.mask = self.size - 1
+        self.slots = [None] * self.size
+        self.generation = 0
+        self.stores = 0
+        self.hits = 0
+        self.misses = 0
+
+    ##
+    #lookup
+    #Description: Finds the stored result for a position
+    #
+    #Parameters:
+    #   key - the hash of the position (int)
+    #
+    #Return: the TTEntry for the position or None
+    ##
+    def lookup(self, key):
+        entry = self.slots[key & self.mask]
+        if entry != None and entry.key == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    ##
+    #probe
+    #Description: Looks up a position and, if it was searched at least as
+    #   deep as needed, returns a value an alpha-beta search can use in place
+    #   of searching it again.
+    #
+    #Parameters:
+    #   key - the hash of the position (int)
+    #   depth - the depth the position is about to be searched to (int)
+    #   alpha, beta - the current search window (numbers)
+    #
+    #Return: the value to use or None if the position must be searched
+    ##
+    def probe(self, key, depth, alpha, beta):
+        return self.usableValue(self.lookup(key), depth, alpha, beta)
+
+    ##
+    #usableValue
+    #Description: The part of probe that decides whether an entry (from
+    #   lookup) can be used, for callers that also want the entry's move
+    #
+    #Return: the value to use or None if the position must be searched
+    ##
+    def usableValue(self, entry, depth, alpha, beta):
+        if entry == None or entry.depth < depth:
+            return None
+        if entry.bound == EXACT:
+            return entry.value
+        if entry.bound == LOWER_BOUND and entry.value >= beta:
+            return entry.value
+        if entry.bound == UPPER_BOUND and entry.value <= alpha:
+            return entry.value
+        return None
+
+    ##
+    #store
+    #Description: Stores a search result (subject to the replacement rules
+    #   described above)
+    #
+    #Parameters:
+    #   key - the hash of the position (int)
+    #   depth - how deep the position was searched (int)
+    #   value - the value the search found (number)
+    #   bound - EXACT, LOWER_BOUND or UPPER_BOUND
+    #   move - the best move found (best kept to numbers and tuples)
+    ##
+    def store(self, key, depth, value, bound=EXACT, move=None):
+        index = key & self.mask
+        entry = self.slots[index]
+        if entry != None and entry.generation == self.generation and entry.depth > depth:
+            return
+        #keep the best move of a shallower search if this one has none
+        if move == None and entry != None and entry.key == key:
+            move = entry.move
+        self.slots[index] = TTEntry(key, depth, value, bound, move, self.generation)
+        self.stores += 1
+
+    ##
+    #newGeneration
+    #Description: Marks the results stored so far as old (call at the start of
+    #   each new search).  Old results can still be found but are the first to
+    #   be replaced.
+    ##
+    def newGeneration(self):
+        self.generation += 1
+
+    ##
+    #clear
+    #Description: Removes every result from the table
+    ##
+    def clear(self):
+        self.slots = [None] * self.size
+        self.stores = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.slots) - self.slots.count(None)
+
+
+#the most coordinates a move stored in a SharedTranspositionTable can have
+MAX_PACKED_COORDS = 6
+
+#the bit of a SharedTranspositionTable slot's info word that is set in every
+#stored result (a slot of zeros is empty, not a result of value 0)
+SLOT_OCCUPIED = 1 << 63
+
+##
+#SharedTranspositionTable
+#Description: A TranspositionTable whose results are kept in shared memory,
+#   so that every process started after it was made (and given it) reads
+#   and writes the same results.  Each slot is four 64 bit words: the key
+#   XORed with the other three, the depth, bound and generation packed
+#   together with SLOT_OCCUPIED, the value and the move (see packMoveKey).
+#   There are no locks: a slot that was read while another process was
+#   writing it fails the XOR check and is treated as empty.
+#
+#   The counts of stores, hits and misses are kept for each process.  The
+#   generation is too; processes that search together should be given the
+#   same one (see ParallelSearch).
+##
+class SharedTranspositionTable(TranspositionTable):
+
+    ##
+    #__init__
+    #Description: Creates an empty table in shared memory
+    #
+    #Parameters:
+    #   size - the most results to keep; rounded up to a power of two (int)
+    ##
+    def __init__(self, size=1 << 16):
+        super(SharedTranspositionTable, self).__init__(1)
+        while self.size < size:
+            self.size *= 2
+        self.mask = self.size - 1
+        self.slots = None
+        self.words = multiprocessing.RawArray(ctypes.c_uint64, self.size * 4)
+
+    def lookup(self, key):
+        base = (key & self.mask) * 4
+        words = self.words
+        info = words[base + 1]
+        valueBits = words[base + 2]
+        moveWord = words[base + 3]
+        if words[base] ^ info ^ valueBits ^ moveWord != key or not info & SLOT_OCCUPIED:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return TTEntry(key, info & 0xffff, unpackValue(valueBits), (info >> 16) & 3,
+                       unpackMoveKey(moveWord), (info >> 18) & 0xffffffff)
+
+    def store(self, key, depth, value, bound=EXACT, move=None):
+        generation = self.generation & 0xffffffff
+        entry = self.peek(key)
+        if entry != None and entry[1] == generation and entry[2] > depth:
+            return
+        moveWord = packMoveKey(move)
+        #keep the best move of a shallower search if this one has none
+        if moveWord == 0 and entry != None and entry[0] == key:
+            moveWord = entry[3]
+        info = min(depth, 0xffff) | (bound << 16) | (generation << 18) | SLOT_OCCUPIED
+        valueBits = packValue(value)
+        base = (key & self.mask) * 4
+        words = self.words
+        words[base] = key ^ info ^ valueBits ^ moveWord
+        words[base + 1] = info
+        words[base + 2] = valueBits
+        words[base + 3] = moveWord
+        self.stores += 1
+
+    ##
+    #peek
+    #Description: Reads the slot a key goes in without unpacking it
+    #
+    #Return: (key, generation, depth, move word) of the result in the slot,
+    #   or None if the slot is empty or was being written
+    ##
+    def peek(self, key):
+        base = (key & self.mask) * 4
+        words = self.words
+        info = words[base + 1]
+        valueBits = words[base + 2]
+        moveWord = words[base + 3]
+        if not info & SLOT_OCCUPIED:
+            return None
+        return (words[base] ^ info ^ valueBits ^ moveWord, (info >> 18) & 0xffffffff, info & 0xffff,
+                moveWord)
+
+    def clear(self):
+        for index in range(0, len(self.words)):
+            self.words[index] = 0
+        self.stores = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        count = 0
+        for index in range(0, self.size):
+            if self.words[index * 4 + 1] & SLOT_OCCUPIED:
+                count += 1
+        return count
+
+
+##
+#packValue
+#Description: Returns the bits of a float as a 64 bit int
+##
+def packValue(value):
+    return struct.unpack('<Q', struct.pack('<d', value))[0]
+
+##
+#unpackValue
+#Description: Does the reverse of packValue
+##
+def unpackValue(bits):
+    return struct.unpack('<d', struct.pack('<Q', bits))[0]
+
+##
+#packMoveKey
+#Description: Packs a move key (see AlphaBetaSearch.moveKey) into a 64 bit
+#   int: the move type, the build type, the number of coordinates and seven
+#   bits for each coordinate.  0 stands for None, and for a move that can't
+#   be packed (one with more than MAX_PACKED_COORDS coordinates).
+##
+def packMoveKey(move):
+    if move == None:
+        return 0
+    moveType, coords, buildType = move
+    result = moveType + 1
+    if buildType != None:
+        result |= (buildType + 4) << 2
+    if coords != None:
+        if len(coords) > MAX_PACKED_COORDS:
+            return 0
+        result |= (len(coords) + 1) << 6
+        shift = 9
+        for coord in coords:
+            result |= (coord[0] * 10 + coord[1]) << shift
+            shift += 7
+    return result
+
+##
+#unpackMoveKey
+#Description: Does the reverse of packMoveKey
+##
+def unpackMoveKey(word):
+    if word == 0:
+        return None
+    moveType = (word & 3) - 1
+    buildType = None
+    if (word >> 2) & 15 != 0:
+        buildType = ((word >> 2) & 15) - 4
+    coords = None
+    count = (word >> 6) & 7
+    if count != 0:
+        coords = []
+        shift = 9
+        for i in range(0, count - 1):
+            cell = (word >> shift) & 127
+            coords.append((cell // 10, cell % 10))
+            shift += 7
+        coords = tuple(coords)
+    return (moveType, coords, buildType)
@@ -0,0 +1,166 @@
+from collections import namedtuple
+from Constants import *
+from Move import Move
+from AIPlayerUtils import listAllLegalMoves, getAntAt
+from GameRules import getNextState, getWinner, listAttackTargets
+
+##
+# TurnGenerator.py
+#
+# Lists the different ways a player can play out a whole turn.  A turn is a
+# sequence of MOVE_ANT and BUILD moves followed by END, and moving ant A and
+# then ant B usually leads to the same position as moving B and then A.  A
+# search that treats every single move as a level of its tree visits each of
+# those positions once per ordering; listTurns visits it once.  A search can
+# then work one turn per level:
+#
+#    for turn in listTurns(currentState, limit=500, evaluate=self.evaluate):
+#        ...search turn.state (the other player's turn)...
+#    return turn.moves[0]
+#
+# An ant that ends a move with more than one enemy in range can attack any
+# of them, and each choice is a different way to play the turn; the player
+# should then attack the target listTurns chose for the move (turn.attacks)
+# when the game asks it (getAttack).
+#
+# The positions reached during the turn are found breadth first (all one
+# move turns, then all two move turns, ...) and two positions with the same
+# Zobrist hash (see GameState.getHash) are taken to be the same; only the
+# first way found to reach a position is kept.  The child states share what
+# they do not change with their parents (see GameState.lightclone), so they
+# must not be changed except through GameRules.
+#
+
+#the default most turns listTurns returns
+TURN_LIMIT = 2000
+
+##
+#Turn
+#Description: One way to play out a turn
+#
+#Variables:
+#   moves - the moves of the turn in the order to play them, ending with an
+#       END move unless the turn wins the game (Move[])
+#   state - the state after the turn (GameState)
+#   attacks - for each move, the coord its ant attacks, or None if it
+#       doesn't attack (tuple[])
+##
+Turn = namedtuple('Turn', ['moves', 'state', 'attacks'])
+
+
+##
+#listTurns
+#Description: Lists the distinct outcomes of the current player's turn
+#
+#Parameters:
+#   currentState - the state at the start of the turn (not changed) (GameState)
+#   limit - the most turns to return, or None for all of them (int)
+#   beamWidth - if not None, only this many of the positions reached after
+#       each number of moves are played on from (the best ones by evaluate,
+#       or the first found if there is no evaluate) (int)
+#   evaluate - evaluate(state, playerId) returns how good a state is for the
+#       player (bigger is better).  If given, the turns are returned best
+#       first and the beam keeps the best positions.
+#
+#Return: a list of Turns, one per distinct end-of-turn position
+##
+def listTurns(currentState, limit=TURN_LIMIT, beamWidth=None, evaluate=None):
+    me = currentState.whoseTurn
+    start = currentState.fastclone()
+    seen = set([start.getHash()])
+    outcomes = set()
+    turns = []
+    frontier = [([], start, [])]
+
+    while len(frontier) > 0 and not isFull(turns, limit):
+        nextFrontier = []
+        for moves, state, attacks in frontier:
+            addTurn(turns, outcomes, moves, state, attacks)
+            if isFull(turns, limit):
+                break
+            if getWinner(state) != None:
+                continue
+            for move in listAllLegalMoves(state, True):
+                if move.moveType == END:
+                    continue
+                for attackCoord in listMoveAttacks(state, move):
+                    child = getNextState(state, move, attackCoord, share=True)
+                    key = child.getHash()
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    nextFrontier.append((moves + [move], child, attacks + [attackCoord]))
+        frontier = nextFrontier
+        if beamWidth != None and len(frontier) > beamWidth:
+            if evaluate != None:
+                frontier = sortByValue(frontier, evaluate, me)
+            frontier = frontier[:beamWidth]
+
+    if evaluate != None:
+        turns = sortByValue(turns, evaluate, me)
+    return turns
+
+##
+#addTurn
+#Description: Ends a turn at the given position and adds it to the list of
+#   turns unless another turn ended in the same position.  A position that
+#   wins the game ends the turn without an END move.
+#
+#Parameters:
+#   turns - the turns found so far (Turn[])
+#   outcomes - the hashes of the positions the turns ended in (set)
+#   moves - the moves that reached the position (Move[])
+#   state - the position (GameState)
+#   attacks - the attacks of the moves (see Turn) (tuple[])
+##
+def addTurn(turns, outcomes, moves, state, attacks):
+    if getWinner(state) != None:
+        endState = state
+    else:
+        endMove = Move(END, None, None)
+        endState = getNextState(state, endMove, share=True)
+        moves = moves + [endMove]
+        attacks = attacks + [None]
+    key = endState.getHash()
+    if key in outcomes:
+        return
+    outcomes.add(key)
+    turns.append(Turn(moves, endState, attacks))
+
+##
+#listMoveAttacks
+#Description: Lists the targets the ant of a move can attack once it has
+#   moved
+#
+#Parameters:
+#   state - the state before the move (GameState)
+#   move - a legal move (Move)
+#
+#Return: the coords of the targets, or [None] if the move has no attack
+#   (list)
+##
+def listMoveAttacks(state, move):
+    if move.moveType != MOVE_ANT:
+        return [None]
+    ant = getAntAt(state, move.coordList[0])
+    targets = listAttackTargets(state, ant, move.coordList[-1])
+    if len(targets) == 0:
+        return [None]
+    return targets
+
+##
+#isFull
+#Description: Returns whether enough turns have been found
+##
+def isFull(turns, limit):
+    return limit != None and len(turns) >= limit
+
+##
+#sortByValue
+#Description: Sorts (moves, state, attacks) entries (or Turns) best first for
+#   a player
+##
+def sortByValue(items, evaluate, playerId):
+    scored = [(-evaluate(items[i][1], playerId), i) for i in range(0, len(items))]
+    scored.sort()
+    return [items[entry[1]] for entry in scored]
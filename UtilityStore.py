@@ -0,0 +1,237 @@
+import os, struct
+
+##
+# UtilityStore.py
+#
+# A table of state utilities kept on disk, for TD learning AIs (tdbot.py,
+# rowland17_creighton17.py, ...) that map each condensed state (an int) to
+# a utility.  Pickling the whole table after every game, and unpickling it
+# all when the AI starts, takes longer and longer as the table grows; a
+# UtilityStore instead keeps an append-only log of (state, utility) records:
+#
+#    self.state_list = UtilityStore("test_list.utils", default=0.0)
+#    ...
+#    self.state_list[cstate] = util      #used like a dict
+#    ...
+#    self.state_list.flush()             #at the end of the game
+#
+# flush appends a record for each state whose utility changed since the
+# last flush, so saving a game costs the same however big the table is.  The
+# log is read (the last record for a state wins) the first time the table is
+# used, not when it is made.  When the log holds more than compactRatio
+# times as many records as the table has states, flush rewrites it with one
+# record per state.
+#
+# The utilities are kept in a dict, or in whatever the table function given
+# to the store makes (such as a UtilityTable, see UtilityTable.py).  If the
+# table forgets states, the changes to a state it forgets before a flush are
+# not saved, and compacting the log drops the states it has forgotten.
+#
+# A record holds a 64 bit state.  A learner whose states are wider (such as
+# rowland17_creighton17.py) makes its store with wideKeys, whose records
+# hold 128 bit states (the two kinds of log can't be read as each other).
+#
+
+#a log record: the state (a signed 64 bit int) and its utility (a double)
+RECORD = struct.Struct('<qd')
+
+#a log record of a store with wideKeys: the high and low 64 bits of the
+#state (a signed 128 bit int) and its utility
+WIDE_RECORD = struct.Struct('<qQd')
+
+#how many records are read from the log at a time
+READ_RECORDS = 1 << 16
+
+#the default ratio of log records to states that triggers a compaction
+COMPACT_RATIO = 2
+
+#logs with fewer records than this are never compacted
+COMPACT_MIN_RECORDS = 4096
+
+#the range of states a record can hold, and a wide record
+MIN_KEY = -(1 << 63)
+MAX_KEY = (1 << 63) - 1
+MIN_WIDE_KEY = -(1 << 127)
+MAX_WIDE_KEY = (1 << 127) - 1
+
+
+##
+#UtilityStore
+#Description: A dict of state -> utility backed by an append-only log
+#
+#Variables:
+#   path - the log file (string)
+#   default - if not None, the utility of a state not in the table; looking
+#       one up adds it, like a defaultdict (number)
+#   compactRatio - see above (number)
+#   table - makes an empty table to keep the utilities in (function)
+#   wideKeys - whether the log's records hold 128 bit states (boolean)
+#   record - the format of a log record (struct.Struct)
+#   entries - the utility of each state, or None until the log is read (dict)
+#   changed - the states changed since the last flush (set)
+#   records - how many records the log holds (int)
+##
+class UtilityStore(object):
+
+    ##
+    #__init__
+    #Description: Opens a store (the log is read when the table is first used)
+    #
+    #Parameters:
+    #   path - the log file; it is made by the first flush (string)
+    #   default - see above (number)
+    #   compactRatio - see above (number)
+    #   table - see above (default: dict)
+    #   wideKeys - see above (boolean)
+    ##
+    def __init__(self, path, default=None, compactRatio=COMPACT_RATIO, table=dict, wideKeys=False):
+        self.path = path
+        self.default = default
+        self.compactRatio = compactRatio
+        self.table = table
+        self.wideKeys = wideKeys
+        self.record = WIDE_RECORD if wideKeys else RECORD
+        self.entries = None
+        self.changed = set()
+        self.records = 0
+
+    ##
+    #load
+    #Description: Reads the log into the table (if it hasn't been read).  A
+    #   record cut short (by the AI being stopped part way through a flush)
+    #   is dropped.
+    ##
+    def load(self):
+        if self.entries != None:
+            return
+        self.entries = self.table()
+        self.records = 0
+        if not os.path.isfile(self.path):
+            return
+        size = self.record.size
+        with open(self.path, 'rb') as file:
+            while True:
+                data = file.read(READ_RECORDS * size)
+                count = len(data) // size
+                if count > 0:
+                    if self.wideKeys:
+                        values = struct.unpack('<' + 'qQd' * count, data[:count * size])
+                        for i in range(0, 3 * count, 3):
+                            self.entries[(values[i] << 64) | values[i + 1]] = values[i + 2]
+                    else:
+                        values = struct.unpack('<' + 'qd' * count, data[:count * size])
+                        for i in range(0, 2 * count, 2):
+                            self.entries[values[i]] = values[i + 1]
+                    self.records += count
+                if len(data) < READ_RECORDS * size:
+                    break
+        if os.path.getsize(self.path) != self.records * size:
+            with open(self.path, 'r+b') as file:
+                file.truncate(self.records * size)
+
+    def __len__(self):
+        self.load()
+        return len(self.entries)
+
+    def __contains__(self, key):
+        self.load()
+        return key in self.entries
+
+    def __iter__(self):
+        self.load()
+        return iter(self.entries)
+
+    def __getitem__(self, key):
+        self.load()
+        if key not in self.entries and self.default != None:
+            self[key] = self.default
+        return self.entries[key]
+
+    def __setitem__(self, key, value):
+        self.load()
+        if self.wideKeys:
+            if not MIN_WIDE_KEY <= key <= MAX_WIDE_KEY:
+                raise ValueError("state " + str(key) + " does not fit in 128 bits")
+        elif not MIN_KEY <= key <= MAX_KEY:
+            raise ValueError("state " + str(key) + " does not fit in 64 bits (see wideKeys)")
+        if key in self.entries and self.entries.get(key) == value:
+            return
+        self.entries[key] = value
+        self.changed.add(key)
+
+    ##
+    #get
+    #Description: The utility of a state, or the given default if the state
+    #   is not in the table (the state is not added)
+    ##
+    def get(self, key, default=None):
+        self.load()
+        return self.entries.get(key, default)
+
+    def keys(self):
+        self.load()
+        return list(self.entries.keys())
+
+    def items(self):
+        self.load()
+        return list(self.entries.items())
+
+    ##
+    #update
+    #Description: Sets the utilities of all of the states in a dict
+    ##
+    def update(self, utilities):
+        for key in utilities:
+            self[key] = utilities[key]
+
+    ##
+    #flush
+    #Description: Writes the utilities changed since the last flush to the
+    #   log, and compacts the log if it has grown too long
+    #
+    #Return: how many records were written (int)
+    ##
+    def flush(self):
+        if len(self.changed) == 0:
+            return 0
+        keys = [key for key in self.changed if key in self.entries]
+        data = b''.join([self.packRecord(key, self.entries.get(key)) for key in keys])
+        with open(self.path, 'ab') as file:
+            file.write(data)
+        self.records += len(keys)
+        self.changed = set()
+        if (self.records >= COMPACT_MIN_RECORDS and
+                self.records > self.compactRatio * len(self.entries)):
+            self.compact()
+        return len(keys)
+
+    ##
+    #compact
+    #Description: Rewrites the log with one record per state (and writes any
+    #   changes that haven't been flushed)
+    ##
+    def compact(self):
+        self.load()
+        tempPath = self.path + ".tmp"
+        with open(tempPath, 'wb') as file:
+            items = list(self.entries.items())
+            for start in range(0, len(items), READ_RECORDS):
+                file.write(b''.join([self.packRecord(key, value)
+                                     for key, value in items[start:start + READ_RECORDS]]))
+        #(os.rename won't replace a file on Windows)
+        if os.path.isfile(self.path) and os.name == 'nt':
+            os.remove(self.path)
+        os.rename(tempPath, self.path)
+        self.records = len(self.entries)
+        self.changed = set()
+
+    ##
+    #packRecord
+    #Description: Packs a state and its utility into a log record
+    #
+    #Return: the record (bytes)
+    ##
+    def packRecord(self, key, value):
+        if self.wideKeys:
+            return WIDE_RECORD.pack(key >> 64, key & ((1 << 64) - 1), value)
+        return RECORD.pack(key, value)
@@ -0,0 +1,250 @@
+import numpy as np
+
+##
+# UtilityTable.py
+#
+# A table of state -> utility for TD learning AIs that holds many more
+# states than a dict in the same memory.  A dict spends around 100 bytes on
+# each (int, float) entry; a UtilityTable keeps the states in one NumPy array
+# of 64 bit ints and the utilities in an array of 32 bit floats, as an open
+# addressed hash table (linear probing).  That is 12 bytes a slot, and
+# between 17 and 35 bytes a state depending on how full the table is (it
+# doubles when 70% of the slots are used).  It is used like a dict, and
+# UtilityStore can keep its utilities in one:
+#
+#    self.state_list = UtilityStore("test_list.utils", default=0.0, table=learnerTable)
+#
+# The states must fit in a signed 64 bit int; a learner with wider states
+# (such as rowland17_creighton17.py) keeps them in a dict.
+#
+# A table made with maxEntries counts how often each state is used (looked
+# up or set), and when it is full forgets the least used quarter of its
+# states (and halves the counts of the rest, so that states seen lately can
+# catch up).
+#
+
+#marks an empty slot (so it can't be used as a state)
+EMPTY = -(1 << 63)
+
+#the fraction of the slots that can be used before the table grows
+MAX_LOAD = 0.7
+
+#the number of slots a new table starts with (a power of 2)
+MIN_SLOTS = 1024
+
+#the fraction of the states a full table keeps when it forgets states
+EVICT_KEEP = 0.75
+
+#the most states a learnerTable keeps (about 32MB of arrays)
+LEARNER_MAX_ENTRIES = 1 << 20
+
+#spreads the states over the slots (Fibonacci hashing: the top bits of
+#state * 2^64 / golden ratio)
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+HASH_MASK = (1 << 64) - 1
+
+
+##
+#UtilityTable
+#Description: A dict of state (int) -> utility (float) kept in NumPy arrays
+#
+#Variables:
+#   maxEntries - the most states to hold, or None for no limit (int)
+#   slotKeys - the state in each slot, or EMPTY (int64 array)
+#   slotValues - the utility in each slot (float32 array)
+#   slotVisits - how often the state in each slot has been used, if
+#       maxEntries is set (uint32 array)
+#   count - how many slots are used (int)
+#   shift - 64 - log2(the number of slots) (int)
+##
+class UtilityTable(object):
+
+    ##
+    #__init__
+    #Description: Creates an empty table
+    #
+    #Parameters:
+    #   size - how many states to make room for (int)
+    #   maxEntries - see above (int)
+    ##
+    def __init__(self, size=0, maxEntries=None):
+        self.maxEntries = maxEntries
+        self.count = 0
+        self.allocate(slotsFor(size))
+
+    ##
+    #allocate
+    #Description: Replaces the arrays with empty ones
+    #
+    #Parameters:
+    #   numSlots - the size of the arrays (a power of 2)
+    ##
+    def allocate(self, numSlots):
+        self.slotKeys = np.full(numSlots, EMPTY, dtype=np.int64)
+        self.slotValues = np.zeros(numSlots, dtype=np.float32)
+        self.slotVisits = None
+        if self.maxEntries != None:
+            self.slotVisits = np.zeros(numSlots, dtype=np.uint32)
+        self.shift = 64 - (numSlots.bit_length() - 1)
+
+    ##
+    #findSlot
+    #Description: Finds the slot a state is in, or the empty slot it would go in
+    #
+    #Return: the slot (int)
+    ##
+    def findSlot(self, key):
+        keys = self.slotKeys
+        mask = len(keys) - 1
+        slot = ((key * HASH_MULTIPLIER) & HASH_MASK) >> self.shift
+        while True:
+            found = keys.item(slot)
+            if found == key or found == EMPTY:
+                return slot
+            slot = (slot + 1) & mask
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, key):
+        return self.slotKeys.item(self.findSlot(key)) != EMPTY
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __getitem__(self, key):
+        slot = self.findSlot(key)
+        if self.slotKeys.item(slot) == EMPTY:
+            raise KeyError(key)
+        if self.slotVisits is not None:
+            self.slotVisits[slot] += 1
+        return self.slotValues.item(slot)
+
+    def __setitem__(self, key, value):
+        if not EMPTY < key < 1 << 63:
+            raise ValueError("state " + str(key) + " can't be kept in a UtilityTable")
+        slot = self.findSlot(key)
+        if self.slotKeys.item(slot) == EMPTY:
+            if self.maxEntries != None and self.count >= self.maxEntries:
+                self.evict()
+                slot = self.findSlot(key)
+            elif self.count + 1 > MAX_LOAD * len(self.slotKeys):
+                self.rebuild(len(self.slotKeys) * 2)
+                slot = self.findSlot(key)
+            self.slotKeys[slot] = key
+            self.count += 1
+        self.slotValues[slot] = value
+        if self.slotVisits is not None:
+            self.slotVisits[slot] += 1
+
+    ##
+    #get
+    #Description: The utility of a state, or the given default if the state
+    #   is not in the table
+    ##
+    def get(self, key, default=None):
+        slot = self.findSlot(key)
+        if self.slotKeys.item(slot) == EMPTY:
+            return default
+        if self.slotVisits is not None:
+            self.slotVisits[slot] += 1
+        return self.slotValues.item(slot)
+
+    def keys(self):
+        return self.slotKeys[self.slotKeys != EMPTY].tolist()
+
+    def items(self):
+        used = self.slotKeys != EMPTY
+        return list(zip(self.slotKeys[used].tolist(), self.slotValues[used].tolist()))
+
+    ##
+    #update
+    #Description: Sets the utilities of all of the states in a dict
+    ##
+    def update(self, utilities):
+        for key in utilities:
+            self[key] = utilities[key]
+
+    ##
+    #nbytes
+    #Description: The memory the table's arrays take up
+    #
+    #Return: the size in bytes (int)
+    ##
+    def nbytes(self):
+        size = self.slotKeys.nbytes + self.slotValues.nbytes
+        if self.slotVisits is not None:
+            size += self.slotVisits.nbytes
+        return size
+
+    ##
+    #evict
+    #Description: Forgets the least used states, keeping EVICT_KEEP of them,
+    #   and halves the visit counts of the rest
+    ##
+    def evict(self):
+        used = np.nonzero(self.slotKeys != EMPTY)[0]
+        keep = int(self.count * EVICT_KEEP)
+        #the most visited first (a stable sort, so ties keep the older slots)
+        order = np.argsort(-self.slotVisits[used].astype(np.int64), kind='mergesort')
+        self.rebuild(len(self.slotKeys), used[order[:keep]])
+        self.slotVisits >>= 1
+
+    ##
+    #rebuild
+    #Description: Moves states into new arrays
+    #
+    #Parameters:
+    #   numSlots - the size of the new arrays (a power of 2)
+    #   slots - the slots of the states to move (default: all of them)
+    ##
+    def rebuild(self, numSlots, slots=None):
+        if slots is None:
+            slots = np.nonzero(self.slotKeys != EMPTY)[0]
+        keys = self.slotKeys[slots]
+        values = self.slotValues[slots]
+        visits = None if self.slotVisits is None else self.slotVisits[slots]
+        self.allocate(numSlots)
+        self.count = len(keys)
+        mask = numSlots - 1
+
+        #every state probes from its home slot; each round the states whose
+        #next slot is empty take it (one state per slot) and the rest move
+        #on, so each state ends up where findSlot will look for it
+        home = (keys.view(np.uint64) * np.uint64(HASH_MULTIPLIER)) >> np.uint64(self.shift)
+        pending = np.arange(len(keys))
+        probe = home.astype(np.int64)
+        while len(pending) > 0:
+            free = self.slotKeys[probe] == EMPTY
+            #the first state (in pending's order) to want each free slot
+            targets, first = np.unique(probe[free], return_index=True)
+            winners = pending[free][first]
+            self.slotKeys[targets] = keys[winners]
+            self.slotValues[targets] = values[winners]
+            if visits is not None:
+                self.slotVisits[targets] = visits[winners]
+            placed = np.zeros(len(pending), dtype=bool)
+            placed[np.nonzero(free)[0][first]] = True
+            pending = pending[~placed]
+            probe = (probe[~placed] + 1) & mask
+
+
+##
+#slotsFor
+#Description: The number of slots a table needs for a number of states
+#
+#Return: a power of 2 (int)
+##
+def slotsFor(size):
+    numSlots = MIN_SLOTS
+    while size > MAX_LOAD * numSlots:
+        numSlots *= 2
+    return numSlots
+
+##
+#learnerTable
+#Description: Makes the table the TD learning AIs keep their utilities in:
+#   a UtilityTable that holds at most LEARNER_MAX_ENTRIES states
+##
+def learnerTable():
+    return UtilityTable(maxEntries=LEARNER_MAX_ENTRIES)
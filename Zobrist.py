@@ -0,0 +1,104 @@
+import random
+from Constants import *
+
+##
+# Zobrist.py
+#
+# Zobrist hashing of GameStates.  Every piece of a state (an ant with its
+# type, health, carrying and hasMoved flags on a cell; a construction with
+# its owner and capture health on a cell; each player's food count; whose
+# turn it is; the phase) has a random 64 bit key, and the hash of a state is
+# all of its keys XORed together.  Because XOR undoes itself, a move can
+# update the hash by XORing out the keys of whatever it changes and XORing
+# in the new ones (see GameRules.py).
+#
+# The keys come from a fixed seed so a state has the same hash in every
+# process and every run, which makes the hash usable as a stored key.
+#
+
+ZOBRIST_SEED = 0x5eed
+
+#the largest food count with its own key (larger counts share it)
+MAX_HASHED_FOOD = 63
+
+##
+#buildKeys
+#Description: Makes a list of random 64 bit keys
+##
+def buildKeys(generator, count):
+    return [generator.getrandbits(64) for i in range(0, count)]
+
+keyGenerator = random.Random(ZOBRIST_SEED)
+#indexed by cell, player, type, health (0-4) and flags (carrying + 2 * hasMoved)
+ANT_KEYS = buildKeys(keyGenerator, BOARD_LENGTH * BOARD_LENGTH * 2 * 5 * 5 * 4)
+#indexed by cell, type (0-3), owner (0-2) and capture health (0-3)
+CONSTR_KEYS = buildKeys(keyGenerator, BOARD_LENGTH * BOARD_LENGTH * 4 * 3 * 4)
+#indexed by player and food count
+FOOD_KEYS = [buildKeys(keyGenerator, MAX_HASHED_FOOD + 1) for i in range(0, 2)]
+PHASE_KEYS = buildKeys(keyGenerator, PLAY_PHASE + 1)
+PLAYER_TWO_KEY = keyGenerator.getrandbits(64)
+del keyGenerator
+
+##
+#antKey
+#Description: Returns the key for an ant (including where it is)
+##
+def antKey(ant):
+    flags = 0
+    if ant.carrying:
+        flags += 1
+    if ant.hasMoved:
+        flags += 2
+    cell = ant.coords[0] * BOARD_LENGTH + ant.coords[1]
+    return ANT_KEYS[(((cell * 2 + ant.player) * 5 + ant.type) * 5 + max(ant.health, 0)) * 4 + flags]
+
+##
+#constrKey
+#Description: Returns the key for a construction (including where it is)
+##
+def constrKey(constr):
+    owner = NEUTRAL
+    captureHealth = 0
+    if hasattr(constr, 'player'):
+        owner = constr.player
+        captureHealth = max(constr.captureHealth or 0, 0)
+    cell = constr.coords[0] * BOARD_LENGTH + constr.coords[1]
+    return CONSTR_KEYS[((cell * 4 + constr.type - ANTHILL) * 3 + owner) * 4 + captureHealth]
+
+##
+#foodKey
+#Description: Returns the key for a player's food count
+##
+def foodKey(playerId, foodCount):
+    return FOOD_KEYS[playerId][min(max(foodCount, 0), MAX_HASHED_FOOD)]
+
+##
+#turnKey
+#Description: Returns the key for whose turn it is
+##
+def turnKey(whoseTurn):
+    if whoseTurn == PLAYER_TWO:
+        return PLAYER_TWO_KEY
+    return 0
+
+##
+#computeHash
+#Description: Works out the hash of a state from scratch (from its
+#   inventories, so it works for states without a board)
+#
+#Parameters:
+#   state - the state to hash (GameState)
+#
+#Return: the hash (a 64 bit int)
+##
+def computeHash(state):
+    result = PHASE_KEYS[state.phase] ^ turnKey(state.whoseTurn)
+    for playerId in (PLAYER_ONE, PLAYER_TWO):
+        inv = state.inventories[playerId]
+        result ^= foodKey(playerId, inv.foodCount)
+        for ant in inv.ants:
+            result ^= antKey(ant)
+    for inv in state.inventories:
+        for constr in inv.constrs:
+            result ^= constrKey(constr)
+    return result